@@ -7,19 +7,30 @@ import os
 import re
 import time
 import logging
-from datetime import datetime
+import unicodedata
+from datetime import datetime, timezone
 import json
+import hashlib
+import pathlib
 import asyncio
-from typing import Optional, Dict, Any, List, Union, Tuple
+import multiprocessing
+import pickle
+import shutil
+import tempfile
+import zlib
+from typing import Optional, Dict, Any, List, Tuple
 from difflib import SequenceMatcher
+from concurrent.futures import ProcessPoolExecutor
 from functools import lru_cache
-from cachetools import TTLCache, cached
+from bisect import bisect_right
+from cachetools import TTLCache
 
+import httpx
 from fastapi import FastAPI, HTTPException, Request, Response, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.gzip import GZipMiddleware
-from fastapi.responses import JSONResponse
-from pydantic import BaseModel, Field, field_validator
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel
 from starlette.middleware.base import BaseHTTPMiddleware
 from dotenv import load_dotenv
 
@@ -61,9 +72,46 @@ class Config:
     
     # Matching settings
     MIN_MATCH_SCORE = float(os.getenv("MIN_MATCH_SCORE", "0.6"))  # Minimum similarity score
+    MATCH_TIME_BUDGET_MS = float(os.getenv("MATCH_TIME_BUDGET_MS", "50"))  # Per-request fuzzy matching budget
+    
+    # Input limits for user supplied make/model and defect text (regex and SequenceMatcher cost grows with length)
+    MAX_MAKE_LENGTH = int(os.getenv("MAX_MAKE_LENGTH", "40"))
+    MAX_MODEL_LENGTH = int(os.getenv("MAX_MODEL_LENGTH", "80"))
+    MAX_DEFECT_LENGTH = int(os.getenv("MAX_DEFECT_LENGTH", "500"))
     
     # Year handling settings
     PIVOT_YEAR = int(os.getenv("PIVOT_YEAR", "50"))  # Years below 50 are 2000s, above are 1900s
+    
+    # Identity resolver settings
+    IDENTITY_STORE_DIR = os.getenv("IDENTITY_STORE_DIR", "./cache/identity")
+    IDENTITY_TTL = int(os.getenv("IDENTITY_TTL", str(30 * 86400)))  # 30 days by default
+    BULLETINS_API_URL = os.getenv("BULLETINS_API_URL")  # Optional - bulletin IDs are skipped if unset
+    UPSTREAM_TIMEOUT = float(os.getenv("UPSTREAM_TIMEOUT", "5"))
+    
+    # Startup ingest - catalog files are parsed in this many processes (1 = serial)
+    INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", str(os.cpu_count() or 1)))
+    INGEST_PARALLEL_MIN_FILES = int(os.getenv("INGEST_PARALLEL_MIN_FILES", "200"))  # Smaller catalogs aren't worth the pool startup
+    CATALOG_RETRY_AFTER = int(os.getenv("CATALOG_RETRY_AFTER", "5"))  # Retry-After (seconds) on lookups while loading
+    
+    # Catalog sharding - 0 serves the whole catalog in-process, N partitions it by make across N processes
+    CATALOG_SHARDS = int(os.getenv("CATALOG_SHARDS", "0"))
+    SHARD_STARTUP_TIMEOUT = float(os.getenv("SHARD_STARTUP_TIMEOUT", "300"))
+    SHARD_REQUEST_TIMEOUT = float(os.getenv("SHARD_REQUEST_TIMEOUT", "10"))
+    
+    # Catalog export - versions handed out as X-Catalog-Version, accepted back as since=
+    CATALOG_VERSIONS_FILE = os.getenv("CATALOG_VERSIONS_FILE", "./cache/catalog_versions.json")
+    EXPORT_VERSION_HISTORY = int(os.getenv("EXPORT_VERSION_HISTORY", "50"))  # Each keeps the key set of the whole catalog
+    EXPORT_COMPRESSION_LEVEL = int(os.getenv("EXPORT_COMPRESSION_LEVEL", "6"))
+    
+    # Operation percentiles - engine capacity band edges in litres, and the smallest segment worth reporting
+    CAPACITY_BANDS = [float(edge) for edge in os.getenv("CAPACITY_BANDS", "1.2,1.6,2.0,2.5,3.0").split(",")]
+    PERCENTILE_MIN_SAMPLES = int(os.getenv("PERCENTILE_MIN_SAMPLES", "5"))
+    
+    # Repair time comparison - vehicles per request
+    COMPARE_MAX_VEHICLES = int(os.getenv("COMPARE_MAX_VEHICLES", "5"))
+    
+    # MOT defect estimates - distinct defect texts kept with their compiled rule matches
+    DEFECT_CACHE_SIZE = int(os.getenv("DEFECT_CACHE_SIZE", "10000"))
 
 # Models
 class VehicleDataRequest(BaseModel):
@@ -72,6 +120,17 @@ class VehicleDataRequest(BaseModel):
 class TechSpecsRequest(BaseModel):
     vehicleData: Dict[str, Any]
 
+class IdentityRequest(BaseModel):
+    vehicleData: Dict[str, Any]
+
+class DefectEstimateRequest(BaseModel):
+    vehicleData: Dict[str, Any]
+    defects: Optional[List[Dict[str, Any]]] = None  # Defaults to every defect in vehicleData.motTests
+
+class CompareRequest(BaseModel):
+    vehicles: List[Dict[str, Any]]  # vehicleData of each vehicle, in column order
+    commonOnly: bool = False  # Only operations every vehicle has
+
 class HealthResponse(BaseModel):
     status: str
     timestamp: str
@@ -79,15 +138,103 @@ class HealthResponse(BaseModel):
     cacheSize: int
     availableVehicles: int
     availableTechSpecs: int
+    resolvedIdentities: int
+    catalogShards: int = 0
+    shardMemoryBytes: List[int] = []
 
 # Initialize caches using cachetools
 vehicle_cache = TTLCache(maxsize=Config.CACHE_MAXSIZE, ttl=Config.CACHE_TTL)
 tech_specs_cache = TTLCache(maxsize=Config.CACHE_MAXSIZE, ttl=Config.CACHE_TTL)
+year_ranges = TTLCache(maxsize=Config.CACHE_MAXSIZE, ttl=Config.CACHE_TTL)  # Matched year ranges per canonical query
+
+# Response cache hit/miss counters per endpoint
+cache_stats = {
+    endpoint: {"hits": 0, "misses": 0}
+    for endpoint in ("vehicles", "tech-specs", "repair-times-lookup", "tech-specs-lookup", "compare")
+}
 
 # Storage for vehicle data and indexes
 vehicle_data = {}  # For repair times
 tech_specs_data = {}  # For technical specifications
 vehicle_index = {}  # Combined index for both types
+catalog_version = ""  # Fingerprint of the data files currently loaded
+vehicle_profiles = {}  # Prebuilt combined documents per catalog identity
+rejoined_profiles = TTLCache(maxsize=Config.CACHE_MAXSIZE, ttl=Config.CACHE_TTL)  # Repair times joined to a tech specs match of the request's own
+engine_index = {}  # Engine code and capacity bucket lookups per data type (see build_engine_index)
+catalog_versions = None  # Exported catalog versions with their key sets, and the key read from each file - loaded on first use
+catalog_status = {"state": "loading", "loadSeconds": None, "task": None}  # Background startup ingest
+vehicle_operations = {}  # Labour operations per catalog identity, keyed by operation ID
+operation_catalog = {}  # Every operation ID seen at ingest -> (action, component, qualifiers)
+operation_stats = {}  # (segment type, segment) -> operation ID -> hours distribution (see build_operation_stats)
+defect_index = {"pattern": None, "rules": {}}  # MOT defect rules compiled against operation_catalog
+
+# Persistent VRN -> catalog identity mapping
+class IdentityStore:
+    """
+    Stores the result of resolving a registration to catalog keys, one JSON file per VRN,
+    so later visits for the same vehicle skip matching entirely. Entries are only reused
+    while they are within IDENTITY_TTL and were resolved against the current catalog.
+    """
+    def __init__(self, store_dir=Config.IDENTITY_STORE_DIR):
+        self.store_dir = pathlib.Path(store_dir)
+        self.store_dir.mkdir(parents=True, exist_ok=True)
+        self.entries = {}
+        logger.info(f"Initialized identity store at {self.store_dir}")
+    
+    def _get_path(self, registration):
+        """Generate a filesystem path for a registration - only ever a normalized VRN, which is safe as a filename."""
+        if not registration or not REGISTRATION_PATTERN.match(registration):
+            raise ValueError(f"Not a normalized registration: {registration!r}")
+        return self.store_dir / f"{registration}.json"
+    
+    def _is_valid(self, entry):
+        """Check an entry is fresh and was resolved against the loaded catalog."""
+        return (
+            entry is not None and
+            (time.time() - entry.get("timestamp", 0)) < Config.IDENTITY_TTL and
+            entry.get("catalogVersion") == catalog_version
+        )
+    
+    def get(self, registration):
+        """Get the stored identity for a registration, or None."""
+        entry = self.entries.get(registration)
+        if entry is None:
+            path = self._get_path(registration)
+            if path.exists():
+                try:
+                    with open(path, "r") as f:
+                        entry = json.load(f)
+                except Exception as e:
+                    logger.warning(f"Error reading identity file {path}: {str(e)}")
+                    return None
+        
+        if not self._is_valid(entry):
+            return None
+        
+        self.entries[registration] = entry
+        return entry
+    
+    def set(self, registration, identity):
+        """Store an identity in memory and atomically on disk."""
+        entry = dict(identity, timestamp=time.time(), catalogVersion=catalog_version)
+        self.entries[registration] = entry
+        
+        path = self._get_path(registration)
+        temp_path = path.with_suffix(".tmp")
+        try:
+            with open(temp_path, "w") as f:
+                json.dump(entry, f)
+            os.replace(temp_path, path)
+        except Exception as e:
+            logger.error(f"Error writing identity file {path}: {str(e)}")
+            temp_path.unlink(missing_ok=True)
+    
+    def remove(self, registration):
+        """Forget the identity for a registration."""
+        self.entries.pop(registration, None)
+        self._get_path(registration).unlink(missing_ok=True)
+
+identity_store = IdentityStore()
 
 # FastAPI application
 app = FastAPI(
@@ -167,7 +314,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["GET", "POST", "OPTIONS"],
     allow_headers=["*"],
-    expose_headers=["X-Cache", "Cache-Control", "Content-Type", "X-Data-Type"],
+    expose_headers=["X-Cache", "Cache-Control", "Content-Type", "X-Data-Type", "X-Identity"],
     max_age=86400,  # Cache preflight requests for 24 hours
 )
 app.add_middleware(GZipMiddleware, minimum_size=500)
@@ -179,7 +326,8 @@ async def http_exception_handler(request, exc):
     logger.error(f"HTTPException: {exc.detail}")
     return JSONResponse(
         status_code=exc.status_code,
-        content={"status": "error", "message": exc.detail}
+        content={"status": "error", "message": exc.detail},
+        headers=exc.headers
     )
 
 @app.exception_handler(Exception)
@@ -336,9 +484,12 @@ def detect_fuel_type(data):
     if "spark_plugs" in data:
         return "petrol"
     
+    # Serialize each section once; the section checks and the whole-document search below share it
+    section_text = {key: json.dumps(value).lower() for key, value in data.items()}
+    
     # Check for injection system details that might indicate diesel
     if "injectionSystem" in data:
-        injection_text = json.dumps(data["injectionSystem"]).lower()
+        injection_text = section_text["injectionSystem"]
         if any(term in injection_text for term in ["diesel", "cdi", "tdi", "hdi", "crdi"]):
             return "diesel"
     
@@ -348,7 +499,7 @@ def detect_fuel_type(data):
     
     # Check for fuel system information
     if "fuel_system" in data:
-        fuel_text = json.dumps(data["fuel_system"]).lower()
+        fuel_text = section_text["fuel_system"]
         if "common rail" in fuel_text or "injection pump" in fuel_text:
             return "diesel"
     
@@ -363,7 +514,7 @@ def detect_fuel_type(data):
                 return "diesel"
     
     # General text search throughout the document
-    json_str = json.dumps(data).lower()
+    json_str = " ".join(key.lower() + " " + text for key, text in section_text.items())
     if "diesel" in json_str and "spark plug" not in json_str:
         return "diesel"
     elif "spark plug" in json_str:
@@ -372,6 +523,136 @@ def detect_fuel_type(data):
     # Default to unknown if we can't determine
     return "unknown"
 
+# Input guards for user supplied text
+def normalize_query_text(text: Optional[str], max_length: int) -> Optional[str]:
+    """
+    Bound and normalize user supplied text before any regex or SequenceMatcher work:
+    fold unicode (NFKC), drop control characters, collapse repeated separators and cap the length.
+    """
+    if not text:
+        return text
+    
+    # Cut very long input first so the normalization itself stays cheap
+    text = unicodedata.normalize("NFKC", str(text)[:max_length * 4])
+    text = "".join(ch for ch in text if unicodedata.category(ch)[0] != "C")
+    text = re.sub(r'\s+', ' ', text)
+    text = re.sub(r'([\-_/.])\1+', r'\1', text)
+    
+    return text.strip()[:max_length].strip()
+
+def clean_make_model(make: str, model: str) -> Tuple[str, str]:
+    """Apply the input guards to a make/model pair"""
+    return (
+        normalize_query_text(make, Config.MAX_MAKE_LENGTH) or "",
+        normalize_query_text(model, Config.MAX_MODEL_LENGTH) or ""
+    )
+
+# Helpers for vehicle data coming from DVLA / MOT responses
+REGISTRATION_PATTERN = re.compile(r'^[A-Z0-9]{1,8}$')
+
+def normalize_registration(registration: Optional[str]) -> Optional[str]:
+    """Normalize a VRN to upper case without spaces, or None if empty or not letters and digits"""
+    if not registration:
+        return None
+    registration = re.sub(r'\s+', '', str(registration)).upper()
+    return registration if REGISTRATION_PATTERN.match(registration) else None
+
+def normalize_fuel_type(fuel_type: Optional[str]) -> Optional[str]:
+    """Normalize a fuel type and map common variations onto petrol/diesel"""
+    if not fuel_type:
+        return fuel_type
+    fuel_type = fuel_type.lower().strip()
+    # Map common fuel type variations
+    if fuel_type in ["gasoline", "unleaded", "gas"]:
+        fuel_type = "petrol"
+    elif fuel_type in ["gasoil", "derv"]:
+        fuel_type = "diesel"
+    return fuel_type
+
+def extract_request_year(vehicle_data_dict: Dict[str, Any]) -> Optional[int]:
+    """Get the year from a vehicleData payload, either directly or from the common date fields"""
+    year = vehicle_data_dict.get("year")
+    
+    if not year:
+        # Try common date fields
+        for field in ["yearOfManufacture", "manufactureYear", "registrationDate"]:
+            if field in vehicle_data_dict and vehicle_data_dict[field]:
+                date_value = str(vehicle_data_dict[field])
+                year_match = re.search(r'(\d{4})', date_value)
+                if year_match:
+                    year = int(year_match.group(1))
+                    break
+    
+    try:
+        return int(year) if year else None
+    except (TypeError, ValueError):
+        return None
+
+# Engine variants - repair times carry the engine in modelType ("R20A2/2 (07-12)",
+# "W16 D16 (9HZ)/1.6 (R55) (07-14)"), tech specs glue it onto the model ("CR-VR20A2/2")
+ENGINE_DESCRIPTOR_PATTERN = re.compile(r'^\s*(?P<codes>[^/]+?)\s*/\s*(?P<litres>\d+(?:\.\d+)?)')
+GLUED_ENGINE_CODE_PATTERN = re.compile(r'(?<![\s\-\d])(?:[A-Z]\d|\d)[A-Z0-9]*$')
+
+@lru_cache(maxsize=4096)
+def extract_engine_info(model: str, model_type: str) -> Tuple[Tuple[str, ...], Optional[float]]:
+    """Engine codes (lowercase) and capacity in litres of a catalog vehicle"""
+    match = ENGINE_DESCRIPTOR_PATTERN.match(model_type or "")
+    if match:
+        return tuple(re.findall(r'[a-z0-9]+', match.group("codes").lower())), float(match.group("litres"))
+    
+    model_part, _, rest = (model or "").partition("/")
+    litres = re.match(r'\s*(\d+(?:\.\d+)?)', rest)
+    if not litres:
+        return (), None
+    
+    glued = GLUED_ENGINE_CODE_PATTERN.search(model_part.strip())
+    return ((glued.group(0).lower(),) if glued else ()), float(litres.group(1))
+
+def engine_family(model: str, codes: Tuple[str, ...]) -> str:
+    """Canonical model of a catalog vehicle without its engine descriptor (CR-VR20A2/2 -> crv)"""
+    model_part = (model or "").partition("/")[0].strip().lower()
+    if codes and model_part.endswith(codes[0]):
+        model_part = model_part[:-len(codes[0])]
+    return re.sub(r'[^a-z0-9]', '', model_part)
+
+def capacity_bucket(value: Any) -> Optional[int]:
+    """
+    Engine capacity in tenths of a litre. Accepts litres (1.6) or cubic centimetres
+    (DVLA engineCapacity 1598, MOT engineSize "1598"), so both land in bucket 16.
+    """
+    match = re.search(r'\d+(?:\.\d+)?', str(value)) if value else None
+    if not match:
+        return None
+    
+    capacity = float(match.group(0))
+    bucket = round(capacity * 10) if capacity < 20 else round(capacity / 100)
+    return bucket or None
+
+def extract_request_engine(vehicle_data_dict: Dict[str, Any]) -> Tuple[Optional[str], Optional[int]]:
+    """Engine code and capacity bucket from a vehicleData payload (DVLA engineCapacity, MOT engineSize)"""
+    engine_code = re.sub(r'[^a-z0-9]', '', str(vehicle_data_dict.get("engineCode") or "").lower())[:16]
+    capacity = vehicle_data_dict.get("engineCapacity") or vehicle_data_dict.get("engineSize")
+    return engine_code or None, capacity_bucket(capacity)
+
+def catalog_file_entries() -> List[Tuple[str, str, os.DirEntry]]:
+    """(data type, directory, entry) for every catalog file, in name order within each directory"""
+    entries = []
+    for data_type, directory in (("repair_times", Config.VEHICLES_DATA_DIR), ("tech_specs", Config.TECH_SPECS_DIR)):
+        if not os.path.isdir(directory):
+            continue
+        for entry in sorted(os.scandir(directory), key=lambda e: e.name):
+            if entry.name.endswith('.json'):
+                entries.append((data_type, directory, entry))
+    return entries
+
+def compute_catalog_version(entries: Optional[List[Tuple[str, str, os.DirEntry]]] = None) -> str:
+    """Fingerprint the data directories (file names, sizes and mtimes) to detect catalog changes"""
+    digest = hashlib.sha1()
+    for _, directory, entry in entries if entries is not None else catalog_file_entries():
+        stat = entry.stat()
+        digest.update(f"{directory}/{entry.name}:{stat.st_size}:{stat.st_mtime_ns}".encode())
+    return digest.hexdigest()[:16]
+
 # Enhanced model matching function
 def calculate_model_match_score(requested_model, db_model, db_base_model=None):
     """
@@ -458,100 +739,294 @@ def calculate_model_match_score(requested_model, db_model, db_base_model=None):
     return model_score
 
 # Function to load vehicle data - enhanced with improved model parsing
-def load_all_vehicle_data():
-    """Load all vehicle data files from the directories with improved model parsing"""
-    global vehicle_data, tech_specs_data
-    
-    # Reset data stores
-    vehicle_data = {}
-    tech_specs_data = {}
-    
-    # Load repair times data
+def parse_repair_times_file(file_path: str) -> Optional[Tuple[List[str], Dict[str, Any]]]:
+    """
+    Parse one labour time file into the lookup keys it is stored under and the document.
+    Runs in the ingest process pool, so it only reads the file and returns; nothing global is touched.
+    """
+    json_file = os.path.basename(file_path)
+    keys = []
     try:
-        # Ensure the directory exists
-        os.makedirs(Config.VEHICLES_DATA_DIR, exist_ok=True)
+        with open(file_path, 'r') as f:
+            file_data = json.load(f)
         
-        # List all JSON files in the labour times directory
-        json_files = [f for f in os.listdir(Config.VEHICLES_DATA_DIR) if f.endswith('.json')]
-        logger.info(f"Found {len(json_files)} vehicle labour time data files")
+        # Basic validation
+        if "vehicleIdentification" not in file_data:
+            logger.warning(f"Skipping {json_file}: missing vehicleIdentification")
+            return None
         
-        for json_file in json_files:
-            file_path = os.path.join(Config.VEHICLES_DATA_DIR, json_file)
-            try:
-                with open(file_path, 'r') as f:
-                    file_data = json.load(f)
+        # Extract make and model
+        vehicle_id = file_data["vehicleIdentification"]
+        make = vehicle_id.get("make", "")
+        model = vehicle_id.get("model", "")
+        model_type = vehicle_id.get("modelType", "")
+        
+        if not make or not model:
+            logger.warning(f"Skipping {json_file}: missing make or model")
+            return None
+        
+        # Create key for fast lookup
+        basic_key = f"{make}_{model}".lower().replace(" ", "_")
+        keys.append(basic_key)
+        
+        # Engine variant key - variants of a model share basic_key, this one stays unique
+        codes, _ = extract_engine_info(model, model_type)
+        if codes:
+            keys.append(f"{basic_key}#{codes[0]}")
+        
+        # Extract base model using our general function
+        base_model = extract_base_model(model)
+        if base_model != model:
+            base_key = f"{make}_{base_model}".lower().replace(" ", "_")
+            keys.append(base_key)
+        
+        # Add normalized model keys
+        normalized_model = normalize_model_name(model)
+        if normalized_model != model.lower().strip():
+            normalized_key = f"{make}_{normalized_model}".lower().replace(" ", "_")
+            keys.append(normalized_key)
+        
+        # Extract year range if present in the model type or filename
+        start_year, end_year = extract_year_info(model_type or json_file)
+        
+        # Store with year-specific keys if years are available
+        if start_year:
+            # Base year key
+            year_key = f"{make}_{model}_{start_year}".lower().replace(" ", "_")
+            keys.append(year_key)
+            
+            # Base model + year
+            if base_model != model:
+                base_year_key = f"{make}_{base_model}_{start_year}".lower().replace(" ", "_")
+                keys.append(base_year_key)
+            
+            # Normalized model + year
+            if normalized_model != model.lower().strip():
+                norm_year_key = f"{make}_{normalized_model}_{start_year}".lower().replace(" ", "_")
+                keys.append(norm_year_key)
+            
+            # For files with a year range, create entries for specific years
+            if end_year and end_year > start_year:
+                for year in range(start_year, end_year + 1):
+                    # Year-specific key
+                    year_key = f"{make}_{model}_{year}".lower().replace(" ", "_")
+                    keys.append(year_key)
                     
-                    # Basic validation
-                    if "vehicleIdentification" not in file_data:
-                        logger.warning(f"Skipping {json_file}: missing vehicleIdentification")
-                        continue
+                    # Base model + year
+                    if base_model != model:
+                        base_year_key = f"{make}_{base_model}_{year}".lower().replace(" ", "_")
+                        keys.append(base_year_key)
+                    
+                    # Normalized model + year
+                    if normalized_model != model.lower().strip():
+                        norm_year_key = f"{make}_{normalized_model}_{year}".lower().replace(" ", "_")
+                        keys.append(norm_year_key)
+        
+        logger.info(f"Loaded repair data for {make} {model} {model_type}")
+    except Exception as e:
+        logger.error(f"Error loading labour time file {json_file}: {str(e)}")
+        return None
+    
+    return keys, file_data
+
+def parse_tech_specs_file(file_path: str) -> Optional[Tuple[List[str], Dict[str, Any]]]:
+    """Parse one technical specification file into its lookup keys and the document (see parse_repair_times_file)"""
+    json_file = os.path.basename(file_path)
+    keys = []
+    try:
+        with open(file_path, 'r') as f:
+            file_data = json.load(f)
+        
+        # Basic validation
+        if "vehicleIdentification" not in file_data:
+            logger.warning(f"Skipping tech spec {json_file}: missing vehicleIdentification")
+            return None
+        
+        # Extract make and model
+        vehicle_id = file_data["vehicleIdentification"]
+        make = vehicle_id.get("make", "")
+        model = vehicle_id.get("model", "")
+        model_type = vehicle_id.get("modelType", "")
+        
+        # Detect and store fuel type
+        fuel_type = detect_fuel_type(file_data)
+        file_data["vehicleIdentification"]["fuelType"] = fuel_type
+        logger.info(f"Detected fuel type for {make} {model}: {fuel_type}")
+        
+        if not make or not model:
+            logger.warning(f"Skipping tech spec {json_file}: missing make or model")
+            return None
+        
+        # Extract base model using the general function
+        base_model = extract_base_model(model)
+        
+        # Get normalized model
+        normalized_model = normalize_model_name(model)
+        
+        # Create standard keys for lookup
+        basic_key = f"{make}_{model}".lower().replace(" ", "_")
+        keys.append(basic_key)
+        
+        # Engine variant key (see parse_repair_times_file)
+        codes, _ = extract_engine_info(model, model_type)
+        if codes:
+            keys.append(f"{basic_key}#{codes[0]}")
+        
+        # Create base model key if different from full model
+        if base_model != model:
+            base_model_key = f"{make}_{base_model}".lower().replace(" ", "_")
+            keys.append(base_model_key)
+        
+        # Add normalized model key
+        if normalized_model != model.lower().strip():
+            normalized_key = f"{make}_{normalized_model}".lower().replace(" ", "_")
+            keys.append(normalized_key)
+        
+        # Create fuel-specific key
+        fuel_key = f"{make}_{model}_{fuel_type}".lower().replace(" ", "_")
+        keys.append(fuel_key)
+        
+        # Create base model + fuel key if applicable
+        if base_model != model:
+            base_fuel_key = f"{make}_{base_model}_{fuel_type}".lower().replace(" ", "_")
+            keys.append(base_fuel_key)
+        
+        # Create normalized model + fuel key
+        if normalized_model != model.lower().strip():
+            norm_fuel_key = f"{make}_{normalized_model}_{fuel_type}".lower().replace(" ", "_")
+            keys.append(norm_fuel_key)
+        
+        # Extract year range if present
+        start_year, end_year = extract_year_info(model_type or json_file)
+        
+        # Store with year-specific keys
+        if start_year:
+            # Year-specific keys
+            year_key = f"{make}_{model}_{start_year}".lower().replace(" ", "_")
+            keys.append(year_key)
+            
+            # Base model + year key
+            if base_model != model:
+                base_year_key = f"{make}_{base_model}_{start_year}".lower().replace(" ", "_")
+                keys.append(base_year_key)
+            
+            # Normalized model + year key
+            if normalized_model != model.lower().strip():
+                norm_year_key = f"{make}_{normalized_model}_{start_year}".lower().replace(" ", "_")
+                keys.append(norm_year_key)
+            
+            # Fuel + year combined key for precise matching
+            fuel_year_key = f"{make}_{model}_{fuel_type}_{start_year}".lower().replace(" ", "_")
+            keys.append(fuel_year_key)
+            
+            # Base model + fuel + year key
+            if base_model != model:
+                base_fuel_year_key = f"{make}_{base_model}_{fuel_type}_{start_year}".lower().replace(" ", "_")
+                keys.append(base_fuel_year_key)
+            
+            # Normalized model + fuel + year key
+            if normalized_model != model.lower().strip():
+                norm_fuel_year_key = f"{make}_{normalized_model}_{fuel_type}_{start_year}".lower().replace(" ", "_")
+                keys.append(norm_fuel_year_key)
+            
+            # For year ranges, create entries for all years in range
+            if end_year and end_year > start_year:
+                for year in range(start_year, end_year + 1):
+                    # Year-specific key
+                    year_specific_key = f"{make}_{model}_{year}".lower().replace(" ", "_")
+                    keys.append(year_specific_key)
                     
-                    # Extract make and model
-                    vehicle_id = file_data["vehicleIdentification"]
-                    make = vehicle_id.get("make", "")
-                    model = vehicle_id.get("model", "")
-                    model_type = vehicle_id.get("modelType", "")
+                    # Base model + year key
+                    if base_model != model:
+                        base_year_specific_key = f"{make}_{base_model}_{year}".lower().replace(" ", "_")
+                        keys.append(base_year_specific_key)
                     
-                    if not make or not model:
-                        logger.warning(f"Skipping {json_file}: missing make or model")
-                        continue
+                    # Normalized model + year key
+                    if normalized_model != model.lower().strip():
+                        norm_year_specific_key = f"{make}_{normalized_model}_{year}".lower().replace(" ", "_")
+                        keys.append(norm_year_specific_key)
                     
-                    # Create key for fast lookup
-                    basic_key = f"{make}_{model}".lower().replace(" ", "_")
-                    vehicle_data[basic_key] = file_data
+                    # Year + fuel specific key
+                    fuel_year_specific_key = f"{make}_{model}_{fuel_type}_{year}".lower().replace(" ", "_")
+                    keys.append(fuel_year_specific_key)
                     
-                    # Extract base model using our general function
-                    base_model = extract_base_model(model)
+                    # Base model + fuel + year key
                     if base_model != model:
-                        base_key = f"{make}_{base_model}".lower().replace(" ", "_")
-                        vehicle_data[base_key] = file_data
+                        base_fuel_year_specific_key = f"{make}_{base_model}_{fuel_type}_{year}".lower().replace(" ", "_")
+                        keys.append(base_fuel_year_specific_key)
                     
-                    # Add normalized model keys
-                    normalized_model = normalize_model_name(model)
+                    # Normalized model + fuel + year key
                     if normalized_model != model.lower().strip():
-                        normalized_key = f"{make}_{normalized_model}".lower().replace(" ", "_")
-                        vehicle_data[normalized_key] = file_data
+                        norm_fuel_year_specific_key = f"{make}_{normalized_model}_{fuel_type}_{year}".lower().replace(" ", "_")
+                        keys.append(norm_fuel_year_specific_key)
                     
-                    # Extract year range if present in the model type or filename
-                    start_year, end_year = extract_year_info(model_type or json_file)
+                    # Year-specific key without fuel type - for matching just by year
+                    year_key_no_fuel = f"{make}_{model}_{year}".lower().replace(" ", "_")
+                    keys.append(year_key_no_fuel)
                     
-                    # Store with year-specific keys if years are available
-                    if start_year:
-                        # Base year key
-                        year_key = f"{make}_{model}_{start_year}".lower().replace(" ", "_")
-                        vehicle_data[year_key] = file_data
-                        
-                        # Base model + year
-                        if base_model != model:
-                            base_year_key = f"{make}_{base_model}_{start_year}".lower().replace(" ", "_")
-                            vehicle_data[base_year_key] = file_data
-                        
-                        # Normalized model + year
-                        if normalized_model != model.lower().strip():
-                            norm_year_key = f"{make}_{normalized_model}_{start_year}".lower().replace(" ", "_")
-                            vehicle_data[norm_year_key] = file_data
-                        
-                        # For files with a year range, create entries for specific years
-                        if end_year and end_year > start_year:
-                            for year in range(start_year, end_year + 1):
-                                # Year-specific key
-                                year_key = f"{make}_{model}_{year}".lower().replace(" ", "_")
-                                vehicle_data[year_key] = file_data
-                                
-                                # Base model + year
-                                if base_model != model:
-                                    base_year_key = f"{make}_{base_model}_{year}".lower().replace(" ", "_")
-                                    vehicle_data[base_year_key] = file_data
-                                
-                                # Normalized model + year
-                                if normalized_model != model.lower().strip():
-                                    norm_year_key = f"{make}_{normalized_model}_{year}".lower().replace(" ", "_")
-                                    vehicle_data[norm_year_key] = file_data
-                    
-                    logger.info(f"Loaded repair data for {make} {model} {model_type}")
+                    # Base model + year key without fuel type
+                    if base_model != model:
+                        base_year_key_no_fuel = f"{make}_{base_model}_{year}".lower().replace(" ", "_")
+                        keys.append(base_year_key_no_fuel)
                     
-            except Exception as e:
-                logger.error(f"Error loading labour time file {json_file}: {str(e)}")
+                    # Normalized model + year without fuel type
+                    if normalized_model != model.lower().strip():
+                        norm_year_key_no_fuel = f"{make}_{normalized_model}_{year}".lower().replace(" ", "_")
+                        keys.append(norm_year_key_no_fuel)
+        
+        logger.info(f"Loaded tech specs for {make} {model} {model_type} ({fuel_type})")
+    except Exception as e:
+        logger.error(f"Error loading tech spec file {json_file}: {str(e)}")
+        return None
+    
+    return keys, file_data
+
+def parse_catalog_files(parser, file_paths: List[str], workers: int) -> List[Optional[Tuple[List[str], Dict[str, Any]]]]:
+    """Run a file parser over many files, in a process pool when there are enough files to pay for it"""
+    if workers <= 1 or len(file_paths) < Config.INGEST_PARALLEL_MIN_FILES:
+        return [parser(file_path) for file_path in file_paths]
+    
+    # Workers inherit the parent's logging.disable level so benchmarks stay quiet
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=logging.disable,
+        initargs=(logging.root.manager.disable,)
+    ) as pool:
+        chunksize = max(1, len(file_paths) // (workers * 8))
+        return list(pool.map(parser, file_paths, chunksize=chunksize))
+
+def load_all_vehicle_data(repair_times_files: Optional[set] = None, tech_specs_files: Optional[set] = None,
+                          workers: Optional[int] = None):
+    """
+    Load all vehicle data files from the directories with improved model parsing.
+    A catalog shard passes the file names it owns; None loads every file.
+    Files are parsed in a pool of `workers` processes (INGEST_WORKERS by default) and merged here
+    in directory order, so later files win key collisions exactly as with serial loading.
+    """
+    global vehicle_data, tech_specs_data
+    
+    # Reset data stores
+    vehicle_data = {}
+    tech_specs_data = {}
+    workers = Config.INGEST_WORKERS if workers is None else workers
+    
+    # Load repair times data
+    try:
+        # Ensure the directory exists
+        os.makedirs(Config.VEHICLES_DATA_DIR, exist_ok=True)
+        
+        # List all JSON files in the labour times directory
+        json_files = [f for f in os.listdir(Config.VEHICLES_DATA_DIR)
+                      if f.endswith('.json') and (repair_times_files is None or f in repair_times_files)]
+        logger.info(f"Found {len(json_files)} vehicle labour time data files")
+        
+        file_paths = [os.path.join(Config.VEHICLES_DATA_DIR, json_file) for json_file in json_files]
+        for parsed in parse_catalog_files(parse_repair_times_file, file_paths, workers):
+            if parsed:
+                keys, file_data = parsed
+                for key in keys:
+                    vehicle_data[key] = file_data
     except Exception as e:
         logger.error(f"Failed to load labour time data: {str(e)}")
     
@@ -561,151 +1036,16 @@ def load_all_vehicle_data():
         os.makedirs(Config.TECH_SPECS_DIR, exist_ok=True)
         
         # List all JSON files in the tech specs directory
-        json_files = [f for f in os.listdir(Config.TECH_SPECS_DIR) if f.endswith('.json')]
+        json_files = [f for f in os.listdir(Config.TECH_SPECS_DIR)
+                      if f.endswith('.json') and (tech_specs_files is None or f in tech_specs_files)]
         logger.info(f"Found {len(json_files)} vehicle technical specification files")
         
-        for json_file in json_files:
-            file_path = os.path.join(Config.TECH_SPECS_DIR, json_file)
-            try:
-                with open(file_path, 'r') as f:
-                    file_data = json.load(f)
-                    
-                    # Basic validation
-                    if "vehicleIdentification" not in file_data:
-                        logger.warning(f"Skipping tech spec {json_file}: missing vehicleIdentification")
-                        continue
-                    
-                    # Extract make and model
-                    vehicle_id = file_data["vehicleIdentification"]
-                    make = vehicle_id.get("make", "")
-                    model = vehicle_id.get("model", "")
-                    model_type = vehicle_id.get("modelType", "")
-                    
-                    # Detect and store fuel type
-                    fuel_type = detect_fuel_type(file_data)
-                    file_data["vehicleIdentification"]["fuelType"] = fuel_type
-                    logger.info(f"Detected fuel type for {make} {model}: {fuel_type}")
-                    
-                    if not make or not model:
-                        logger.warning(f"Skipping tech spec {json_file}: missing make or model")
-                        continue
-                    
-                    # Extract base model using the general function
-                    base_model = extract_base_model(model)
-                    
-                    # Get normalized model
-                    normalized_model = normalize_model_name(model)
-                    
-                    # Create standard keys for lookup
-                    basic_key = f"{make}_{model}".lower().replace(" ", "_")
-                    tech_specs_data[basic_key] = file_data
-                    
-                    # Create base model key if different from full model
-                    if base_model != model:
-                        base_model_key = f"{make}_{base_model}".lower().replace(" ", "_")
-                        tech_specs_data[base_model_key] = file_data
-                    
-                    # Add normalized model key
-                    if normalized_model != model.lower().strip():
-                        normalized_key = f"{make}_{normalized_model}".lower().replace(" ", "_")
-                        tech_specs_data[normalized_key] = file_data
-                    
-                    # Create fuel-specific key
-                    fuel_key = f"{make}_{model}_{fuel_type}".lower().replace(" ", "_")
-                    tech_specs_data[fuel_key] = file_data
-                    
-                    # Create base model + fuel key if applicable
-                    if base_model != model:
-                        base_fuel_key = f"{make}_{base_model}_{fuel_type}".lower().replace(" ", "_")
-                        tech_specs_data[base_fuel_key] = file_data
-                    
-                    # Create normalized model + fuel key
-                    if normalized_model != model.lower().strip():
-                        norm_fuel_key = f"{make}_{normalized_model}_{fuel_type}".lower().replace(" ", "_")
-                        tech_specs_data[norm_fuel_key] = file_data
-                    
-                    # Extract year range if present
-                    start_year, end_year = extract_year_info(model_type or json_file)
-                    
-                    # Store with year-specific keys
-                    if start_year:
-                        # Year-specific keys
-                        year_key = f"{make}_{model}_{start_year}".lower().replace(" ", "_")
-                        tech_specs_data[year_key] = file_data
-                        
-                        # Base model + year key
-                        if base_model != model:
-                            base_year_key = f"{make}_{base_model}_{start_year}".lower().replace(" ", "_")
-                            tech_specs_data[base_year_key] = file_data
-                        
-                        # Normalized model + year key
-                        if normalized_model != model.lower().strip():
-                            norm_year_key = f"{make}_{normalized_model}_{start_year}".lower().replace(" ", "_")
-                            tech_specs_data[norm_year_key] = file_data
-                        
-                        # Fuel + year combined key for precise matching
-                        fuel_year_key = f"{make}_{model}_{fuel_type}_{start_year}".lower().replace(" ", "_")
-                        tech_specs_data[fuel_year_key] = file_data
-                        
-                        # Base model + fuel + year key
-                        if base_model != model:
-                            base_fuel_year_key = f"{make}_{base_model}_{fuel_type}_{start_year}".lower().replace(" ", "_")
-                            tech_specs_data[base_fuel_year_key] = file_data
-                        
-                        # Normalized model + fuel + year key
-                        if normalized_model != model.lower().strip():
-                            norm_fuel_year_key = f"{make}_{normalized_model}_{fuel_type}_{start_year}".lower().replace(" ", "_")
-                            tech_specs_data[norm_fuel_year_key] = file_data
-                        
-                        # For year ranges, create entries for all years in range
-                        if end_year and end_year > start_year:
-                            for year in range(start_year, end_year + 1):
-                                # Year-specific key
-                                year_specific_key = f"{make}_{model}_{year}".lower().replace(" ", "_")
-                                tech_specs_data[year_specific_key] = file_data
-                                
-                                # Base model + year key
-                                if base_model != model:
-                                    base_year_specific_key = f"{make}_{base_model}_{year}".lower().replace(" ", "_")
-                                    tech_specs_data[base_year_specific_key] = file_data
-                                
-                                # Normalized model + year key
-                                if normalized_model != model.lower().strip():
-                                    norm_year_specific_key = f"{make}_{normalized_model}_{year}".lower().replace(" ", "_")
-                                    tech_specs_data[norm_year_specific_key] = file_data
-                                
-                                # Year + fuel specific key
-                                fuel_year_specific_key = f"{make}_{model}_{fuel_type}_{year}".lower().replace(" ", "_")
-                                tech_specs_data[fuel_year_specific_key] = file_data
-                                
-                                # Base model + fuel + year key
-                                if base_model != model:
-                                    base_fuel_year_specific_key = f"{make}_{base_model}_{fuel_type}_{year}".lower().replace(" ", "_")
-                                    tech_specs_data[base_fuel_year_specific_key] = file_data
-                                
-                                # Normalized model + fuel + year key
-                                if normalized_model != model.lower().strip():
-                                    norm_fuel_year_specific_key = f"{make}_{normalized_model}_{fuel_type}_{year}".lower().replace(" ", "_")
-                                    tech_specs_data[norm_fuel_year_specific_key] = file_data
-                                
-                                # Year-specific key without fuel type - for matching just by year
-                                year_key_no_fuel = f"{make}_{model}_{year}".lower().replace(" ", "_")
-                                tech_specs_data[year_key_no_fuel] = file_data
-                                
-                                # Base model + year key without fuel type
-                                if base_model != model:
-                                    base_year_key_no_fuel = f"{make}_{base_model}_{year}".lower().replace(" ", "_")
-                                    tech_specs_data[base_year_key_no_fuel] = file_data
-                                
-                                # Normalized model + year without fuel type
-                                if normalized_model != model.lower().strip():
-                                    norm_year_key_no_fuel = f"{make}_{normalized_model}_{year}".lower().replace(" ", "_")
-                                    tech_specs_data[norm_year_key_no_fuel] = file_data
-                    
-                    logger.info(f"Loaded tech specs for {make} {model} {model_type} ({fuel_type})")
-                    
-            except Exception as e:
-                logger.error(f"Error loading tech spec file {json_file}: {str(e)}")
+        file_paths = [os.path.join(Config.TECH_SPECS_DIR, json_file) for json_file in json_files]
+        for parsed in parse_catalog_files(parse_tech_specs_file, file_paths, workers):
+            if parsed:
+                keys, file_data = parsed
+                for key in keys:
+                    tech_specs_data[key] = file_data
     except Exception as e:
         logger.error(f"Failed to load technical specification data: {str(e)}")
     
@@ -719,8 +1059,8 @@ def build_vehicle_index():
     
     # Process repair times data
     for key, data in vehicle_data.items():
-        # Skip year-specific keys to avoid duplication
-        if re.search(r'_\d{4}$', key):
+        # Skip year-specific and engine variant keys to avoid duplication
+        if re.search(r'_\d{4}$', key) or "#" in key:
             continue
             
         vehicle_id = data["vehicleIdentification"]
@@ -754,7 +1094,7 @@ def build_vehicle_index():
     # Process technical specifications data
     for key, data in tech_specs_data.items():
         # Skip derived keys to avoid duplication
-        if re.search(r'_(petrol|diesel|unknown)(_\d{4})?$', key) or re.search(r'_\d{4}$', key):
+        if re.search(r'_(petrol|diesel|unknown)(_\d{4})?$', key) or re.search(r'_\d{4}$', key) or "#" in key:
             continue
             
         vehicle_id = data["vehicleIdentification"]
@@ -800,14 +1140,17 @@ def build_vehicle_index():
     return vehicle_index
 
 # Enhanced vehicle matching function with general model matching
-def find_vehicle_match(make: str, model: str, year: Optional[int] = None, fuel_type: Optional[str] = None, data_type: Optional[str] = None) -> Optional[Dict[str, Any]]:
+def find_vehicle_match_with_score(make: str, model: str, year: Optional[int] = None, fuel_type: Optional[str] = None, data_type: Optional[str] = None) -> Tuple[Optional[Dict[str, Any]], float]:
     """
-    Enhanced vehicle matching with general model matching logic
+    Enhanced vehicle matching with general model matching logic. Returns the selected candidate
+    with its combined score (None, 0.0 when nothing matched), so callers can report a confidence
+    for the match.
     """
     if not vehicle_index:
         logger.error("Vehicle index not built")
-        return None
+        return None, 0.0
     
+    make, model = clean_make_model(make, model)
     normalized_make = make.lower().strip()
     normalized_model = model.lower().strip()
     normalized_fuel_type = fuel_type.lower().strip() if fuel_type else None
@@ -815,6 +1158,10 @@ def find_vehicle_match(make: str, model: str, year: Optional[int] = None, fuel_t
     # Store candidates with scores
     candidates = []
     
+    # Stop scoring once the budget is spent and go with the best candidate found so far
+    deadline = time.perf_counter() + Config.MATCH_TIME_BUDGET_MS / 1000
+    budget_exhausted = False
+    
     # Log search criteria
     logger.info(f"Searching for: {normalized_make} {normalized_model}, Year={year}, Fuel={normalized_fuel_type}, Type={data_type}")
     
@@ -830,6 +1177,10 @@ def find_vehicle_match(make: str, model: str, year: Optional[int] = None, fuel_t
         logger.info(f"Found {len(make_matches)} vehicles matching make '{normalized_make}'")
         
         for vehicle in make_matches:
+            if time.perf_counter() > deadline:
+                budget_exhausted = True
+                break
+            
             db_model = vehicle["model"].lower().strip()
             db_base_model = vehicle.get("baseModel", "").lower().strip()
             db_fuel_type = vehicle.get("fuelType", "unknown").lower()
@@ -943,9 +1294,13 @@ def find_vehicle_match(make: str, model: str, year: Optional[int] = None, fuel_t
                 candidates.append(candidate_info)
     
     # If no exact make matches or if candidates list is empty, try fuzzy matching on make
-    if not candidates:
+    if not candidates and not budget_exhausted:
         logger.info(f"No candidates with exact make match, trying fuzzy make matching")
         for key, vehicle in vehicle_index.items():
+            if time.perf_counter() > deadline:
+                budget_exhausted = True
+                break
+            
             # Skip if data type doesn't match
             if data_type and data_type not in vehicle["dataTypes"]:
                 continue
@@ -1015,6 +1370,12 @@ def find_vehicle_match(make: str, model: str, year: Optional[int] = None, fuel_t
                     }
                 })
     
+    if budget_exhausted:
+        logger.warning(
+            f"Matching budget of {Config.MATCH_TIME_BUDGET_MS}ms exhausted for {make} {model}, "
+            f"using best of {len(candidates)} candidates"
+        )
+    
     # Sort candidates by score
     candidates.sort(key=lambda x: x["score"], reverse=True)
     
@@ -1062,7 +1423,7 @@ def find_vehicle_match(make: str, model: str, year: Optional[int] = None, fuel_t
             f"Fuel: {best_match.get('fuelType', 'unknown')} "
             f"with score: {candidates[0]['score']:.2f}"
         )
-        return best_match
+        return best_match, candidates[0]["score"]
     
     # Log failure
     logger.info(f"No good match found for {make} {model} (Year: {year}, Fuel: {fuel_type})")
@@ -1073,89 +1434,23 @@ def find_vehicle_match(make: str, model: str, year: Optional[int] = None, fuel_t
     if similar_keys:
         logger.info(f"Similar tech spec keys available: {similar_keys}")
     
-    return None
+    return None, 0.0
 
-# API routes
-@app.get("/health", response_model=HealthResponse)
-async def health_check():
-    """Health check endpoint for monitoring"""
-    return {
-        "status": "ok",
-        "timestamp": datetime.now().isoformat(),
-        "version": "1.2.0",
-        "cacheSize": len(vehicle_cache) + len(tech_specs_cache),
-        "availableVehicles": len(vehicle_data),
-        "availableTechSpecs": len(tech_specs_data)
-    }
+def _match_record(key: str, method: str, confidence: float) -> Dict[str, Any]:
+    """Describe which catalog key a lookup resolved to, how, and with what confidence"""
+    return {"key": key, "method": method, "confidence": round(confidence, 3)}
 
-@app.get("/api/v1/vehicles")
-async def get_vehicles(data_type: Optional[str] = None):
+def year_in_range(year: int, start_year: Optional[int], end_year: Optional[int]) -> bool:
+    """Check if a year falls inside a (start, end) range where end None means ongoing"""
+    return bool(start_year) and ((end_year is None and year >= start_year) or
+                                 (end_year is not None and start_year <= year <= end_year))
+
+def match_repair_times(make: str, model: str, year: Optional[int] = None) -> Optional[Dict[str, Any]]:
     """
-    Get list of all available vehicles
-    
-    Args:
-        data_type: Optional filter by data type ('repair_times', 'tech_specs')
+    Run the repair times lookup ladder: direct keys first, then partial keys, then fuzzy matching.
+    Returns a match record (see _match_record) or None if nothing matched.
     """
-    if not vehicle_index:
-        raise HTTPException(status_code=500, detail="Vehicle index not built")
-        
-    vehicles = []
-    for key, vehicle in vehicle_index.items():
-        # Filter by data type if specified
-        if data_type and data_type not in vehicle["dataTypes"]:
-            continue
-            
-        # Include year range information if available
-        year_info = {}
-        if vehicle.get("startYear"):
-            year_info = {
-                "startYear": vehicle["startYear"],
-                "endYear": vehicle["endYear"] or "present"
-            }
-            
-        # Include vehicle information
-        vehicle_data = {
-            "make": vehicle["make"],
-            "model": vehicle["model"],
-            "modelType": vehicle["modelType"],
-            "key": key,
-            "dataTypes": vehicle["dataTypes"]
-        }
-        
-        # Add fuel type if available
-        if "fuelType" in vehicle:
-            vehicle_data["fuelType"] = vehicle["fuelType"]
-            
-        # Add year range if available
-        if year_info:
-            vehicle_data["yearRange"] = year_info
-            
-        vehicles.append(vehicle_data)
-    
-    return {"vehicles": vehicles, "count": len(vehicles)}
-
-@app.get("/api/v1/vehicles/{make}/{model}")
-@cached(cache=vehicle_cache)
-async def get_vehicle_repair_times(
-    make: str, 
-    model: str, 
-    response: Response,
-    year: Optional[int] = None,
-):
-    """
-    Get repair times for a specific vehicle by make and model.
-    Optional year parameter for more precise matching.
-    """
-    if not vehicle_data or not vehicle_index:
-        raise HTTPException(status_code=500, detail="Vehicle data not loaded")
-        
-    # Set cache headers
-    response.headers["X-Cache"] = "HIT"  # cachetools handles the actual caching
-    response.headers["Cache-Control"] = f"max-age={Config.CACHE_TTL}"
-    response.headers["X-Data-Type"] = "repair_times"
-    
-    # Log the lookup request for debugging
-    logger.info(f"Looking up repair times for: {make} {model} (year: {year})")
+    make, model = clean_make_model(make, model)
     
     # Try direct lookup based on make, model and year
     key = f"{make}_{model}".lower().replace(" ", "_")
@@ -1163,7 +1458,7 @@ async def get_vehicle_repair_times(
         year_key = f"{make}_{model}_{year}".lower().replace(" ", "_")
         if year_key in vehicle_data:
             logger.info(f"Direct year match found with key: {year_key}")
-            return vehicle_data[year_key]
+            return _match_record(year_key, "direct_year", 1.0)
     
     # Try normalized model for better matching
     normalized_model = normalize_model_name(model)
@@ -1173,10 +1468,10 @@ async def get_vehicle_repair_times(
             norm_year_key = f"{make}_{normalized_model}_{year}".lower().replace(" ", "_")
             if norm_year_key in vehicle_data:
                 logger.info(f"Direct year match found with normalized model key: {norm_year_key}")
-                return vehicle_data[norm_year_key]
+                return _match_record(norm_year_key, "normalized_year", 0.95)
         elif norm_key in vehicle_data:
             logger.info(f"Direct match found with normalized model key: {norm_key}")
-            return vehicle_data[norm_key]
+            return _match_record(norm_key, "normalized", 0.85)
     
     # Try base model for better matching
     base_model = extract_base_model(model)
@@ -1186,10 +1481,10 @@ async def get_vehicle_repair_times(
             base_year_key = f"{make}_{base_model}_{year}".lower().replace(" ", "_")
             if base_year_key in vehicle_data:
                 logger.info(f"Direct year match found with base model key: {base_year_key}")
-                return vehicle_data[base_year_key]
+                return _match_record(base_year_key, "base_year", 0.95)
         elif base_key in vehicle_data:
             logger.info(f"Direct match found with base model key: {base_key}")
-            return vehicle_data[base_key]
+            return _match_record(base_key, "base", 0.85)
     
     # Try base key lookup (no year)
     if key in vehicle_data:
@@ -1200,14 +1495,13 @@ async def get_vehicle_repair_times(
             
             logger.info(f"Checking year range for {key}: {start_year}-{end_year} against requested year {year}")
             
-            if start_year and ((end_year is None and year >= start_year) or 
-                              (end_year is not None and start_year <= year <= end_year)):
+            if year_in_range(year, start_year, end_year):
                 logger.info(f"Year {year} is within range {start_year}-{end_year or 'present'}")
-                return vehicle_data[key]
+                return _match_record(key, "direct_year_range", 1.0)
         else:
             # No year provided, use direct match
             logger.info(f"Direct match without year: {key}")
-            return vehicle_data[key]
+            return _match_record(key, "direct", 0.9)
     
     # Try partial model matching
     if year:
@@ -1225,82 +1519,24 @@ async def get_vehicle_repair_times(
                 # Check if our model is in this key model or vice versa
                 if model.lower().replace(" ", "_") in key_model or key_model in model.lower().replace(" ", "_"):
                     logger.info(f"Partial model match with year: {year_key}")
-                    return vehicle_data[year_key]
+                    return _match_record(year_key, "partial_year", 0.75)
     
     # Try fuzzy matching as last resort
     logger.info(f"Attempting fuzzy matching for {make} {model} (year: {year})")
-    match = find_vehicle_match(make, model, year, data_type="repair_times")
+    match, score = find_vehicle_match_with_score(make, model, year, data_type="repair_times")
     if match:
-        matched_data = vehicle_data[match["key"]]
         logger.info(f"Fuzzy match found: {match['make']} {match['model']} {match.get('startYear')}-{match.get('endYear')}")
-        
-        # Add matching information to response
-        result = {
-            "vehicleIdentification": {
-                "make": make,
-                "model": model,
-                "matchedTo": {
-                    "make": match["make"],
-                    "model": match["model"],
-                    "modelType": match["modelType"]
-                }
-            }
-        }
-        
-        # Add year range if available
-        if match.get("startYear"):
-            result["vehicleIdentification"]["matchedTo"]["yearRange"] = {
-                "startYear": match["startYear"],
-                "endYear": match["endYear"] or "present"
-            }
-        
-        # Add all other data from the matched vehicle
-        for key, value in matched_data.items():
-            if key != "vehicleIdentification":
-                result[key] = value
-                
-        return result
-    
-    # No match found
-    logger.warning(f"No repair time match found for {make} {model} (year: {year})")
-    
-    # For debugging - log available keys that might be relevant
-    similar_keys = [k for k in vehicle_data.keys() if make.lower() in k and len(k) < 40]
-    if similar_keys:
-        logger.info(f"Similar repair time keys available: {similar_keys}")
+        return _match_record(match["key"], "fuzzy", score)
     
-    raise HTTPException(
-        status_code=404, 
-        detail=f"No repair time data found for {make} {model}" + 
-              (f" (year: {year})" if year else "")
-    )
+    return None
 
-@app.get("/api/v1/tech-specs/{make}/{model}")
-@cached(cache=tech_specs_cache)
-async def get_vehicle_tech_specs(
-    make: str, 
-    model: str, 
-    response: Response,
-    year: Optional[int] = None,
-    fuel_type: Optional[str] = None,
-):
+def match_tech_specs(make: str, model: str, year: Optional[int] = None, fuel_type: Optional[str] = None) -> Optional[Dict[str, Any]]:
     """
-    Get technical specifications with general model matching logic.
+    Run the technical specifications lookup ladder, most specific keys first, fuzzy matching last.
+    Returns a match record (see _match_record) or None if nothing matched.
     """
-    if not tech_specs_data or not vehicle_index:
-        raise HTTPException(status_code=500, detail="Technical specifications data not loaded")
-        
-    # Set headers
-    response.headers["X-Cache"] = "HIT"
-    response.headers["Cache-Control"] = f"max-age={Config.CACHE_TTL}"
-    response.headers["X-Data-Type"] = "tech_specs"
-    
-    # Log request
-    logger.info(f"Looking up tech specs for: {make} {model} (year: {year}, fuel: {fuel_type})")
-    
     # Normalize parameters
-    make = make.strip()
-    model = model.strip()
+    make, model = clean_make_model(make, model)
     
     # Extract base model using the general function
     base_model = extract_base_model(model)
@@ -1314,21 +1550,21 @@ async def get_vehicle_tech_specs(
         fuel_year_key = f"{make}_{model}_{fuel_type}_{year}".lower().replace(" ", "_")
         if fuel_year_key in tech_specs_data:
             logger.info(f"Direct match with full model, year and fuel type: {fuel_year_key}")
-            return tech_specs_data[fuel_year_key]
+            return _match_record(fuel_year_key, "direct_fuel_year", 1.0)
         
         # Base model, year, and fuel type
         if base_model != model:
             base_fuel_year_key = f"{make}_{base_model}_{fuel_type}_{year}".lower().replace(" ", "_")
             if base_fuel_year_key in tech_specs_data:
                 logger.info(f"Direct match with base model, year and fuel type: {base_fuel_year_key}")
-                return tech_specs_data[base_fuel_year_key]
+                return _match_record(base_fuel_year_key, "base_fuel_year", 0.95)
         
         # Normalized model, year, and fuel type
         if normalized_model != model.lower().strip():
             norm_fuel_year_key = f"{make}_{normalized_model}_{fuel_type}_{year}".lower().replace(" ", "_")
             if norm_fuel_year_key in tech_specs_data:
                 logger.info(f"Direct match with normalized model, year and fuel type: {norm_fuel_year_key}")
-                return tech_specs_data[norm_fuel_year_key]
+                return _match_record(norm_fuel_year_key, "normalized_fuel_year", 0.95)
     
     # Try year only - prioritize year matching over fuel type
     if year:
@@ -1336,21 +1572,21 @@ async def get_vehicle_tech_specs(
         year_key = f"{make}_{model}_{year}".lower().replace(" ", "_")
         if year_key in tech_specs_data:
             logger.info(f"Direct match with full model and year: {year_key}")
-            return tech_specs_data[year_key]
+            return _match_record(year_key, "direct_year", 0.95)
         
         # Base model and year
         if base_model != model:
             base_year_key = f"{make}_{base_model}_{year}".lower().replace(" ", "_")
             if base_year_key in tech_specs_data:
                 logger.info(f"Direct match with base model and year: {base_year_key}")
-                return tech_specs_data[base_year_key]
+                return _match_record(base_year_key, "base_year", 0.9)
         
         # Normalized model and year
         if normalized_model != model.lower().strip():
             norm_year_key = f"{make}_{normalized_model}_{year}".lower().replace(" ", "_")
             if norm_year_key in tech_specs_data:
                 logger.info(f"Direct match with normalized model and year: {norm_year_key}")
-                return tech_specs_data[norm_year_key]
+                return _match_record(norm_year_key, "normalized_year", 0.9)
         
         # If we have year, try to match on year with a partial model match
         # Get all keys for this make and year
@@ -1367,7 +1603,7 @@ async def get_vehicle_tech_specs(
                 if (model.lower().replace(" ", "_") in key_model_part or 
                     key_model_part in model.lower().replace(" ", "_")):
                     logger.info(f"Found partial model match with year: {key}")
-                    return tech_specs_data[key]
+                    return _match_record(key, "partial_year", 0.75)
     
     # Try fuel type only
     if fuel_type:
@@ -1375,21 +1611,21 @@ async def get_vehicle_tech_specs(
         fuel_key = f"{make}_{model}_{fuel_type}".lower().replace(" ", "_")
         if fuel_key in tech_specs_data:
             logger.info(f"Direct match with full model and fuel type: {fuel_key}")
-            return tech_specs_data[fuel_key]
+            return _match_record(fuel_key, "direct_fuel", 0.9)
         
         # Base model and fuel type
         if base_model != model:
             base_fuel_key = f"{make}_{base_model}_{fuel_type}".lower().replace(" ", "_")
             if base_fuel_key in tech_specs_data:
                 logger.info(f"Direct match with base model and fuel type: {base_fuel_key}")
-                return tech_specs_data[base_fuel_key]
+                return _match_record(base_fuel_key, "base_fuel", 0.85)
         
         # Normalized model and fuel type
         if normalized_model != model.lower().strip():
             norm_fuel_key = f"{make}_{normalized_model}_{fuel_type}".lower().replace(" ", "_")
             if norm_fuel_key in tech_specs_data:
                 logger.info(f"Direct match with normalized model and fuel type: {norm_fuel_key}")
-                return tech_specs_data[norm_fuel_key]
+                return _match_record(norm_fuel_key, "normalized_fuel", 0.85)
     
     # Try base keys
     
@@ -1401,14 +1637,13 @@ async def get_vehicle_tech_specs(
             model_type = tech_specs_data[key]["vehicleIdentification"].get("modelType", "")
             start_year, end_year = extract_year_info(model_type)
             
-            if start_year and ((end_year is None and year >= start_year) or 
-                              (end_year is not None and start_year <= year <= end_year)):
+            if year_in_range(year, start_year, end_year):
                 logger.info(f"Year {year} is within range {start_year}-{end_year or 'present'} for full model")
-                return tech_specs_data[key]
+                return _match_record(key, "direct_year_range", 0.95)
         else:
             # No year provided, use direct match
             logger.info(f"Direct match with full model: {key}")
-            return tech_specs_data[key]
+            return _match_record(key, "direct", 0.9)
     
     # Base model
     if base_model != model:
@@ -1419,14 +1654,13 @@ async def get_vehicle_tech_specs(
                 model_type = tech_specs_data[base_key]["vehicleIdentification"].get("modelType", "")
                 start_year, end_year = extract_year_info(model_type)
                 
-                if start_year and ((end_year is None and year >= start_year) or 
-                                (end_year is not None and start_year <= year <= end_year)):
+                if year_in_range(year, start_year, end_year):
                     logger.info(f"Year {year} is within range {start_year}-{end_year or 'present'} for base model")
-                    return tech_specs_data[base_key]
+                    return _match_record(base_key, "base_year_range", 0.9)
             else:
                 # No year provided, use direct match
                 logger.info(f"Direct match with base model: {base_key}")
-                return tech_specs_data[base_key]
+                return _match_record(base_key, "base", 0.85)
     
     # Normalized model
     if normalized_model != model.lower().strip():
@@ -1437,14 +1671,13 @@ async def get_vehicle_tech_specs(
                 model_type = tech_specs_data[norm_key]["vehicleIdentification"].get("modelType", "")
                 start_year, end_year = extract_year_info(model_type)
                 
-                if start_year and ((end_year is None and year >= start_year) or 
-                                (end_year is not None and start_year <= year <= end_year)):
+                if year_in_range(year, start_year, end_year):
                     logger.info(f"Year {year} is within range {start_year}-{end_year or 'present'} for normalized model")
-                    return tech_specs_data[norm_key]
+                    return _match_record(norm_key, "normalized_year_range", 0.9)
             else:
                 # No year provided, use direct match
                 logger.info(f"Direct match with normalized model: {norm_key}")
-                return tech_specs_data[norm_key]
+                return _match_record(norm_key, "normalized", 0.85)
     
     # Try partial model matching in database keys
     # This handles cases where the frontend sends a subset of the actual model name
@@ -1470,258 +1703,2092 @@ async def get_vehicle_tech_specs(
         if year_matching_keys:
             best_key = year_matching_keys[0]  # Take the first match
             logger.info(f"Found partial model match with year: {best_key}")
-            return tech_specs_data[best_key]
+            return _match_record(best_key, "partial_year", 0.75)
     
     # Fuzzy matching as last resort
     logger.info(f"Attempting fuzzy matching for {make} {model} (year: {year}, fuel: {fuel_type})")
-    match = find_vehicle_match(make, model, year, fuel_type, data_type="tech_specs")
-    
+    match, score = find_vehicle_match_with_score(make, model, year, fuel_type, data_type="tech_specs")
     if match:
-        matched_data = tech_specs_data[match["key"]]
         logger.info(f"Fuzzy match found: {match['make']} {match['model']} {match.get('fuelType', 'unknown')}")
-        
-        # Add matching info to response
-        result = {
-            "vehicleIdentification": {
-                "make": make,
-                "model": model,
-                "matchedTo": {
-                    "make": match["make"],
-                    "model": match["model"],
-                    "modelType": match["modelType"],
-                    "fuelType": match.get("fuelType", "unknown")
-                }
-            }
-        }
-        
-        # Add year range if available
-        if match.get("startYear"):
-            result["vehicleIdentification"]["matchedTo"]["yearRange"] = {
-                "startYear": match["startYear"],
-                "endYear": match["endYear"] or "present"
-            }
-        
-        # Add all other data
-        for key, value in matched_data.items():
-            if key != "vehicleIdentification":
-                result[key] = value
-                
-        return result
-        
-    # No match found
-    logger.warning(f"No tech specs match found for {make} {model} (year: {year}, fuel: {fuel_type})")
-    
-    # For debugging
-    similar_keys = [k for k in tech_specs_data.keys() 
-                   if make.lower() in k and len(k) < 30]
-    if similar_keys:
-        logger.info(f"Similar tech spec keys available: {similar_keys}")
+        return _match_record(match["key"], "fuzzy", score)
     
-    raise HTTPException(
-        status_code=404, 
-        detail=f"No technical specifications found for {make} {model}" + 
-              (f" (year: {year})" if year else "") +
-              (f" (fuel type: {fuel_type})" if fuel_type else "")
-    )
+    return None
 
-@app.get("/api/v1/vehicle-data/{make}/{model}")
-async def get_combined_vehicle_data(
-    make: str, 
-    model: str, 
-    response: Response,
-    year: Optional[int] = None,
-    fuel_type: Optional[str] = None,
-):
+def build_engine_index():
     """
-    Get combined data (both repair times and technical specifications) for a specific vehicle.
+    Index every catalog document by (canonical make, engine code) and by (canonical make,
+    capacity bucket), keyed to its catalog identity, so engine details pick the variant of a
+    model by direct lookup instead of whichever variant last claimed the make_model keys.
     """
-    if not vehicle_index:
-        raise HTTPException(status_code=500, detail="Vehicle index not built")
-    
-    result = {
-        "vehicleIdentification": {
-            "make": make,
-            "model": model
-        }
-    }
-    
-    # Add fuel type if provided
-    if fuel_type:
-        result["vehicleIdentification"]["fuelType"] = fuel_type
+    global engine_index
+    engine_index = {}
+    
+    for data_type, data_store in (("repair_times", vehicle_data), ("tech_specs", tech_specs_data)):
+        index = {"codes": {}, "capacities": {}, "families": {}}
+        for data in {id(d): d for d in data_store.values()}.values():
+            identity = catalog_identity(data)
+            if identity in index["families"] or identity not in data_store:
+                continue
+            
+            vehicle_id = data["vehicleIdentification"]
+            codes, litres = extract_engine_info(vehicle_id.get("model", ""), vehicle_id.get("modelType", ""))
+            make = canonical_make(vehicle_id.get("make", ""))
+            index["families"][identity] = engine_family(vehicle_id.get("model", ""), codes)
+            
+            for code in codes:
+                index["codes"].setdefault((make, code), []).append(identity)
+            if litres:
+                index["capacities"].setdefault((make, capacity_bucket(litres)), []).append(identity)
+        
+        engine_index[data_type] = index
+        logger.info(
+            f"Indexed {len(index['families'])} {data_type} variants under {len(index['codes'])} engine codes "
+            f"and {len(index['capacities'])} capacity buckets"
+        )
     
-    # Add year if provided
+    return engine_index
+
+def family_matches(requested_model: str, family: str) -> bool:
+    """Whether a canonical requested model names a catalog model family (crvex2 -> crv)"""
+    return bool(requested_model and family) and (requested_model.startswith(family) or family.startswith(requested_model))
+
+def pick_variant(data_type: str, identities: List[str], year: Optional[int] = None) -> Optional[str]:
+    """First variant covering the year, else the first one"""
+    data_store = vehicle_data if data_type == "repair_times" else tech_specs_data
     if year:
-        result["vehicleIdentification"]["year"] = year
-    
-    # Try to get repair times
-    try:
-        repair_times = await get_vehicle_repair_times(make, model, response, year)
-        result["repairTimes"] = repair_times
-        result["hasRepairTimes"] = True
-    except HTTPException:
-        result["hasRepairTimes"] = False
+        for identity in identities:
+            if year_in_range(year, *document_year_range(data_store[identity])):
+                return identity
+    return identities[0] if identities else None
+
+def match_engine_variant(data_type: str, make: str, model: str, year: Optional[int] = None,
+                         engine_code: Optional[str] = None, capacity_bucket: Optional[int] = None,
+                         family: Optional[Tuple[str, str]] = None) -> Optional[Dict[str, Any]]:
+    """
+    Direct lookup of a variant by engine code, then by capacity bucket. Candidates must belong
+    to the requested model, or to exactly the given (make, family) when refining a match.
+    """
+    index = engine_index.get(data_type)
+    if not index:
+        return None
     
-    # Try to get technical specifications
-    try:
-        tech_specs = await get_vehicle_tech_specs(make, model, response, year, fuel_type)
-        # Add each technical section to the result
-        for key, value in tech_specs.items():
-            if key != "vehicleIdentification":
-                result[key] = value
-        result["hasTechSpecs"] = True
-    except HTTPException:
-        result["hasTechSpecs"] = False
+    requested_make, requested_model = family or canonical_query(make, model)
+    lookups = [("engine_code", index["codes"].get((requested_make, engine_code))),
+               ("engine_capacity", index["capacities"].get((requested_make, capacity_bucket)))]
     
-    # Return 404 if neither data type was found
-    if not result.get("hasRepairTimes") and not result.get("hasTechSpecs"):
-        raise HTTPException(
-            status_code=404,
-            detail=f"No data found for {make} {model}" + 
-                  (f" (year: {year})" if year else "") +
-                  (f" (fuel type: {fuel_type})" if fuel_type else "")
-        )
+    for method, identities in lookups:
+        if family:
+            identities = [i for i in identities or [] if index["families"][i] == requested_model]
+        else:
+            identities = [i for i in identities or [] if family_matches(requested_model, index["families"][i])]
+        
+        identity = pick_variant(data_type, identities, year)
+        if identity:
+            logger.info(f"Engine variant match ({method}): {identity}")
+            return _match_record(identity, method, 0.95)
     
-    return result
+    return None
 
-@app.post("/api/v1/repair-times-lookup")
-async def lookup_repair_times(request: VehicleDataRequest, response: Response):
+def match_vehicle(data_type: str, make: str, model: str, year: Optional[int] = None, fuel_type: Optional[str] = None,
+                  engine_code: Optional[str] = None, capacity_bucket: Optional[int] = None) -> Optional[Dict[str, Any]]:
     """
-    Match repair times data based on vehicle data from another source
+    Match a vehicle of one data type. With an engine code or capacity bucket the variant is
+    looked up directly; failing that the usual ladder runs and its match is moved to the sibling
+    variant of the same model family that has this engine, if there is one.
     """
-    if not vehicle_data or not vehicle_index:
-        raise HTTPException(status_code=500, detail="Vehicle data not loaded")
-    
-    vehicle_data_dict = request.vehicleData
+    data_store = vehicle_data if data_type == "repair_times" else tech_specs_data
+    if not data_store:
+        return None
     
-    # Extract basic info from vehicle data
-    make = vehicle_data_dict.get("make", "")
-    model = vehicle_data_dict.get("model", "") or vehicle_data_dict.get("vehicleModel", "")
+    if engine_code or capacity_bucket:
+        make, model = clean_make_model(make, model)
+        record = match_engine_variant(data_type, make, model, year, engine_code, capacity_bucket)
+        if record:
+            return record
     
-    # Get year either from direct year property or by extracting from date fields
-    year = vehicle_data_dict.get("year")
+    if data_type == "repair_times":
+        record = match_repair_times(make, model, year)
+    else:
+        record = match_tech_specs(make, model, year, fuel_type)
+    
+    if record and (engine_code or capacity_bucket):
+        identity = catalog_identity(data_store[record["key"]])
+        family = (canonical_make(data_store[record["key"]]["vehicleIdentification"].get("make", "")),
+                  engine_index[data_type]["families"].get(identity))
+        sibling = match_engine_variant(data_type, make, model, year, engine_code, capacity_bucket, family)
+        if sibling and sibling["key"] != identity:
+            return _match_record(sibling["key"], sibling["method"], record["confidence"])
+    return record
+
+def build_repair_times_response(make: str, model: str, record: Dict[str, Any]) -> Dict[str, Any]:
+    """Turn a repair times match record into the response document"""
+    matched_data = vehicle_data[record["key"]]
+    if record["method"] != "fuzzy":
+        return matched_data
     
-    if not year:
-        # Try common date fields
-        for field in ["yearOfManufacture", "manufactureYear", "registrationDate"]:
-            if field in vehicle_data_dict and vehicle_data_dict[field]:
-                date_value = str(vehicle_data_dict[field])
-                year_match = re.search(r'(\d{4})', date_value)
-                if year_match:
-                    year = int(year_match.group(1))
-                    break
+    match = vehicle_index[record["key"]]
     
-    if not make or not model:
-        raise HTTPException(status_code=400, detail="Vehicle make and model required")
+    # Add matching information to response
+    result = {
+        "vehicleIdentification": {
+            "make": make,
+            "model": model,
+            "matchedTo": {
+                "make": match["make"],
+                "model": match["model"],
+                "modelType": match["modelType"]
+            }
+        }
+    }
     
-    logger.info(f"Looking up repair times for {make} {model} (year: {year})")
+    # Add year range if available
+    if match.get("startYear"):
+        result["vehicleIdentification"]["matchedTo"]["yearRange"] = {
+            "startYear": match["startYear"],
+            "endYear": match["endYear"] or "present"
+        }
     
-    # Create cache key
-    cache_key = f"vehicle_{make}_{model}"
-    if year:
-        cache_key += f"_{year}"
-    cache_key = cache_key.lower().replace(" ", "_")
+    # Add all other data from the matched vehicle
+    for key, value in matched_data.items():
+        if key != "vehicleIdentification":
+            result[key] = value
+            
+    return result
+
+def build_tech_specs_response(make: str, model: str, record: Dict[str, Any]) -> Dict[str, Any]:
+    """Turn a technical specifications match record into the response document"""
+    matched_data = tech_specs_data[record["key"]]
+    if record["method"] != "fuzzy":
+        return matched_data
     
-    # Check cache using the same logic as the get_vehicle_repair_times function
-    if cache_key in vehicle_cache:
-        response.headers["X-Cache"] = "HIT"
-        response.headers["Cache-Control"] = f"max-age={Config.CACHE_TTL}"
-        return vehicle_cache[cache_key]
+    match = vehicle_index[record["key"]]
     
-    response.headers["X-Cache"] = "MISS"
+    # Add matching info to response
+    result = {
+        "vehicleIdentification": {
+            "make": make.strip(),
+            "model": model.strip(),
+            "matchedTo": {
+                "make": match["make"],
+                "model": match["model"],
+                "modelType": match["modelType"],
+                "fuelType": match.get("fuelType", "unknown")
+            }
+        }
+    }
     
-    # Reuse the same lookup logic
-    result = await get_vehicle_repair_times(make, model, response, year)
+    # Add year range if available
+    if match.get("startYear"):
+        result["vehicleIdentification"]["matchedTo"]["yearRange"] = {
+            "startYear": match["startYear"],
+            "endYear": match["endYear"] or "present"
+        }
     
-    # Cache result
-    vehicle_cache[cache_key] = result
+    # Add all other data
+    for key, value in matched_data.items():
+        if key != "vehicleIdentification":
+            result[key] = value
+            
     return result
 
-@app.post("/api/v1/tech-specs-lookup")
-async def lookup_tech_specs(request: TechSpecsRequest, response: Response):
+def document_year_range(data: Dict[str, Any]) -> Tuple[Optional[int], Optional[int]]:
+    """Production year range of a catalog document"""
+    vehicle_id = data["vehicleIdentification"]
+    start_year, end_year = extract_year_info(vehicle_id.get("modelType", ""))
+    if not start_year:
+        start_year, end_year = extract_year_info(vehicle_id.get("title", ""))
+    return start_year, end_year
+
+def catalog_identity(data: Dict[str, Any]) -> str:
     """
-    Match technical specifications with fuel type support
+    Canonical key of a catalog document - its engine variant key (make_model#code) when the
+    engine code is known, else the basic make_model key it was loaded under
+    """
+    vehicle_id = data["vehicleIdentification"]
+    identity = f"{vehicle_id.get('make', '')}_{vehicle_id.get('model', '')}".lower().replace(" ", "_")
+    codes, _ = extract_engine_info(vehicle_id.get("model", ""), vehicle_id.get("modelType", ""))
+    return f"{identity}#{codes[0]}" if codes else identity
+
+def serialize_json(data: Any) -> bytes:
+    """Serialize the same way JSONResponse does"""
+    return json.dumps(data, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+def build_profile(repair_times_key: Optional[str], tech_specs_match: Optional[Dict[str, Any]]) -> Dict[str, Any]:
     """
-    if not tech_specs_data or not vehicle_index:
-        raise HTTPException(status_code=500, detail="Technical specifications data not loaded")
+    Materialize the combined document for one catalog identity. The body is serialized once here
+    and streamed as-is by the combined endpoint, after a small per-request vehicleIdentification.
+    """
+    body = {}
+    sections = {"repairTimes": [], "techSpecs": []}
     
-    vehicle_data_dict = request.vehicleData
+    if repair_times_key:
+        repair_times = vehicle_data[repair_times_key]
+        body["repairTimes"] = repair_times
+        sections["repairTimes"] = [k for k in repair_times if k != "vehicleIdentification"]
+    body["hasRepairTimes"] = bool(repair_times_key)
     
-    # Extract all vehicle information
-    make = vehicle_data_dict.get("make", "")
-    model = vehicle_data_dict.get("model", "") or vehicle_data_dict.get("vehicleModel", "")
-    fuel_type = vehicle_data_dict.get("fuelType")
+    if tech_specs_match:
+        tech_specs = tech_specs_data[tech_specs_match["key"]]
+        for key, value in tech_specs.items():
+            if key != "vehicleIdentification":
+                body[key] = value
+                sections["techSpecs"].append(key)
+    body["hasTechSpecs"] = bool(tech_specs_match)
     
-    # Normalize fuel type
-    if fuel_type:
-        fuel_type = fuel_type.lower().strip()
-        # Map common fuel type variations
-        if fuel_type in ["gasoline", "unleaded", "gas"]:
-            fuel_type = "petrol"
-        elif fuel_type in ["gasoil", "derv"]:
-            fuel_type = "diesel"
+    return {
+        "repairTimesKey": repair_times_key,
+        "techSpecsKey": catalog_identity(tech_specs_data[tech_specs_match["key"]]) if tech_specs_match else None,
+        "techSpecsMatch": tech_specs_match,
+        "sections": sections,
+        # Skip the opening brace so the per-request header can be prepended
+        "body": serialize_json(body)[1:]
+    }
+
+def build_vehicle_profiles():
+    """
+    Precompute a joined repair times + technical specifications profile per catalog identity.
+    Each repair times document is joined to the tech specs document that best matches its own
+    make, model, engine and start year. Tech specs documents point at the first profile they joined,
+    or get a profile of their own.
+    """
+    global vehicle_profiles
+    vehicle_profiles = {}
+    rejoined_profiles.clear()
+    joined_tech_specs = set()
     
-    # Get year from various possible fields
-    year = vehicle_data_dict.get("year")
-    if not year:
-        for field in ["yearOfManufacture", "manufactureYear", "registrationDate"]:
-            if field in vehicle_data_dict and vehicle_data_dict[field]:
-                date_value = str(vehicle_data_dict[field])
-                year_match = re.search(r'(\d{4})', date_value)
-                if year_match:
-                    year = int(year_match.group(1))
-                    break
+    repair_documents = {catalog_identity(d): d for d in vehicle_data.values()}
+    for identity, data in repair_documents.items():
+        vehicle_id = data["vehicleIdentification"]
+        start_year, _ = extract_year_info(vehicle_id.get("modelType", ""))
+        codes, litres = extract_engine_info(vehicle_id.get("model", ""), vehicle_id.get("modelType", ""))
+        
+        tech_specs_match = None
+        if tech_specs_data:
+            tech_specs_match = match_vehicle(
+                "tech_specs", vehicle_id.get("make", ""), vehicle_id.get("model", ""), start_year,
+                engine_code=codes[0] if codes else None, capacity_bucket=capacity_bucket(litres)
+            )
+            if tech_specs_match and tech_specs_match["confidence"] < Config.MIN_MATCH_SCORE:
+                tech_specs_match = None
+        
+        profile = build_profile(identity, tech_specs_match)
+        vehicle_profiles[("repair_times", identity)] = profile
+        if profile["techSpecsKey"] and profile["techSpecsKey"] not in joined_tech_specs:
+            joined_tech_specs.add(profile["techSpecsKey"])
+            vehicle_profiles[("tech_specs", profile["techSpecsKey"])] = profile
+    
+    for identity in {catalog_identity(d) for d in tech_specs_data.values()}:
+        if identity not in joined_tech_specs:
+            vehicle_profiles[("tech_specs", identity)] = build_profile(
+                None, _match_record(identity, "direct", 1.0)
+            )
     
-    if not make or not model:
-        raise HTTPException(status_code=400, detail="Vehicle make and model required")
+    logger.info(f"Built {len(vehicle_profiles)} combined vehicle profiles ({len(joined_tech_specs)} joined)")
+    return vehicle_profiles
+
+def tech_specs_fits(record: Dict[str, Any], year: Optional[int] = None, fuel_type: Optional[str] = None) -> bool:
+    """Whether a tech specs match suits the requested year and fuel type - anything unknown suits"""
+    data = tech_specs_data.get(record["key"])
+    if data is None:
+        return False
     
-    logger.info(f"Looking up tech specs for {make} {model} (year: {year}, fuel: {fuel_type})")
+    document_fuel_type = normalize_fuel_type(data["vehicleIdentification"].get("fuelType"))
+    if fuel_type and document_fuel_type not in (None, "", "unknown", normalize_fuel_type(fuel_type)):
+        return False
     
-    # Create cache key with fuel type
-    cache_key = f"tech_specs_{make}_{model}"
     if year:
-        cache_key += f"_{year}"
-    if fuel_type:
-        cache_key += f"_{fuel_type}"
-    cache_key = cache_key.lower().replace(" ", "_")
-    
-    # Check cache
-    if cache_key in tech_specs_cache:
-        response.headers["X-Cache"] = "HIT"
-        response.headers["Cache-Control"] = f"max-age={Config.CACHE_TTL}"
-        return tech_specs_cache[cache_key]
-    
-    response.headers["X-Cache"] = "MISS"
+        start_year, end_year = document_year_range(data)
+        if (start_year and year < start_year) or (end_year and year > end_year):
+            return False
+    return True
+
+def rejoined_profile(profile: Dict[str, Any], tech_specs_match: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    The profile of a repair times document joined to another tech specs match (or none) than
+    the one it was prebuilt with, built on first use
+    """
+    tech_specs_key = catalog_identity(tech_specs_data[tech_specs_match["key"]]) if tech_specs_match else None
+    if tech_specs_key == profile["techSpecsKey"]:
+        return profile
+    
+    cache_key = (profile["repairTimesKey"], tech_specs_key)
+    rejoined = rejoined_profiles.get(cache_key)
+    if rejoined is None:
+        rejoined = rejoined_profiles[cache_key] = build_profile(profile["repairTimesKey"], tech_specs_match)
+    return rejoined
+
+# Labour operation IDs
+OPERATION_ACTIONS = (
+    "Remove and Install", "Remove and Replace", "Check and Adjust", "Check", "Strip and Rebuild",
+    "Renew", "Drain and Refill", "Bleed", "Disconnect", "Partially remove", "Carry out"
+)
+
+def slugify(text: str) -> str:
+    """Lowercase text with every run of other characters collapsed to a hyphen"""
+    return re.sub(r'[^a-z0-9]+', '-', text.lower()).strip('-')
+
+@lru_cache(maxsize=4096)
+def parse_operation_label(label: str) -> Optional[Tuple[str, str, str]]:
+    """
+    Split a repair times label into (action, component, qualifiers) slugs. Included operations
+    that follow the next action are dropped:
+    "Remove and Install - Front brake pads (all) - wheels removed" -> ("remove-and-install", "front-brake-pads-all", "wheels-removed")
+    """
+    segments = [segment.strip() for segment in label.split(" - ")]
+    if len(segments) < 2 or segments[0] not in OPERATION_ACTIONS:
+        return None
     
-    # Use enhanced lookup with fuel type
-    result = await get_vehicle_tech_specs(make, model, response, year, fuel_type)
+    qualifiers = []
+    for segment in segments[2:]:
+        if segment in OPERATION_ACTIONS:
+            break
+        qualifiers.append(segment)
     
-    # Cache result
-    tech_specs_cache[cache_key] = result
-    return result
+    return slugify(segments[0]), slugify(segments[1]), slugify(" ".join(qualifiers))
 
-@app.post("/api/v1/cache/clear")
-async def clear_cache():
-    """Clear all data caches"""
-    vehicle_cache.clear()
-    tech_specs_cache.clear()
-    logger.info("All caches cleared manually")
-    return {"status": "success", "message": "All caches cleared successfully"}
+def operation_id(section: str, subsection: str, parsed: Tuple[str, str, str]) -> str:
+    """Normalized operation ID, the same for every vehicle with that labour operation"""
+    action, component, qualifiers = parsed
+    op_id = f"{section}.{subsection}.{action}.{component}"
+    return f"{op_id}.{qualifiers}" if qualifiers else op_id
 
-@app.on_event("startup")
-async def startup_event():
-    """Load data and build indexes on startup"""
-    global vehicle_data, tech_specs_data, vehicle_index
-    
+def parse_hours(value: Any) -> Optional[float]:
+    """Labour time value as hours"""
     try:
-        # Load both data types
-        vehicle_data, tech_specs_data = load_all_vehicle_data()
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+def build_operation_index():
+    """
+    Assign normalized operation IDs to every repair times document, so vehicles can be
+    looked up per operation without reading labels again. The first label wins when two
+    map to the same ID.
+    """
+    global vehicle_operations, operation_catalog
+    vehicle_operations = {}
+    operation_catalog = {}
+    
+    for data in vehicle_data.values():
+        identity = catalog_identity(data)
+        if identity in vehicle_operations:
+            continue
         
-        # Build unified index
-        vehicle_index = build_vehicle_index()
+        operations = {}
+        for section, subsections in data.items():
+            if section == "vehicleIdentification" or not isinstance(subsections, dict):
+                continue
+            
+            for subsection, entry in subsections.items():
+                if not isinstance(entry, dict):
+                    continue
+                
+                for detail in entry.get("details", []):
+                    parsed = parse_operation_label(detail.get("label", ""))
+                    if not parsed:
+                        continue
+                    
+                    op_id = operation_id(section, subsection, parsed)
+                    if op_id in operations:
+                        continue
+                    
+                    operations[op_id] = {
+                        "operationId": op_id,
+                        "label": detail["label"],
+                        "hours": parse_hours(detail.get("value")),
+                        "section": section,
+                        "subsection": subsection
+                    }
+                    operation_catalog[op_id] = parsed
         
-        logger.info(f"API started successfully with {len(vehicle_data)} repair time records and {len(tech_specs_data)} technical specification records")
+        vehicle_operations[identity] = operations
+    
+    logger.info(f"Indexed {len(operation_catalog)} labour operations across {len(vehicle_operations)} vehicles")
+    compile_defect_index()
+
+def capacity_band(litres: Optional[float]) -> Optional[str]:
+    """Engine capacity band for percentile segments, e.g. 1.8 -> "1.6-2.0" """
+    if not litres:
+        return None
+    edges = Config.CAPACITY_BANDS
+    position = bisect_right(edges, litres)
+    if position == 0:
+        return f"<{edges[0]:.1f}"
+    if position == len(edges):
+        return f"{edges[-1]:.1f}+"
+    return f"{edges[position - 1]:.1f}-{edges[position]:.1f}"
+
+def vehicle_segments(vehicle_id: Dict[str, Any]) -> List[Tuple[str, str]]:
+    """Percentile segments a vehicle belongs to - the whole fleet, its make and its capacity band"""
+    segments = [("fleet", ""), ("make", canonical_make(vehicle_id.get("make", "")))]
+    _, litres = extract_engine_info(vehicle_id.get("model", ""), vehicle_id.get("modelType", ""))
+    band = capacity_band(litres)
+    if band:
+        segments.append(("capacityBand", band))
+    return segments
+
+def collect_operation_histograms() -> Dict[Tuple[str, str], Dict[str, Dict[float, int]]]:
+    """
+    Count vehicles per labour time value for every operation and segment. Histograms from
+    several catalog shards merge by adding the counts.
+    """
+    histograms = {}
+    seen = set()
+    for data in vehicle_data.values():
+        identity = catalog_identity(data)
+        if identity in seen or identity not in vehicle_operations:
+            continue
+        seen.add(identity)
+        operations = vehicle_operations[identity]
+        
+        for segment in vehicle_segments(data["vehicleIdentification"]):
+            segment_histograms = histograms.setdefault(segment, {})
+            for op_id, operation in operations.items():
+                if operation["hours"] is None:
+                    continue
+                counts = segment_histograms.setdefault(op_id, {})
+                counts[operation["hours"]] = counts.get(operation["hours"], 0) + 1
+    
+    return histograms
+
+def merge_operation_histograms(parts: List[Dict[Tuple[str, str], Dict[str, Dict[float, int]]]]) -> Dict[Tuple[str, str], Dict[str, Dict[float, int]]]:
+    """Add up operation histograms collected by each catalog shard"""
+    merged = {}
+    for histograms in parts:
+        for segment, segment_histograms in histograms.items():
+            merged_segment = merged.setdefault(segment, {})
+            for op_id, counts in segment_histograms.items():
+                merged_counts = merged_segment.setdefault(op_id, {})
+                for hours, count in counts.items():
+                    merged_counts[hours] = merged_counts.get(hours, 0) + count
+    return merged
+
+def summarize_hours(counts: Dict[float, int]) -> Dict[str, Any]:
+    """
+    Distribution summary of one operation's labour times, plus the percentile rank of every
+    value seen so a vehicle's own time is annotated by lookup. Ranks count ties as half below.
+    """
+    values = sorted(counts)
+    total = sum(counts.values())
+    expanded = [value for value in values for _ in range(counts[value])]
+    
+    quantiles = {}
+    for q in (10, 25, 50, 75, 90):
+        position = (total - 1) * q / 100
+        lower = int(position)
+        upper = min(lower + 1, total - 1)
+        quantiles[f"p{q}"] = round(expanded[lower] + (expanded[upper] - expanded[lower]) * (position - lower), 2)
+    
+    ranks = {}
+    below = 0
+    for value in values:
+        ranks[value] = round(100 * (below + counts[value] / 2) / total, 1)
+        below += counts[value]
+    
+    return {
+        "summary": {
+            "count": total,
+            "mean": round(sum(expanded) / total, 2),
+            "quantiles": quantiles
+        },
+        "ranks": ranks
+    }
+
+def build_operation_stats(histograms: Dict[Tuple[str, str], Dict[str, Dict[float, int]]]) -> int:
+    """Summarize operation histograms into the distributions used for percentile annotations"""
+    global operation_stats
+    operation_stats = {
+        segment: {
+            op_id: summarize_hours(counts)
+            for op_id, counts in segment_histograms.items()
+            if segment[0] == "fleet" or sum(counts.values()) >= Config.PERCENTILE_MIN_SAMPLES
+        }
+        for segment, segment_histograms in histograms.items()
+    }
+    
+    distributions = sum(len(segment_stats) for segment_stats in operation_stats.values())
+    logger.info(f"Built {distributions} labour time distributions across {len(operation_stats)} segments")
+    return distributions
+
+def operation_hours(data: Dict[str, Any]) -> Dict[str, Tuple[str, Optional[float]]]:
+    """(label, hours) per operation ID of a repair times document, for comparisons"""
+    return {
+        op_id: (operation["label"], operation["hours"])
+        for op_id, operation in vehicle_operations.get(catalog_identity(data), {}).items()
+    }
+
+def operation_percentiles(data: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """Percentile annotations for every timed operation of a repair times document"""
+    segments = vehicle_segments(data["vehicleIdentification"])
+    annotations = {}
+    for op_id, operation in vehicle_operations.get(catalog_identity(data), {}).items():
+        hours = operation["hours"]
+        if hours is None:
+            continue
+        
+        annotation = {"label": operation["label"], "hours": hours}
+        for segment_type, segment in segments:
+            distribution = operation_stats.get((segment_type, segment), {}).get(op_id)
+            if distribution and hours in distribution["ranks"]:
+                annotation[segment_type] = {"percentile": distribution["ranks"][hours], **distribution["summary"]}
+                if segment:
+                    annotation[segment_type]["segment"] = segment
+        annotations[op_id] = annotation
+    
+    return annotations
+
+# MOT defect rules - keywords found in MOT defect texts and the labour operations that fix them.
+# Operations are (actions, component) pairs matched against operation_catalog; a component
+# matches itself or any longer component ("front brake pads" -> "front-brake-pads-all").
+# "{position}" is filled from the front/rear position in the defect text. More specific rules
+# come first, since a keyword consumes the text it matched; a rule is dropped when the text
+# also contains one of its excludes.
+REPLACE_ACTIONS = ("remove-and-install", "remove-and-replace", "renew")
+
+DEFECT_OPERATION_RULES = [
+    {"rule": "brake-pads", "keywords": ["brake pad", "brake lining"], "operations": [(REPLACE_ACTIONS, "{position} brake pads")]},
+    {"rule": "brake-discs", "keywords": ["brake disc"], "operations": [(REPLACE_ACTIONS, "{position} brake disc")]},
+    {"rule": "brake-drums", "keywords": ["brake drum"], "operations": [(REPLACE_ACTIONS, "{position} brake drum")]},
+    {"rule": "brake-shoes", "keywords": ["brake shoe"], "operations": [(REPLACE_ACTIONS, "{position} brakes shoes")]},
+    {"rule": "brake-hoses", "keywords": ["brake hose", "flexible brake"], "operations": [(REPLACE_ACTIONS, "{position} brake hose")]},
+    {"rule": "brake-calipers", "keywords": ["brake caliper", "caliper"], "operations": [(REPLACE_ACTIONS, "{position} brake caliper")]},
+    {"rule": "wheel-cylinders", "keywords": ["wheel cylinder"], "operations": [(REPLACE_ACTIONS, "{position} wheel cylinder")]},
+    {"rule": "parking-brake", "keywords": ["parking brake", "handbrake"], "operations": [
+        (("check-and-adjust",), "parking brake freeplay"), (REPLACE_ACTIONS, "parking brake cable")
+    ]},
+    {"rule": "master-cylinder", "keywords": ["master cylinder"], "operations": [(REPLACE_ACTIONS, "master cylinder")]},
+    {"rule": "brake-fluid", "keywords": ["brake fluid"], "operations": [(("bleed", "drain-and-refill"), "hydraulic system")]},
+    {"rule": "brake-servo", "keywords": ["servo"], "operations": [(REPLACE_ACTIONS, "servo")]},
+    {"rule": "abs-sensor", "keywords": ["wheel speed sensor", "abs sensor"], "operations": [(REPLACE_ACTIONS, "wheel sensor")]},
+    {"rule": "headlamp-aim", "keywords": ["headlamp aim", "headlamp beam image", "headlamp levelling"], "operations": [
+        (("check-and-adjust",), "headlamp alignment")
+    ]},
+    {"rule": "headlamp", "keywords": ["headlamp", "headlight", "dipped beam", "main beam"], "operations": [
+        (REPLACE_ACTIONS, "headlamp bulb"), (REPLACE_ACTIONS, "headlamp")
+    ]},
+    {"rule": "direction-indicators", "keywords": ["direction indicator", "indicator"], "operations": [
+        (REPLACE_ACTIONS, "direction indicator lamp bulb"), (REPLACE_ACTIONS, "direction indicator lamp")
+    ]},
+    {"rule": "side-repeaters", "keywords": ["side repeater"], "operations": [(REPLACE_ACTIONS, "side repeater lamp bulb")]},
+    {"rule": "stop-lamps", "keywords": ["stop lamp", "brake light"], "operations": [
+        (REPLACE_ACTIONS, "stop tail lamp bulb"), (REPLACE_ACTIONS, "stop lamp bulb")
+    ]},
+    {"rule": "fog-lamps", "keywords": ["fog lamp"], "operations": [(REPLACE_ACTIONS, "fog lamp bulb")]},
+    {"rule": "registration-plate-lamps", "keywords": ["registration plate lamp", "number plate lamp"], "operations": [
+        (REPLACE_ACTIONS, "licence plate lamp bulb"), (REPLACE_ACTIONS, "number plate lamp")
+    ]},
+    {"rule": "reversing-lamps", "keywords": ["reversing lamp", "reversing light"], "operations": [(REPLACE_ACTIONS, "reversing lamp bulb")]},
+    {"rule": "position-lamps", "keywords": ["position lamp", "side lamp", "sidelight"], "operations": [(REPLACE_ACTIONS, "side lamp bulb")]},
+    {"rule": "rear-lamps", "keywords": ["rear lamp", "tail lamp"], "operations": [(REPLACE_ACTIONS, "rear combination bulb")]},
+    {"rule": "wiper-blades", "keywords": ["wiper blade", "wiper"], "operations": [(REPLACE_ACTIONS, "wiper blade")]},
+    {"rule": "washers", "keywords": ["washer"], "operations": [(REPLACE_ACTIONS, "washer jet"), (REPLACE_ACTIONS, "washer motor")]},
+    {"rule": "windscreen", "keywords": ["windscreen"], "excludes": ["wiper", "washer"], "operations": [(REPLACE_ACTIONS, "windscreen")]},
+    {"rule": "horn", "keywords": ["horn"], "operations": [(REPLACE_ACTIONS, "horn")]},
+    {"rule": "seat-belts", "keywords": ["seat belt"], "operations": [(REPLACE_ACTIONS, "{position} seat belt")]},
+    {"rule": "mirrors", "keywords": ["mirror"], "operations": [(REPLACE_ACTIONS, "mirror glass and support"), (REPLACE_ACTIONS, "door mirror")]},
+    {"rule": "airbags", "keywords": ["airbag"], "operations": [(REPLACE_ACTIONS, "airbag")]},
+    {"rule": "battery", "keywords": ["battery"], "operations": [(REPLACE_ACTIONS, "battery")]},
+    {"rule": "exhaust", "keywords": ["exhaust"], "operations": [(REPLACE_ACTIONS, "exhaust")]},
+    {"rule": "shock-absorbers", "keywords": ["shock absorber"], "operations": [(REPLACE_ACTIONS, "{position} shock absorber")]},
+    {"rule": "springs", "keywords": ["coil spring", "road spring"], "operations": [(REPLACE_ACTIONS, "{position} coil spring")]},
+    {"rule": "track-rod-ends", "keywords": ["track rod end"], "operations": [(REPLACE_ACTIONS, "track rod end")]},
+    {"rule": "ball-joints", "keywords": ["ball joint"], "operations": [(REPLACE_ACTIONS, "{position} ball joint")]},
+    {"rule": "drive-shaft-gaiters", "keywords": ["drive shaft", "driveshaft"], "operations": [(REPLACE_ACTIONS, "drive shaft gaiter")]}
+]
+
+DEFECT_POSITION_PATTERN = re.compile(r'\b(front|rear)\b', re.IGNORECASE)
+MOT_REFERENCE_PATTERN = re.compile(r'\s*\(\d+(?:\.\d+)+.*\)\s*$')  # Inspection manual reference, e.g. "(1.1.13 (a) (ii))"
+
+def rank_rule_operations(rule: Dict[str, Any], position: Optional[str]) -> List[str]:
+    """
+    Operation IDs a rule can resolve to, best first: earlier rule operations, exact components,
+    operations naming the defect position over unpositioned ones over the opposite end,
+    then the plainest variant (no qualifiers, "one" before "both").
+    """
+    positions = [position] if position else ["front", "rear"]
+    # Unpositioned defects are assumed to be at the front (wipers, washers)
+    wanted = position or "front"
+    opposite = "rear" if wanted == "front" else "front"
+    ranked = []
+    for op_id, (action, component, qualifiers) in operation_catalog.items():
+        subsection = slugify(re.sub(r'([a-z])([A-Z])', r'\1 \2', op_id.split(".")[1]))
+        words = set(f"{subsection}-{component}-{qualifiers}".split("-"))
+        for order, (actions, template) in enumerate(rule["operations"]):
+            if action not in actions:
+                continue
+            
+            for position_order, candidate_position in enumerate(positions):
+                pattern = slugify(template.format(position=candidate_position))
+                if component == pattern or component.startswith(pattern + "-"):
+                    position_miss = 0 if wanted in words else 2 if opposite in words else 1
+                    rank = (order, position_order, component != pattern, position_miss, len(qualifiers), len(component), op_id)
+                    ranked.append((rank, op_id))
+                    break
+            else:
+                continue
+            break
+    
+    return [op_id for _, op_id in sorted(ranked)]
+
+def compile_defect_index():
+    """
+    Compile DEFECT_OPERATION_RULES once per catalog: a single alternation over every keyword, and
+    per rule and defect position the candidate operation IDs in preference order. Resolving a
+    defect is then one regex pass plus dictionary lookups against the vehicle's operations.
+    """
+    groups = []
+    rules = {}
+    for i, rule in enumerate(DEFECT_OPERATION_RULES):
+        keywords = "|".join(r'\s+'.join(re.escape(word) for word in keyword.split()) for keyword in rule["keywords"])
+        groups.append(f"(?P<r{i}>\\b(?:{keywords}))")
+        excludes = "|".join(re.escape(word) for word in rule.get("excludes", []))
+        rules[f"r{i}"] = {
+            "rule": rule["rule"],
+            "excludes": re.compile(excludes, re.IGNORECASE) if excludes else None,
+            "candidates": {position: rank_rule_operations(rule, position) for position in (None, "front", "rear")}
+        }
+    
+    defect_index["pattern"] = re.compile("|".join(groups), re.IGNORECASE)
+    defect_index["rules"] = rules
+    match_defect_text.cache_clear()
+    
+    compiled = sum(1 for rule in rules.values() if rule["candidates"][None])
+    logger.info(f"Compiled {len(rules)} MOT defect rules ({compiled} with labour operations in the catalog)")
+
+@lru_cache(maxsize=Config.DEFECT_CACHE_SIZE)
+def match_defect_text(text: str) -> Tuple[Tuple[str, ...], Optional[str]]:
+    """Compiled rule groups a defect text hits, and the front/rear position it names"""
+    position_match = DEFECT_POSITION_PATTERN.search(text)
+    position = position_match.group(1).lower() if position_match else None
+    
+    groups = []
+    for match in defect_index["pattern"].finditer(text):
+        excludes = defect_index["rules"][match.lastgroup]["excludes"]
+        if match.lastgroup not in groups and not (excludes and excludes.search(text)):
+            groups.append(match.lastgroup)
+    
+    return tuple(groups), position
+
+def estimate_defect(text: str, operations: Dict[str, Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Labour operations of one vehicle that fix a defect - the first candidate it has, per rule hit"""
+    groups, position = match_defect_text(text)
+    
+    estimates = []
+    for group in groups:
+        rule = defect_index["rules"][group]
+        for op_id in rule["candidates"][position]:
+            if op_id in operations:
+                estimates.append({**operations[op_id], "rule": rule["rule"]})
+                break
+    
+    return estimates
+
+async def resolve_bulletin_vehicle(make: str, model: str, year: Optional[int], vehicle_data_dict: Dict[str, Any]) -> Tuple[Optional[Dict[str, Any]], bool]:
+    """
+    Ask the bulletins API which bulletin vehicle_id this vehicle maps to.
+    Returns (bulletin match or None, ok) where ok is False if the bulletins API could not be reached,
+    so the caller knows not to persist an incomplete identity.
+    """
+    if not Config.BULLETINS_API_URL:
+        return None, True
+    
+    payload = {"make": make, "model": model}
+    if year:
+        payload["year"] = year
+    if vehicle_data_dict.get("fuelType"):
+        payload["fuelType"] = vehicle_data_dict["fuelType"]
+    engine_capacity = vehicle_data_dict.get("engineCapacity") or vehicle_data_dict.get("engineSize")
+    try:
+        if engine_capacity:
+            payload["engineCapacity"] = int(engine_capacity)
+    except (TypeError, ValueError):
+        pass
+    
+    try:
+        async with httpx.AsyncClient(timeout=Config.UPSTREAM_TIMEOUT) as client:
+            resp = await client.post(f"{Config.BULLETINS_API_URL}/api/v1/bulletins/resolve", json=payload)
+        if resp.status_code == 404:
+            return None, True
+        resp.raise_for_status()
+        data = resp.json()
+        return {
+            "vehicleId": data["vehicle_id"],
+            "method": data.get("match_confidence", "fuzzy"),
+            "confidence": round(data.get("score", 0.0), 3)
+        }, True
+    except Exception as e:
+        logger.warning(f"Bulletin resolution failed for {make} {model}: {str(e)}")
+        return None, False
+
+def identity_matches_request(identity: Dict[str, Any], make: str, model: str) -> bool:
+    """A stored identity is only reused for the same make/model (plates can move between vehicles)"""
+    return (
+        identity.get("make", "").lower().strip() == make.lower().strip() and
+        identity.get("model", "").lower().strip() == model.lower().strip()
+    )
+
+def get_stored_identity(vehicle_data_dict: Dict[str, Any], make: str, model: str) -> Optional[Dict[str, Any]]:
+    """Return the persisted identity for the registration in a vehicleData payload, if any"""
+    registration = normalize_registration(
+        vehicle_data_dict.get("registration") or vehicle_data_dict.get("registrationNumber")
+    )
+    if not registration:
+        return None
+    identity = identity_store.get(registration)
+    if identity and identity_matches_request(identity, make, model):
+        return identity
+    return None
+
+async def resolve_vehicle_identity(vehicle_data_dict: Dict[str, Any]) -> Tuple[Dict[str, Any], bool]:
+    """
+    Resolve DVLA/MOT vehicle data to the repair times key, tech specs key and bulletin vehicle_id.
+    The result is persisted per VRN; returns (identity, cached).
+    """
+    make = vehicle_data_dict.get("make", "")
+    model = vehicle_data_dict.get("model", "") or vehicle_data_dict.get("vehicleModel", "")
+    
+    if not make or not model:
+        raise HTTPException(status_code=400, detail="Vehicle make and model required")
+    
+    make, model = clean_make_model(make, model)
+    
+    stored = get_stored_identity(vehicle_data_dict, make, model)
+    if stored:
+        logger.info(f"Identity store hit for {stored['registration']}")
+        return stored, True
+    
+    registration = normalize_registration(
+        vehicle_data_dict.get("registration") or vehicle_data_dict.get("registrationNumber")
+    )
+    year = extract_request_year(vehicle_data_dict)
+    fuel_type = normalize_fuel_type(vehicle_data_dict.get("fuelType"))
+    engine_code, bucket = extract_request_engine(vehicle_data_dict)
+    
+    logger.info(f"Resolving identity for {registration or 'unregistered'}: {make} {model} (year: {year}, fuel: {fuel_type}, engine: {engine_code}/{bucket})")
+    
+    bulletins, bulletins_ok = await resolve_bulletin_vehicle(make, model, year, vehicle_data_dict)
+    matches = await catalog_call("resolve", make, model=model, year=year, fuel_type=fuel_type,
+                                 engine_code=engine_code, capacity_bucket=bucket) or {}
+    identity = {
+        "registration": registration,
+        "make": make,
+        "model": model,
+        "year": year,
+        "fuelType": fuel_type,
+        "repairTimes": matches.get("repairTimes"),
+        "techSpecs": matches.get("techSpecs"),
+        "bulletins": bulletins,
+        "resolvedAt": datetime.now().isoformat()
+    }
+    
+    if registration and bulletins_ok:
+        identity_store.set(registration, identity)
+    
+    return identity, False
+
+# Catalog operations - run in-process, or inside a catalog shard when sharding is enabled
+def catalog_repair_times(make: str, model: str, year: Optional[int] = None,
+                         record: Optional[Dict[str, Any]] = None, engine_code: Optional[str] = None,
+                         capacity_bucket: Optional[int] = None, percentiles: bool = False,
+                         operations: bool = False) -> Optional[Dict[str, Any]]:
+    """Repair times document for a vehicle, or for an already resolved match record"""
+    if record is None:
+        record = match_vehicle("repair_times", make, model, year, None, engine_code, capacity_bucket)
+    elif record["key"] not in vehicle_data:
+        return None
+    
+    if not record:
+        return None
+    result = {
+        "record": record,
+        "document": build_repair_times_response(make, model, record),
+        "yearRange": document_year_range(vehicle_data[record["key"]])
+    }
+    if percentiles:
+        result["operationPercentiles"] = operation_percentiles(vehicle_data[record["key"]])
+    if operations:
+        result["operationHours"] = operation_hours(vehicle_data[record["key"]])
+    return result
+
+def catalog_tech_specs(make: str, model: str, year: Optional[int] = None, fuel_type: Optional[str] = None,
+                       record: Optional[Dict[str, Any]] = None, engine_code: Optional[str] = None,
+                       capacity_bucket: Optional[int] = None) -> Optional[Dict[str, Any]]:
+    """Technical specifications document for a vehicle, or for an already resolved match record"""
+    if record is None:
+        record = match_vehicle("tech_specs", make, model, year, fuel_type, engine_code, capacity_bucket)
+    elif record["key"] not in tech_specs_data:
+        return None
+    
+    if not record:
+        return None
+    return {
+        "record": record,
+        "document": build_tech_specs_response(make, model, record),
+        "yearRange": document_year_range(tech_specs_data[record["key"]])
+    }
+
+def catalog_combined(make: str, model: str, year: Optional[int] = None, fuel_type: Optional[str] = None,
+                     engine_code: Optional[str] = None, capacity_bucket: Optional[int] = None) -> Optional[Dict[str, Any]]:
+    """
+    Resolve the catalog identity once - repair times first, tech specs only if that fails -
+    and return the match together with the prebuilt profile body. The profile's tech specs were
+    matched to the repair times document's start year, without a fuel type; when they don't
+    suit the requested year and fuel type, tech specs are matched to the request instead.
+    """
+    profile = None
+    match = {}
+    record = match_vehicle("repair_times", make, model, year, None, engine_code, capacity_bucket)
+    if record:
+        profile = vehicle_profiles.get(("repair_times", catalog_identity(vehicle_data[record["key"]])))
+        match["repairTimes"] = record
+        if profile and profile["techSpecsMatch"] and tech_specs_fits(profile["techSpecsMatch"], year, fuel_type):
+            match["techSpecs"] = profile["techSpecsMatch"]
+        elif profile and tech_specs_data:
+            tech_specs_match = match_vehicle("tech_specs", make, model, year, fuel_type, engine_code, capacity_bucket)
+            if tech_specs_match:
+                match["techSpecs"] = tech_specs_match
+            profile = rejoined_profile(profile, tech_specs_match)
+    elif tech_specs_data:
+        record = match_vehicle("tech_specs", make, model, year, fuel_type, engine_code, capacity_bucket)
+        if record:
+            profile = vehicle_profiles.get(("tech_specs", catalog_identity(tech_specs_data[record["key"]])))
+            match["techSpecs"] = record
+            if profile and profile["repairTimesKey"]:
+                match["repairTimes"] = _match_record(profile["repairTimesKey"], "joined", record["confidence"])
+    
+    if not profile:
+        return None
+    return {"match": match, "body": profile["body"]}
+
+def catalog_resolve(make: str, model: str, year: Optional[int] = None, fuel_type: Optional[str] = None,
+                    engine_code: Optional[str] = None, capacity_bucket: Optional[int] = None) -> Optional[Dict[str, Any]]:
+    """Repair times and tech specs match records for the identity resolver"""
+    result = {
+        "repairTimes": match_vehicle("repair_times", make, model, year, None, engine_code, capacity_bucket),
+        "techSpecs": match_vehicle("tech_specs", make, model, year, fuel_type, engine_code, capacity_bucket)
+    }
+    return result if result["repairTimes"] or result["techSpecs"] else None
+
+def catalog_defect_estimates(make: str, model: str, year: Optional[int] = None, texts: Optional[List[str]] = None,
+                             record: Optional[Dict[str, Any]] = None, engine_code: Optional[str] = None,
+                             capacity_bucket: Optional[int] = None) -> Optional[Dict[str, Any]]:
+    """Labour operations per MOT defect text for a vehicle, or for an already resolved match record"""
+    if record is None:
+        record = match_vehicle("repair_times", make, model, year, None, engine_code, capacity_bucket)
+    elif record["key"] not in vehicle_data:
+        return None
+    
+    if not record:
+        return None
+    
+    data = vehicle_data[record["key"]]
+    operations = vehicle_operations.get(catalog_identity(data), {})
+    return {
+        "record": record,
+        "vehicle": {field: data["vehicleIdentification"].get(field, "") for field in ("make", "model", "modelType")},
+        "estimates": {text: estimate_defect(text, operations) for text in texts or []}
+    }
+
+def catalog_vehicles(data_type: Optional[str] = None) -> List[Dict[str, Any]]:
+    """List the indexed vehicles, optionally filtered by data type"""
+    vehicles = []
+    for key, vehicle in vehicle_index.items():
+        # Filter by data type if specified
+        if data_type and data_type not in vehicle["dataTypes"]:
+            continue
+            
+        # Include year range information if available
+        year_info = {}
+        if vehicle.get("startYear"):
+            year_info = {
+                "startYear": vehicle["startYear"],
+                "endYear": vehicle["endYear"] or "present"
+            }
+            
+        # Include vehicle information
+        entry = {
+            "make": vehicle["make"],
+            "model": vehicle["model"],
+            "modelType": vehicle["modelType"],
+            "key": key,
+            "dataTypes": vehicle["dataTypes"]
+        }
+        
+        # Add fuel type if available
+        if "fuelType" in vehicle:
+            entry["fuelType"] = vehicle["fuelType"]
+            
+        # Add year range if available
+        if year_info:
+            entry["yearRange"] = year_info
+            
+        vehicles.append(entry)
+    
+    return vehicles
+
+def get_process_rss() -> int:
+    """Resident set size of this process in bytes (Linux only, 0 elsewhere)"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return 0
+
+def catalog_counts() -> Dict[str, int]:
+    """Document counts of the catalog held by this process"""
+    return {
+        "availableVehicles": len(vehicle_data),
+        "availableTechSpecs": len(tech_specs_data),
+        "indexedVehicles": len(vehicle_index),
+        "profiles": len(vehicle_profiles)
+    }
+
+def catalog_stats() -> Dict[str, Any]:
+    """Document counts and memory of the catalog held by this process"""
+    return {**catalog_counts(), "rssBytes": get_process_rss()}
+
+CATALOG_OPS = {
+    "repair_times": catalog_repair_times,
+    "tech_specs": catalog_tech_specs,
+    "combined": catalog_combined,
+    "resolve": catalog_resolve,
+    "defect_estimates": catalog_defect_estimates,
+    "operation_histograms": collect_operation_histograms,
+    "operation_stats": build_operation_stats,
+    "vehicles": catalog_vehicles,
+    "stats": catalog_stats
+}
+
+# Make-sharded catalog serving
+def canonical_make(make: str) -> str:
+    """Canonical form of a make used for shard ownership (Land-Rover, land rover -> land rover)"""
+    return re.sub(r'[\s\-_]+', ' ', (make or "").lower()).strip()
+
+def shard_for_make(make: str, shard_count: int) -> int:
+    """Owning shard of a make - stable across processes, unlike hash()"""
+    return zlib.crc32(canonical_make(make).encode("utf-8")) % shard_count
+
+def build_shard_manifest(shard_count: int) -> List[Dict[str, set]]:
+    """Assign every catalog file to the shard owning its make. Files are parsed once here and not kept."""
+    manifest = [{"repair_times": set(), "tech_specs": set()} for _ in range(shard_count)]
+    
+    for data_type, directory in (("repair_times", Config.VEHICLES_DATA_DIR), ("tech_specs", Config.TECH_SPECS_DIR)):
+        if not os.path.isdir(directory):
+            continue
+        for json_file in os.listdir(directory):
+            if not json_file.endswith('.json'):
+                continue
+            try:
+                with open(os.path.join(directory, json_file), 'r') as f:
+                    make = json.load(f).get("vehicleIdentification", {}).get("make", "")
+            except Exception as e:
+                logger.error(f"Error reading {json_file} for shard assignment: {str(e)}")
+                continue
+            manifest[shard_for_make(make, shard_count)][data_type].add(json_file)
+    
+    return manifest
+
+def result_confidence(result: Dict[str, Any]) -> float:
+    """Best match confidence in a catalog operation result, used to pick between shards"""
+    records = [result.get("record"), result.get("repairTimes"), result.get("techSpecs")]
+    records.extend(result.get("match", {}).values())
+    return max((r["confidence"] for r in records if r), default=0.0)
+
+async def read_frame(reader: asyncio.StreamReader) -> Any:
+    """Read one length-prefixed message from a shard socket"""
+    size = int.from_bytes(await reader.readexactly(4), "big")
+    return pickle.loads(await reader.readexactly(size))
+
+def write_frame(writer: asyncio.StreamWriter, message: Any):
+    """Write one length-prefixed message to a shard socket"""
+    data = pickle.dumps(message, protocol=pickle.HIGHEST_PROTOCOL)
+    writer.write(len(data).to_bytes(4, "big") + data)
+
+async def serve_catalog_shard(socket_path: str):
+    """Answer catalog operations from the router over a Unix socket"""
+    async def handle_connection(reader, writer):
+        try:
+            while True:
+                op, kwargs = await read_frame(reader)
+                try:
+                    write_frame(writer, {"ok": True, "result": CATALOG_OPS[op](**kwargs)})
+                except Exception as e:
+                    logger.error(f"Shard operation {op} failed: {str(e)}")
+                    write_frame(writer, {"ok": False, "error": str(e)})
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+    
+    server = await asyncio.start_unix_server(handle_connection, path=socket_path)
+    async with server:
+        await server.serve_forever()
+
+def run_catalog_shard(shard_id: int, shard_count: int, socket_path: str,
+                      repair_times_files: set, tech_specs_files: set):
+    """Entry point of a catalog shard process: load the owned makes only, then serve"""
+    global vehicle_data, tech_specs_data, vehicle_index, catalog_version
+    
+    # Shards run in parallel already (and as daemon processes cannot start an ingest pool)
+    vehicle_data, tech_specs_data = load_all_vehicle_data(repair_times_files, tech_specs_files, workers=1)
+    catalog_version = compute_catalog_version()
+    vehicle_index = build_vehicle_index()
+    build_engine_index()
+    build_vehicle_profiles()
+    build_operation_index()
+    build_operation_stats(collect_operation_histograms())
+    
+    logger.info(
+        f"Catalog shard {shard_id}/{shard_count} ready with {len(repair_times_files)} repair time "
+        f"and {len(tech_specs_files)} technical specification files"
+    )
+    asyncio.run(serve_catalog_shard(socket_path))
+
+class CatalogShardRouter:
+    """
+    Dispatches catalog operations to make-sharded worker processes over Unix sockets.
+    A lookup goes to the shard owning the canonical make; if that shard has no match
+    (unknown or misspelt make) it fans out to the other shards and keeps the best match.
+    """
+    def __init__(self, shard_count: int):
+        self.shard_count = shard_count
+        self.socket_dir = tempfile.mkdtemp(prefix="auto_data_shards_")
+        self.processes = []
+        self.connections = [[] for _ in range(shard_count)]  # Idle connections per shard
+        self.counts = {}
+    
+    def socket_path(self, shard_id: int) -> str:
+        return os.path.join(self.socket_dir, f"shard_{shard_id}.sock")
+    
+    def start(self):
+        """Assign files to shards and spawn one process per shard"""
+        manifest = build_shard_manifest(self.shard_count)
+        context = multiprocessing.get_context("spawn")
+        
+        for shard_id, files in enumerate(manifest):
+            process = context.Process(
+                target=run_catalog_shard,
+                args=(shard_id, self.shard_count, self.socket_path(shard_id),
+                      files["repair_times"], files["tech_specs"]),
+                name=f"catalog-shard-{shard_id}",
+                daemon=True
+            )
+            process.start()
+            self.processes.append(process)
+        
+        logger.info(f"Started {self.shard_count} catalog shards (sockets in {self.socket_dir})")
+    
+    async def wait_ready(self):
+        """Wait until every shard answers, then record the combined document counts"""
+        deadline = time.monotonic() + Config.SHARD_STARTUP_TIMEOUT
+        stats = []
+        
+        for shard_id in range(self.shard_count):
+            while True:
+                try:
+                    stats.append(await self.request(shard_id, "stats", {}))
+                    break
+                except HTTPException:
+                    if not self.processes[shard_id].is_alive() or time.monotonic() > deadline:
+                        raise RuntimeError(f"Catalog shard {shard_id} failed to start")
+                    await asyncio.sleep(0.2)
+        
+        self.counts = {key: sum(s[key] for s in stats) for key in stats[0]}
+        logger.info(f"Catalog shards ready: {self.counts}")
+    
+    async def request(self, shard_id: int, op: str, kwargs: Dict[str, Any]) -> Any:
+        """
+        Send one operation to a shard, reusing an idle connection when there is one. A connection
+        goes back to the pool only after a clean read; any other is closed, so a late response can
+        never be read as the answer to the next request.
+        """
+        writer = None
+        response = None
+        try:
+            if self.connections[shard_id]:
+                reader, writer = self.connections[shard_id].pop()
+            else:
+                reader, writer = await asyncio.open_unix_connection(self.socket_path(shard_id))
+            
+            write_frame(writer, (op, kwargs))
+            await writer.drain()
+            response = await asyncio.wait_for(read_frame(reader), Config.SHARD_REQUEST_TIMEOUT)
+        except (OSError, asyncio.IncompleteReadError, asyncio.TimeoutError) as e:
+            logger.error(f"Catalog shard {shard_id} request {op} failed: {str(e)}")
+            raise HTTPException(status_code=503, detail="Catalog shard unavailable")
+        finally:
+            if response is not None:
+                self.connections[shard_id].append((reader, writer))
+            elif writer is not None:
+                writer.close()
+        
+        if not response["ok"]:
+            raise HTTPException(status_code=500, detail=f"Catalog shard error: {response['error']}")
+        return response["result"]
+    
+    async def fan_out(self, op: str, kwargs: Dict[str, Any], shard_ids: Optional[List[int]] = None) -> List[Any]:
+        """Run an operation on several shards (all by default) concurrently"""
+        shard_ids = range(self.shard_count) if shard_ids is None else shard_ids
+        return await asyncio.gather(*(self.request(shard_id, op, kwargs) for shard_id in shard_ids))
+    
+    async def call(self, op: str, make: str, **kwargs) -> Any:
+        """Run a lookup on the shard owning the make, falling back to all other shards"""
+        kwargs["make"] = make
+        owner = shard_for_make(make, self.shard_count)
+        result = await self.request(owner, op, kwargs)
+        if result or self.shard_count == 1:
+            return result
+        
+        # Fuzzy make fallback - the make may be misspelt or belong to another shard
+        results = [r for r in await self.fan_out(op, kwargs, [s for s in range(self.shard_count) if s != owner]) if r]
+        return max(results, key=result_confidence) if results else None
+    
+    def stop(self):
+        """Terminate the shard processes and remove their sockets"""
+        for process in self.processes:
+            process.terminate()
+        for process in self.processes:
+            process.join(timeout=5)
+        shutil.rmtree(self.socket_dir, ignore_errors=True)
+        logger.info("Catalog shards stopped")
+
+shard_router: Optional[CatalogShardRouter] = None  # Set at startup when CATALOG_SHARDS > 0
+
+async def catalog_call(op: str, make: str, **kwargs) -> Any:
+    """Run a catalog lookup in-process or on the owning shard"""
+    if shard_router:
+        return await shard_router.call(op, make, **kwargs)
+    return CATALOG_OPS[op](make=make, **kwargs)
+
+async def catalog_gather(op: str, **kwargs) -> List[Any]:
+    """Run a catalog operation on the whole catalog - one result per shard"""
+    if shard_router:
+        return await shard_router.fan_out(op, kwargs)
+    return [CATALOG_OPS[op](**kwargs)]
+
+def catalog_loaded(data_type: Optional[str] = None) -> bool:
+    """Whether the catalog (or one data type of it) is loaded, locally or across the shards"""
+    if catalog_status["state"] != "ready":
+        return False
+    
+    counts = shard_router.counts if shard_router else catalog_counts()
+    if not counts.get("indexedVehicles"):
+        return False
+    if data_type == "repair_times":
+        return counts["availableVehicles"] > 0
+    if data_type == "tech_specs":
+        return counts["availableTechSpecs"] > 0
+    if data_type == "combined":
+        return counts["profiles"] > 0
+    return True
+
+def require_catalog(detail: str, data_type: Optional[str] = None):
+    """
+    Fail a lookup the catalog can't answer - 503 with Retry-After until the catalog is loaded,
+    then 500 with detail if it has no data of data_type
+    """
+    if catalog_status["state"] != "ready":
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Catalog is loading" if catalog_status["state"] == "loading" else "Catalog failed to load",
+            headers={"Retry-After": str(Config.CATALOG_RETRY_AFTER)}
+        )
+    if not catalog_loaded(data_type):
+        raise HTTPException(status_code=500, detail=detail)
+
+# Response caching on canonical queries
+def canonical_query(make: str, model: str) -> Tuple[str, str]:
+    """Canonical make and model for cache keys - CR-V, Cr-V, CR V and crv are the same vehicle"""
+    make, model = clean_make_model(make, model)
+    return canonical_make(make), re.sub(r'[^a-z0-9]', '', model.lower())
+
+def engine_cache_tag(engine_code: Optional[str], capacity_bucket: Optional[int]) -> str:
+    """Engine part of a cache key - empty when the request named no engine"""
+    if not engine_code and not capacity_bucket:
+        return ""
+    return f"{engine_code or '-'}/{capacity_bucket or '-'}"
+
+def response_cache_key(data_type: str, make: str, model: str, year: Optional[int] = None,
+                       fuel_type: Optional[str] = None, engine: str = "") -> str:
+    """
+    Cache key for a lookup. The year is bucketed to the year range an earlier request for the
+    same vehicle matched, so every year inside that range shares one entry.
+    """
+    canonical = canonical_query(make, model)
+    bucket = "any"
+    if year:
+        bucket = str(year)
+        for start_year, end_year in year_ranges.get((data_type,) + canonical + (engine,), ()):
+            if year_in_range(year, start_year, end_year):
+                bucket = f"{start_year}-{end_year or 'present'}"
+                break
+    
+    key = f"{data_type}|{canonical[0]}|{canonical[1]}|{bucket}"
+    if data_type == "tech_specs":
+        key += f"|{fuel_type or 'any'}"
+    if engine:
+        key += f"|{engine}"
+    return key
+
+def cache_lookup(endpoint: str, cache: TTLCache, key: str, make: str, model: str) -> Optional[Dict[str, Any]]:
+    """Return the cached lookup result for a key, counting the hit or miss against the endpoint"""
+    result = cache.get(key)
+    if result is None:
+        cache_stats[endpoint]["misses"] += 1
+        return None
+    
+    cache_stats[endpoint]["hits"] += 1
+    document = result["document"]
+    
+    # Fuzzy responses echo the requested make and model, which may be spelt differently this time
+    if result["record"]["method"] == "fuzzy":
+        document = {
+            **document,
+            "vehicleIdentification": {**document["vehicleIdentification"], "make": make, "model": model}
+        }
+        return {**result, "document": document}
+    return result
+
+def cache_store(cache: TTLCache, data_type: str, make: str, model: str, year: Optional[int],
+                fuel_type: Optional[str], result: Dict[str, Any], engine: str = ""):
+    """Cache a catalog lookup result, remembering the matched year range for bucketing"""
+    start_year, end_year = result["yearRange"]
+    if year and year_in_range(year, start_year, end_year):
+        range_key = (data_type,) + canonical_query(make, model) + (engine,)
+        ranges = year_ranges.get(range_key, [])
+        if (start_year, end_year) not in ranges:
+            year_ranges[range_key] = ranges + [(start_year, end_year)]
+    
+    cache[response_cache_key(data_type, make, model, year, fuel_type, engine)] = result
+
+# API routes
+@app.get("/health", response_model=HealthResponse)
+async def health_check():
+    """Health check endpoint for monitoring"""
+    stats = await catalog_gather("stats")
+    return {
+        "status": "ok",
+        "timestamp": datetime.now().isoformat(),
+        "version": "1.2.0",
+        "cacheSize": len(vehicle_cache) + len(tech_specs_cache),
+        "availableVehicles": sum(s["availableVehicles"] for s in stats),
+        "availableTechSpecs": sum(s["availableTechSpecs"] for s in stats),
+        "resolvedIdentities": len(identity_store.entries),
+        "catalogShards": Config.CATALOG_SHARDS,
+        "shardMemoryBytes": [s["rssBytes"] for s in stats] if shard_router else []
+    }
+
+@app.get("/ready")
+async def readiness_check():
+    """
+    Readiness probe for the load balancer - 503 until the catalog is loaded.
+    /health stays a liveness check and answers while loading.
+    """
+    ready = catalog_status["state"] == "ready"
+    return JSONResponse(
+        status_code=status.HTTP_200_OK if ready else status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={
+            "status": catalog_status["state"],
+            "timestamp": datetime.now().isoformat(),
+            "loadSeconds": catalog_status["loadSeconds"],
+            "catalogShards": Config.CATALOG_SHARDS
+        }
+    )
+
+@app.get("/api/v1/vehicles")
+async def get_vehicles(data_type: Optional[str] = None):
+    """
+    Get list of all available vehicles
+    
+    Args:
+        data_type: Optional filter by data type ('repair_times', 'tech_specs')
+    """
+    require_catalog("Vehicle index not built")
+    
+    vehicles = []
+    for shard_vehicles in await catalog_gather("vehicles", data_type=data_type):
+        vehicles.extend(shard_vehicles)
+    
+    return {"vehicles": vehicles, "count": len(vehicles)}
+
+async def find_repair_times(make: str, model: str, year: Optional[int] = None, engine_code: Optional[str] = None,
+                            capacity_bucket: Optional[int] = None, percentiles: bool = False,
+                            operations: bool = False) -> Dict[str, Any]:
+    """Match repair times for a cleaned make/model, raising 404 if nothing matched"""
+    # Log the lookup request for debugging
+    logger.info(f"Looking up repair times for: {make} {model} (year: {year}, engine: {engine_code}/{capacity_bucket})")
+    
+    result = await catalog_call("repair_times", make, model=model, year=year, engine_code=engine_code,
+                                capacity_bucket=capacity_bucket, percentiles=percentiles, operations=operations)
+    if result:
+        return result
+    
+    # No match found
+    logger.warning(f"No repair time match found for {make} {model} (year: {year})")
+    
+    # For debugging - log available keys that might be relevant
+    similar_keys = [k for k in vehicle_data.keys() if make.lower() in k and len(k) < 40]
+    if similar_keys:
+        logger.info(f"Similar repair time keys available: {similar_keys}")
+    
+    raise HTTPException(
+        status_code=404, 
+        detail=f"No repair time data found for {make} {model}" + 
+              (f" (year: {year})" if year else "")
+    )
+
+async def repair_times_document(result: Dict[str, Any], make: str, model: str, percentiles: bool) -> Dict[str, Any]:
+    """Response document of a repair times result, with the operation percentiles when asked for"""
+    if not percentiles:
+        return result["document"]
+    
+    if "operationPercentiles" not in result:
+        # Cached by a request without percentiles - annotate the matched record
+        annotated = await catalog_call("repair_times", make, model=model, record=result["record"], percentiles=True)
+        result["operationPercentiles"] = annotated["operationPercentiles"] if annotated else {}
+    return {**result["document"], "operationPercentiles": result["operationPercentiles"]}
+
+async def find_tech_specs(make: str, model: str, year: Optional[int] = None, fuel_type: Optional[str] = None,
+                          engine_code: Optional[str] = None, capacity_bucket: Optional[int] = None) -> Dict[str, Any]:
+    """Match technical specifications for a cleaned make/model, raising 404 if nothing matched"""
+    # Log request
+    logger.info(f"Looking up tech specs for: {make} {model} (year: {year}, fuel: {fuel_type}, engine: {engine_code}/{capacity_bucket})")
+    
+    result = await catalog_call("tech_specs", make, model=model, year=year, fuel_type=fuel_type,
+                                engine_code=engine_code, capacity_bucket=capacity_bucket)
+    if result:
+        return result
+        
+    # No match found
+    logger.warning(f"No tech specs match found for {make} {model} (year: {year}, fuel: {fuel_type})")
+    
+    # For debugging
+    similar_keys = [k for k in tech_specs_data.keys() 
+                   if make.lower() in k and len(k) < 30]
+    if similar_keys:
+        logger.info(f"Similar tech spec keys available: {similar_keys}")
+    
+    raise HTTPException(
+        status_code=404, 
+        detail=f"No technical specifications found for {make} {model}" + 
+              (f" (year: {year})" if year else "") +
+              (f" (fuel type: {fuel_type})" if fuel_type else "")
+    )
+
+@app.get("/api/v1/vehicles/{make}/{model}")
+async def get_vehicle_repair_times(
+    make: str, 
+    model: str, 
+    response: Response,
+    year: Optional[int] = None,
+    engine_code: Optional[str] = None,
+    engine_capacity: Optional[str] = None,
+    percentiles: bool = False,
+):
+    """
+    Get repair times for a specific vehicle by make and model.
+    Optional year, engine code and engine capacity (cc or litres) parameters for more precise matching.
+    percentiles=true adds where each labour time sits among the fleet, the make and the capacity band.
+    """
+    require_catalog("Vehicle data not loaded", "repair_times")
+    
+    make, model = clean_make_model(make, model)
+    engine_code, bucket = extract_request_engine({"engineCode": engine_code, "engineCapacity": engine_capacity})
+    engine = engine_cache_tag(engine_code, bucket)
+        
+    # Set cache headers
+    response.headers["Cache-Control"] = f"max-age={Config.CACHE_TTL}"
+    response.headers["X-Data-Type"] = "repair_times"
+    
+    cache_key = response_cache_key("repair_times", make, model, year, None, engine)
+    cached = cache_lookup("vehicles", vehicle_cache, cache_key, make, model)
+    if cached:
+        response.headers["X-Cache"] = "HIT"
+        return await repair_times_document(cached, make, model, percentiles)
+    
+    response.headers["X-Cache"] = "MISS"
+    result = await find_repair_times(make, model, year, engine_code, bucket, percentiles)
+    cache_store(vehicle_cache, "repair_times", make, model, year, None, result, engine)
+    return await repair_times_document(result, make, model, percentiles)
+
+@app.get("/api/v1/tech-specs/{make}/{model}")
+async def get_vehicle_tech_specs(
+    make: str, 
+    model: str, 
+    response: Response,
+    year: Optional[int] = None,
+    fuel_type: Optional[str] = None,
+    engine_code: Optional[str] = None,
+    engine_capacity: Optional[str] = None,
+):
+    """
+    Get technical specifications with general model matching logic.
+    """
+    require_catalog("Technical specifications data not loaded", "tech_specs")
+    
+    make, model = clean_make_model(make, model)
+    fuel_type = normalize_fuel_type(fuel_type)
+    engine_code, bucket = extract_request_engine({"engineCode": engine_code, "engineCapacity": engine_capacity})
+    engine = engine_cache_tag(engine_code, bucket)
+        
+    # Set headers
+    response.headers["Cache-Control"] = f"max-age={Config.CACHE_TTL}"
+    response.headers["X-Data-Type"] = "tech_specs"
+    
+    cache_key = response_cache_key("tech_specs", make, model, year, fuel_type, engine)
+    cached = cache_lookup("tech-specs", tech_specs_cache, cache_key, make, model)
+    if cached:
+        response.headers["X-Cache"] = "HIT"
+        return cached["document"]
+    
+    response.headers["X-Cache"] = "MISS"
+    result = await find_tech_specs(make, model, year, fuel_type, engine_code, bucket)
+    cache_store(tech_specs_cache, "tech_specs", make, model, year, fuel_type, result, engine)
+    return result["document"]
+
+@app.get("/api/v1/vehicle-data/{make}/{model}")
+async def get_combined_vehicle_data(
+    make: str, 
+    model: str, 
+    year: Optional[int] = None,
+    fuel_type: Optional[str] = None,
+    engine_code: Optional[str] = None,
+    engine_capacity: Optional[str] = None,
+):
+    """
+    Get combined data (both repair times and technical specifications) for a specific vehicle.
+    The vehicle is resolved once and the prebuilt profile for that catalog identity is streamed.
+    """
+    require_catalog("Vehicle index not built", "combined")
+    
+    make, model = clean_make_model(make, model)
+    engine_code, bucket = extract_request_engine({"engineCode": engine_code, "engineCapacity": engine_capacity})
+    vehicle_identification = {
+        "make": make,
+        "model": model
+    }
+    
+    # Add fuel type if provided
+    if fuel_type:
+        vehicle_identification["fuelType"] = fuel_type
+    
+    # Add year if provided
+    if year:
+        vehicle_identification["year"] = year
+    
+    # Resolve the catalog identity once and pick up the prebuilt profile for it
+    result = await catalog_call("combined", make, model=model, year=year, fuel_type=fuel_type,
+                                engine_code=engine_code, capacity_bucket=bucket)
+    
+    # Return 404 if neither data type was found
+    if not result:
+        raise HTTPException(
+            status_code=404,
+            detail=f"No data found for {make} {model}" + 
+                  (f" (year: {year})" if year else "") +
+                  (f" (fuel type: {fuel_type})" if fuel_type else "")
+        )
+    
+    vehicle_identification["match"] = result["match"]
+    head = b'{"vehicleIdentification":' + serialize_json(vehicle_identification) + b','
+    
+    async def stream_profile():
+        yield head
+        yield result["body"]
+    
+    return StreamingResponse(
+        stream_profile(),
+        media_type="application/json",
+        headers={
+            "Cache-Control": f"max-age={Config.CACHE_TTL}",
+            "X-Data-Type": "combined"
+        }
+    )
+
+@app.post("/api/v1/repair-times-lookup")
+async def lookup_repair_times(request: VehicleDataRequest, response: Response, percentiles: bool = False):
+    """
+    Match repair times data based on vehicle data from another source
+    """
+    require_catalog("Vehicle data not loaded", "repair_times")
+    
+    vehicle_data_dict = request.vehicleData
+    
+    # Extract basic info from vehicle data
+    make = vehicle_data_dict.get("make", "")
+    model = vehicle_data_dict.get("model", "") or vehicle_data_dict.get("vehicleModel", "")
+    
+    # Get year either from direct year property or by extracting from date fields
+    year = extract_request_year(vehicle_data_dict)
+    
+    if not make or not model:
+        raise HTTPException(status_code=400, detail="Vehicle make and model required")
+    
+    make, model = clean_make_model(make, model)
+    engine_code, bucket = extract_request_engine(vehicle_data_dict)
+    engine = engine_cache_tag(engine_code, bucket)
+    
+    logger.info(f"Looking up repair times for {make} {model} (year: {year}, engine: {engine or 'any'})")
+    
+    response.headers["Cache-Control"] = f"max-age={Config.CACHE_TTL}"
+    response.headers["X-Data-Type"] = "repair_times"
+    
+    # Same canonical cache as the get_vehicle_repair_times endpoint
+    cache_key = response_cache_key("repair_times", make, model, year, None, engine)
+    cached = cache_lookup("repair-times-lookup", vehicle_cache, cache_key, make, model)
+    if cached:
+        response.headers["X-Cache"] = "HIT"
+        return await repair_times_document(cached, make, model, percentiles)
+    
+    response.headers["X-Cache"] = "MISS"
+    
+    # A registration that was already resolved skips matching entirely
+    identity = get_stored_identity(vehicle_data_dict, make, model)
+    stored = None
+    if identity and identity.get("repairTimes"):
+        stored = await catalog_call("repair_times", make, model=model, record=identity["repairTimes"],
+                                    percentiles=percentiles)
+    
+    if stored:
+        response.headers["X-Identity"] = "HIT"
+        result = stored
+    else:
+        # Reuse the same lookup logic
+        result = await find_repair_times(make, model, year, engine_code, bucket, percentiles)
+    
+    # Cache result
+    cache_store(vehicle_cache, "repair_times", make, model, year, None, result, engine)
+    return await repair_times_document(result, make, model, percentiles)
+
+@app.post("/api/v1/tech-specs-lookup")
+async def lookup_tech_specs(request: TechSpecsRequest, response: Response):
+    """
+    Match technical specifications with fuel type support
+    """
+    require_catalog("Technical specifications data not loaded", "tech_specs")
+    
+    vehicle_data_dict = request.vehicleData
+    
+    # Extract all vehicle information
+    make = vehicle_data_dict.get("make", "")
+    model = vehicle_data_dict.get("model", "") or vehicle_data_dict.get("vehicleModel", "")
+    fuel_type = vehicle_data_dict.get("fuelType")
+    
+    # Normalize fuel type
+    fuel_type = normalize_fuel_type(fuel_type)
+    
+    # Get year from various possible fields
+    year = extract_request_year(vehicle_data_dict)
+    
+    if not make or not model:
+        raise HTTPException(status_code=400, detail="Vehicle make and model required")
+    
+    make, model = clean_make_model(make, model)
+    engine_code, bucket = extract_request_engine(vehicle_data_dict)
+    engine = engine_cache_tag(engine_code, bucket)
+    
+    logger.info(f"Looking up tech specs for {make} {model} (year: {year}, fuel: {fuel_type}, engine: {engine or 'any'})")
+    
+    response.headers["Cache-Control"] = f"max-age={Config.CACHE_TTL}"
+    response.headers["X-Data-Type"] = "tech_specs"
+    
+    # Cache key with the alias-normalized fuel type, shared with get_vehicle_tech_specs
+    cache_key = response_cache_key("tech_specs", make, model, year, fuel_type, engine)
+    cached = cache_lookup("tech-specs-lookup", tech_specs_cache, cache_key, make, model)
+    if cached:
+        response.headers["X-Cache"] = "HIT"
+        return cached["document"]
+    
+    response.headers["X-Cache"] = "MISS"
+    
+    # A registration that was already resolved skips matching entirely
+    identity = get_stored_identity(vehicle_data_dict, make, model)
+    stored = None
+    if identity and identity.get("techSpecs"):
+        stored = await catalog_call("tech_specs", make, model=model, record=identity["techSpecs"])
+    
+    if stored:
+        response.headers["X-Identity"] = "HIT"
+        result = stored
+    else:
+        # Use enhanced lookup with fuel type
+        result = await find_tech_specs(make, model, year, fuel_type, engine_code, bucket)
+    
+    # Cache result
+    cache_store(tech_specs_cache, "tech_specs", make, model, year, fuel_type, result, engine)
+    return result["document"]
+
+@app.post("/api/v1/defect-estimates")
+async def estimate_defects(request: DefectEstimateRequest):
+    """
+    Estimate labour for MOT defects - the defects given, or every defect in vehicleData.motTests.
+    Each distinct defect text is resolved once against the compiled defect rules; an operation
+    fixing several defects counts once towards totalHours.
+    """
+    require_catalog("Vehicle data not loaded", "repair_times")
+    
+    vehicle_data_dict = request.vehicleData
+    make = vehicle_data_dict.get("make", "")
+    model = vehicle_data_dict.get("model", "") or vehicle_data_dict.get("vehicleModel", "")
+    year = extract_request_year(vehicle_data_dict)
+    
+    if not make or not model:
+        raise HTTPException(status_code=400, detail="Vehicle make and model required")
+    
+    make, model = clean_make_model(make, model)
+    
+    defects = request.defects
+    if defects is None:
+        defects = [defect for test in vehicle_data_dict.get("motTests") or [] for defect in test.get("defects") or []]
+    
+    # Distinct defect texts - MOT histories repeat the same advisory year after year.
+    # Tests come newest first, so the first type seen is the latest one.
+    entries = {}
+    for defect in defects:
+        text = normalize_query_text(defect.get("text"), Config.MAX_DEFECT_LENGTH)
+        text = MOT_REFERENCE_PATTERN.sub("", text) if text else None
+        if not text:
+            continue
+        entry = entries.setdefault(text, {"text": text, "type": defect.get("type"), "dangerous": False, "occurrences": 0})
+        entry["occurrences"] += 1
+        entry["dangerous"] = entry["dangerous"] or bool(defect.get("dangerous"))
+    
+    logger.info(f"Estimating {len(entries)} MOT defects for {make} {model} (year: {year})")
+    
+    # A registration that was already resolved skips matching entirely
+    identity = get_stored_identity(vehicle_data_dict, make, model)
+    result = None
+    if identity and identity.get("repairTimes"):
+        result = await catalog_call("defect_estimates", make, model=model, texts=list(entries), record=identity["repairTimes"])
+    if not result:
+        engine_code, bucket = extract_request_engine(vehicle_data_dict)
+        result = await catalog_call("defect_estimates", make, model=model, year=year, texts=list(entries),
+                                    engine_code=engine_code, capacity_bucket=bucket)
+    if not result:
+        raise HTTPException(
+            status_code=404,
+            detail=f"No repair time data found for {make} {model}" + (f" (year: {year})" if year else "")
+        )
+    
+    estimates = []
+    unmatched = []
+    operation_hours = {}
+    for text, entry in entries.items():
+        operations = result["estimates"][text]
+        if not operations:
+            unmatched.append(entry)
+            continue
+        
+        for operation in operations:
+            operation_hours[operation["operationId"]] = operation["hours"] or 0.0
+        estimates.append({
+            **entry,
+            "operations": operations,
+            "hours": round(sum(operation["hours"] or 0.0 for operation in operations), 2)
+        })
+    
+    return {
+        "vehicleIdentification": {"make": make, "model": model, "matchedTo": result["vehicle"]},
+        "match": result["record"],
+        "estimates": estimates,
+        "unmatched": unmatched,
+        "totalHours": round(sum(operation_hours.values()), 2)
+    }
+
+async def compare_vehicle(vehicle_data_dict: Dict[str, Any]) -> Dict[str, Any]:
+    """Repair times result with per-operation hours for one compared vehicle, from the response cache when possible"""
+    make = vehicle_data_dict.get("make", "")
+    model = vehicle_data_dict.get("model", "") or vehicle_data_dict.get("vehicleModel", "")
+    if not make or not model:
+        raise HTTPException(status_code=400, detail="Vehicle make and model required for every compared vehicle")
+    
+    make, model = clean_make_model(make, model)
+    year = extract_request_year(vehicle_data_dict)
+    engine_code, bucket = extract_request_engine(vehicle_data_dict)
+    engine = engine_cache_tag(engine_code, bucket)
+    
+    # Same canonical cache as the repair times endpoints
+    cache_key = response_cache_key("repair_times", make, model, year, None, engine)
+    result = cache_lookup("compare", vehicle_cache, cache_key, make, model)
+    if result is None:
+        identity = get_stored_identity(vehicle_data_dict, make, model)
+        if identity and identity.get("repairTimes"):
+            result = await catalog_call("repair_times", make, model=model, record=identity["repairTimes"], operations=True)
+        if not result:
+            result = await find_repair_times(make, model, year, engine_code, bucket, operations=True)
+        cache_store(vehicle_cache, "repair_times", make, model, year, None, result, engine)
+    elif "operationHours" not in result:
+        # Cached by a repair times request - fetch the operations of the matched record
+        annotated = await catalog_call("repair_times", make, model=model, record=result["record"], operations=True)
+        result["operationHours"] = annotated["operationHours"] if annotated else {}
+    
+    return result
+
+@app.post("/api/v1/compare")
+async def compare_repair_times(request: CompareRequest):
+    """
+    Compare repair times of two or more vehicles (up to COMPARE_MAX_VEHICLES). Operations are
+    aligned on the operation IDs assigned at ingest and returned as a matrix - one row of hours
+    per operation, one column per vehicle, null where the vehicle has no such operation.
+    """
+    require_catalog("Vehicle data not loaded", "repair_times")
+    
+    if not 2 <= len(request.vehicles) <= Config.COMPARE_MAX_VEHICLES:
+        raise HTTPException(status_code=400, detail=f"Between 2 and {Config.COMPARE_MAX_VEHICLES} vehicles required")
+    
+    results = await asyncio.gather(*(compare_vehicle(vehicle) for vehicle in request.vehicles))
+    
+    # One pass over each vehicle's operations; rows keep the order operations are first seen in
+    columns = len(results)
+    rows = {}
+    for column, result in enumerate(results):
+        for op_id, (label, hours) in result["operationHours"].items():
+            row = rows.get(op_id)
+            if row is None:
+                row = rows[op_id] = {"label": label, "hours": [None] * columns, "vehicles": 0}
+            row["hours"][column] = hours
+            row["vehicles"] += 1
+    
+    if request.commonOnly:
+        rows = {op_id: row for op_id, row in rows.items() if row["vehicles"] == columns}
+    
+    logger.info(f"Compared {columns} vehicles across {len(rows)} operations")
+    
+    vehicles = []
+    for vehicle, result in zip(request.vehicles, results):
+        vehicle_id = result["document"]["vehicleIdentification"]
+        matched = vehicle_id.get("matchedTo", vehicle_id)
+        vehicles.append({
+            "make": vehicle.get("make"),
+            "model": vehicle.get("model") or vehicle.get("vehicleModel"),
+            "matchedTo": {field: matched.get(field, "") for field in ("make", "model", "modelType")},
+            "match": result["record"]
+        })
+    
+    return {
+        "vehicles": vehicles,
+        "operationIds": list(rows),
+        "labels": [row["label"] for row in rows.values()],
+        "hours": [row["hours"] for row in rows.values()],
+        "count": len(rows)
+    }
+
+@app.post("/api/v1/identity/resolve")
+async def resolve_identity(request: IdentityRequest):
+    """
+    Resolve a vehicle (DVLA/MOT data, ideally with its registration) to the repair times key,
+    technical specifications key and bulletin vehicle_id, each with a confidence score.
+    Results are persisted per VRN so repeat visits skip matching.
+    """
+    require_catalog("Vehicle index not built")
+    
+    registration = request.vehicleData.get("registration") or request.vehicleData.get("registrationNumber")
+    if registration and not normalize_registration(registration):
+        raise HTTPException(status_code=400, detail="Registration must be 1-8 letters and digits")
+    
+    identity, cached = await resolve_vehicle_identity(request.vehicleData)
+    return {**identity, "cached": cached}
+
+@app.post("/api/v1/identity/clear/{registration}")
+async def clear_identity(registration: str):
+    """Forget the resolved identity for a registration so it is matched again on next use"""
+    registration = normalize_registration(registration)
+    if not registration:
+        raise HTTPException(status_code=400, detail="Registration must be 1-8 letters and digits")
+    identity_store.remove(registration)
+    logger.info(f"Identity cleared for registration {registration}")
+    return {"status": "success", "message": f"Identity cleared for registration {registration}"}
+
+@app.post("/api/v1/cache/clear")
+async def clear_cache():
+    """Clear all data caches"""
+    vehicle_cache.clear()
+    tech_specs_cache.clear()
+    year_ranges.clear()
+    logger.info("All caches cleared manually")
+    return {"status": "success", "message": "All caches cleared successfully"}
+
+@app.get("/api/v1/cache/stats")
+async def get_cache_stats():
+    """Response cache hit/miss counters per endpoint"""
+    endpoints = {}
+    for endpoint, stats in cache_stats.items():
+        total = stats["hits"] + stats["misses"]
+        endpoints[endpoint] = {
+            **stats,
+            "hitRatio": round(stats["hits"] / total, 3) if total else 0.0
+        }
+    
+    return {
+        "endpoints": endpoints,
+        "repairTimesEntries": len(vehicle_cache),
+        "techSpecsEntries": len(tech_specs_cache)
+    }
+
+def load_catalog_versions() -> Dict[str, Dict[str, Any]]:
+    """
+    Catalog versions handed out by the export endpoint - each with its watermark (newest file
+    mtime in ns) and the mtime (ns) of every dataType:key in it - and the catalog key last
+    read from each file, so unchanged files aren't parsed again
+    """
+    global catalog_versions
+    if catalog_versions is None:
+        catalog_versions = {"versions": {}, "files": {}}
+        try:
+            with open(Config.CATALOG_VERSIONS_FILE, "r") as f:
+                catalog_versions = json.load(f)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"Error reading catalog versions file: {str(e)}")
+    return catalog_versions
+
+def catalog_key_set(entries: List[Tuple[str, str, os.DirEntry]]) -> Tuple[Dict[str, int], Dict[str, list]]:
+    """
+    The catalog's dataType:key -> newest file mtime (ns), and each file's [mtime (ns), key] -
+    reading only the files that are new or changed since their key was last read
+    """
+    known_files = load_catalog_versions()["files"]
+    keys, files = {}, {}
+    for data_type, _, entry in entries:
+        name = f"{data_type}/{entry.name}"
+        mtime_ns = entry.stat().st_mtime_ns
+        known = known_files.get(name)
+        if known and known[0] == mtime_ns:
+            key = known[1]
+        else:
+            document = read_catalog_document(data_type, entry.path)
+            key = catalog_identity(document) if document else None
+        
+        files[name] = [mtime_ns, key]
+        if key is not None:
+            full_key = f"{data_type}:{key}"
+            keys[full_key] = max(keys.get(full_key, 0), mtime_ns)
+    return keys, files
+
+def record_catalog_version(version: str, keys: Dict[str, int], files: Dict[str, list]):
+    """Remember a catalog version's key set so it can be passed back as since=, keeping the newest EXPORT_VERSION_HISTORY"""
+    versions = load_catalog_versions()
+    versions["files"] = files
+    if version in versions["versions"]:
+        return
+    
+    versions["versions"][version] = {"watermark": max(keys.values(), default=0), "keys": keys}
+    for old_version in list(versions["versions"])[:-Config.EXPORT_VERSION_HISTORY]:
+        del versions["versions"][old_version]
+    
+    path = pathlib.Path(Config.CATALOG_VERSIONS_FILE)
+    temp_path = path.with_suffix(".tmp")
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(temp_path, "w") as f:
+            json.dump(versions, f)
+        os.replace(temp_path, path)
+    except Exception as e:
+        logger.error(f"Error writing catalog versions file: {str(e)}")
+        temp_path.unlink(missing_ok=True)
+
+def parse_export_since(since: Optional[str]) -> Tuple[Optional[Dict[str, int]], int]:
+    """
+    Turn since= into the key set of an exported catalog version, or for a timestamp (epoch
+    seconds or ISO 8601) into a file mtime in ns - (None, 0) exports everything
+    """
+    if not since:
+        return None, 0
+    
+    version = load_catalog_versions()["versions"].get(since)
+    if version is not None:
+        return version["keys"], 0
+    
+    try:
+        return None, int(float(since) * 1e9)
+    except ValueError:
+        pass
+    
+    try:
+        return None, int(datetime.fromisoformat(since.replace("Z", "+00:00")).timestamp() * 1e9)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="since must be a catalog version from an earlier export or a timestamp")
+
+def read_catalog_document(data_type: str, file_path: str) -> Optional[Dict[str, Any]]:
+    """Read one catalog file as it is served (tech specs gain their detected fuel type)"""
+    try:
+        with open(file_path, "r") as f:
+            document = json.load(f)
+    except Exception as e:
+        logger.warning(f"Skipping {file_path} in export: {str(e)}")
+        return None
+    
+    if "vehicleIdentification" not in document:
+        return None
+    if data_type == "tech_specs":
+        document["vehicleIdentification"]["fuelType"] = detect_fuel_type(document)
+    return document
+
+def export_tombstone(full_key: str) -> Dict[str, Any]:
+    """The export line of a document that is gone from the catalog"""
+    data_type, key = full_key.split(":", 1)
+    return {"dataType": data_type, "key": key, "deleted": True}
+
+async def stream_catalog_export(entries: List[Tuple[str, os.DirEntry]], deleted: List[str], compress: bool):
+    """
+    Yield catalog documents as NDJSON lines, reading each file only when it is its turn
+    (off the event loop), then a tombstone line per deleted key, gzip-compressing
+    incrementally when asked to.
+    """
+    loop = asyncio.get_running_loop()
+    compressor = zlib.compressobj(Config.EXPORT_COMPRESSION_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS) if compress else None
+    
+    async def lines():
+        for data_type, entry in entries:
+            document = await loop.run_in_executor(None, read_catalog_document, data_type, entry.path)
+            if document is not None:
+                yield {
+                    "dataType": data_type,
+                    "key": catalog_identity(document),
+                    "modified": datetime.fromtimestamp(entry.stat().st_mtime, tz=timezone.utc).isoformat(),
+                    "document": document
+                }
+        for full_key in deleted:
+            yield export_tombstone(full_key)
+    
+    async for item in lines():
+        line = serialize_json(item) + b"\n"
+        if compressor:
+            line = compressor.compress(line)
+        if line:
+            yield line
+    
+    if compressor:
+        yield compressor.flush()
+
+@app.get("/api/v1/export")
+async def export_catalog(
+    request: Request,
+    data_type: Optional[str] = None,
+    since: Optional[str] = None,
+    compression: Optional[str] = None,
+):
+    """
+    Stream every catalog document as NDJSON, one {dataType, key, modified, document} object per line.
+    since= takes the X-Catalog-Version of an earlier export and limits the export to documents
+    that are new or changed since that version, followed by a {dataType, key, deleted: true} line
+    per document removed since. A timestamp is also accepted, limiting the export to files
+    modified after it (without deletions). Responses are gzipped on the fly for clients that
+    accept it (compression=none turns that off).
+    """
+    if data_type not in (None, "repair_times", "tech_specs"):
+        raise HTTPException(status_code=400, detail="data_type must be repair_times or tech_specs")
+    
+    since_keys, since_ns = parse_export_since(since)
+    entries = catalog_file_entries()
+    version = compute_catalog_version(entries)
+    keys, files = await asyncio.get_running_loop().run_in_executor(None, catalog_key_set, entries)
+    record_catalog_version(version, keys, files)
+    
+    selected, deleted = [], []
+    for entry_type, _, entry in entries:
+        if data_type and entry_type != data_type:
+            continue
+        if since_keys is None:
+            if entry.stat().st_mtime_ns > since_ns:
+                selected.append((entry_type, entry))
+            continue
+        
+        # Against a known version, changed means a different mtime - older ones included
+        key = files[f"{entry_type}/{entry.name}"][1]
+        full_key = f"{entry_type}:{key}"
+        if key is not None and since_keys.get(full_key) != keys[full_key]:
+            selected.append((entry_type, entry))
+    if since_keys is not None:
+        deleted = [
+            full_key for full_key in since_keys
+            if full_key not in keys and (not data_type or full_key.startswith(f"{data_type}:"))
+        ]
+    
+    compress = compression != "none" and "gzip" in request.headers.get("accept-encoding", "")
+    logger.info(f"Exporting {len(selected)} catalog documents and {len(deleted)} deletions (since: {since or 'start'}, gzip: {compress})")
+    
+    headers = {
+        "Cache-Control": "no-store",
+        "X-Catalog-Version": version,
+        "X-Export-Count": str(len(selected)),
+        "X-Export-Deleted": str(len(deleted))
+    }
+    if compress:
+        # Set here, so GZipMiddleware passes the stream through instead of compressing it again
+        headers["Content-Encoding"] = "gzip"
+        headers["Vary"] = "Accept-Encoding"
+    
+    return StreamingResponse(
+        stream_catalog_export(selected, deleted, compress),
+        media_type="application/x-ndjson",
+        headers=headers
+    )
+
+def load_local_catalog():
+    """Load both data types and build the indexes in this process"""
+    global vehicle_data, tech_specs_data, vehicle_index, catalog_version
+    
+    # Load both data types
+    vehicle_data, tech_specs_data = load_all_vehicle_data()
+    catalog_version = compute_catalog_version()
+    
+    # Build unified index
+    vehicle_index = build_vehicle_index()
+    build_engine_index()
+    
+    # Materialize combined profiles
+    build_vehicle_profiles()
+    
+    # Operation IDs and the MOT defect rules compiled against them
+    build_operation_index()
+    build_operation_stats(collect_operation_histograms())
+
+async def load_catalog():
+    """Load the catalog (or start the shards) off the event loop, then mark the service ready"""
+    global catalog_version, shard_router
+    
+    started = time.perf_counter()
+    loop = asyncio.get_running_loop()
+    try:
+        # Sharded mode - this process only routes, the shards hold the catalog
+        if Config.CATALOG_SHARDS > 0:
+            catalog_version = compute_catalog_version()
+            shard_router = CatalogShardRouter(Config.CATALOG_SHARDS)
+            await loop.run_in_executor(None, shard_router.start)
+            await shard_router.wait_ready()
+            
+            # Each shard only holds its own makes - give them all the fleet-wide percentiles
+            if Config.CATALOG_SHARDS > 1:
+                histograms = merge_operation_histograms(await catalog_gather("operation_histograms"))
+                await catalog_gather("operation_stats", histograms=histograms)
+            logger.info(f"API started successfully with {Config.CATALOG_SHARDS} catalog shards")
+        else:
+            await loop.run_in_executor(None, load_local_catalog)
+            logger.info(f"API started successfully with {len(vehicle_data)} repair time records and {len(tech_specs_data)} technical specification records")
+        
+        catalog_status["state"] = "ready"
     except Exception as e:
+        catalog_status["state"] = "failed"
         logger.error(f"Startup failed: {str(e)}")
+    
+    catalog_status["loadSeconds"] = round(time.perf_counter() - started, 2)
+
+@app.on_event("startup")
+async def startup_event():
+    """Start loading data in the background; /ready reports when it is done"""
+    catalog_status["task"] = asyncio.create_task(load_catalog())
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop the catalog shards"""
+    if shard_router:
+        shard_router.stop()
 
 # Run the application
 if __name__ == "__main__":
@@ -0,0 +1,72 @@
+"""
+Startup ingest benchmark - wall clock time of load_all_vehicle_data against worker count.
+
+Builds a synthetic catalog of N vehicles (see shard_scaling.py) and times the file
+parsing and key generation with 1, 2, 4, ... ingest processes, up to the core count.
+
+Usage (from backend/auto_data_api):
+    python utils/Benchmarks/ingest_scaling.py
+    python utils/Benchmarks/ingest_scaling.py --vehicles 20000 --workers 1 2 4 8 --output results.json
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import logging
+import argparse
+import tempfile
+
+from shard_scaling import BASE_DIR, build_synthetic_catalog
+
+if __name__ == "__main__":
+    cores = os.cpu_count() or 1
+    default_workers = sorted({1, 2, 4, 8, cores} & set(range(1, cores + 1)) | {1})
+    
+    parser = argparse.ArgumentParser(description="Startup ingest wall clock benchmark")
+    parser.add_argument("--vehicles", type=int, default=4000)
+    parser.add_argument("--makes", type=int, default=60)
+    parser.add_argument("--workers", type=int, nargs="+", default=default_workers)
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+    
+    logging.disable(logging.CRITICAL)
+    work_dir = tempfile.mkdtemp(prefix="ingest_scaling_")
+    results = []
+    
+    try:
+        build_synthetic_catalog(work_dir, args.vehicles, args.makes)
+        
+        os.environ["VEHICLES_DATA_DIR"] = os.path.join(work_dir, "labour_times")
+        os.environ["TECH_SPECS_DIR"] = os.path.join(work_dir, "tech_specs")
+        os.environ["IDENTITY_STORE_DIR"] = os.path.join(work_dir, "identity")
+        os.environ["INGEST_PARALLEL_MIN_FILES"] = "0"
+        sys.path.insert(0, BASE_DIR)
+        import main
+        logging.disable(logging.CRITICAL)
+        
+        print(f"{args.vehicles} vehicles, {2 * args.vehicles} files, {cores} cores")
+        baseline = None
+        for workers in args.workers:
+            started = time.perf_counter()
+            vehicle_data, tech_specs_data = main.load_all_vehicle_data(workers=workers)
+            elapsed = time.perf_counter() - started
+            baseline = baseline or elapsed
+            
+            results.append({
+                "vehicles": args.vehicles,
+                "cores": cores,
+                "workers": workers,
+                "seconds": round(elapsed, 3),
+                "speedup": round(baseline / elapsed, 2),
+                "keys": len(vehicle_data) + len(tech_specs_data)
+            })
+            print(f"  {workers:>3} workers  {elapsed:8.2f}s  speedup {baseline / elapsed:5.2f}x  "
+                  f"({len(vehicle_data) + len(tech_specs_data)} keys)")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
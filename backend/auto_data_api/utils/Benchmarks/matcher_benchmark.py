@@ -0,0 +1,102 @@
+"""
+Worst-case latency benchmark for the vehicle matcher.
+
+Feeds adversarial make/model strings (long, repeated separators, unicode, digits)
+of increasing length through the matching helpers, with and without the input
+guards, and prints the latency curve per input size.
+
+Usage (from backend/auto_data_api):
+    python utils/Benchmarks/matcher_benchmark.py
+    python utils/Benchmarks/matcher_benchmark.py --sizes 64 256 1024 4096 --output results.json
+"""
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+import main
+from main import (
+    Config,
+    normalize_query_text,
+    extract_base_model,
+    extract_year_info,
+    find_vehicle_match_with_score
+)
+
+def generate_inputs(size):
+    """Adversarial model strings of roughly the given length"""
+    return {
+        "long": ("Civic Type R " * (size // 13 + 1))[:size],
+        "separators": "a" + " -" * (size // 2) + "!",
+        "unicode": ("Ｃｉｖｉｃ​é́ " * (size // 9 + 1))[:size],
+        "digits": ("1.6 2008-2012 " * (size // 14 + 1))[:size]
+    }
+
+def time_call(func, *args, repeat=3):
+    """Best-of-N wall clock time in milliseconds"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def run(sizes, repeat, make):
+    results = []
+    
+    for size in sizes:
+        for family, text in generate_inputs(size).items():
+            guarded = normalize_query_text(text, Config.MAX_MODEL_LENGTH)
+            
+            row = {
+                "size": size,
+                "family": family,
+                # Raw: what the helpers cost without the guards in front of them
+                "raw_base_model_ms": time_call(extract_base_model, text, repeat=repeat),
+                "raw_year_info_ms": time_call(extract_year_info, text, repeat=repeat),
+                # Guarded: normalization plus the full match as the endpoints run it
+                "guard_ms": time_call(normalize_query_text, text, Config.MAX_MODEL_LENGTH, repeat=repeat),
+                "guarded_base_model_ms": time_call(extract_base_model, guarded, repeat=repeat),
+                "match_ms": time_call(find_vehicle_match_with_score, make, text, None, None, "repair_times", repeat=repeat),
+                "fuzzy_make_match_ms": time_call(find_vehicle_match_with_score, text, text, None, None, "repair_times", repeat=repeat)
+            }
+            results.append(row)
+            
+            print(
+                f"{size:>6} {family:<10} "
+                f"base(raw) {row['raw_base_model_ms']:9.2f}  "
+                f"year(raw) {row['raw_year_info_ms']:7.2f}  "
+                f"guard {row['guard_ms']:6.2f}  "
+                f"base(guarded) {row['guarded_base_model_ms']:6.2f}  "
+                f"match {row['match_ms']:7.2f}  "
+                f"fuzzy-make {row['fuzzy_make_match_ms']:7.2f}"
+            )
+    
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Matcher worst-case latency benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[64, 256, 1024, 4096])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--make", default="Honda", help="Catalog make used for the model-only runs")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+    
+    logging.disable(logging.CRITICAL)
+    
+    # Same loading path as the service
+    main.load_local_catalog()
+    print(f"Catalog: {len(main.vehicle_index)} indexed documents, "
+          f"budget {Config.MATCH_TIME_BUDGET_MS}ms, max model length {Config.MAX_MODEL_LENGTH}")
+    
+    results = run(args.sizes, args.repeat, args.make)
+    
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
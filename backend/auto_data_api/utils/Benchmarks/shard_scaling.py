@@ -0,0 +1,120 @@
+"""
+Memory scaling benchmark for the make-sharded catalog.
+
+Builds a synthetic catalog of N vehicles (copies of the real documents spread over
+many makes), starts the catalog shards for each shard count and reports the resident
+memory of every shard. Per-shard RSS should grow linearly with catalog size and
+shrink roughly in proportion to the shard count.
+
+Usage (from backend/auto_data_api):
+    python utils/Benchmarks/shard_scaling.py
+    python utils/Benchmarks/shard_scaling.py --vehicles 2000 8000 32000 --shards 1 2 4 --output results.json
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import asyncio
+import logging
+import argparse
+import tempfile
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+
+def build_synthetic_catalog(target_dir, vehicles, makes):
+    """Write `vehicles` repair times documents and as many tech specs documents over `makes` makes"""
+    templates = {}
+    for data_type, source in (("labour_times", "data/labour_times"), ("tech_specs", "data/tech_specs")):
+        source = os.path.join(BASE_DIR, source)
+        templates[data_type] = []
+        for json_file in sorted(os.listdir(source)):
+            with open(os.path.join(source, json_file), "r") as f:
+                templates[data_type].append(json.load(f))
+        os.makedirs(os.path.join(target_dir, data_type), exist_ok=True)
+    
+    for i in range(vehicles):
+        make = f"Synth{i % makes:03d}"
+        for data_type, docs in templates.items():
+            doc = docs[i % len(docs)]
+            doc["vehicleIdentification"] = {
+                **doc["vehicleIdentification"],
+                "make": make,
+                "model": f"Model{i:06d}"
+            }
+            path = os.path.join(target_dir, data_type, f"{make}-model{i:06d}.json")
+            with open(path, "w") as f:
+                json.dump(doc, f)
+
+def catalog_bytes(directory):
+    return sum(
+        os.path.getsize(os.path.join(root, name))
+        for root, _, names in os.walk(directory) for name in names
+    )
+
+async def measure(shard_count):
+    """Start the shards, collect their stats and stop them"""
+    import main
+    
+    router = main.CatalogShardRouter(shard_count)
+    started = time.perf_counter()
+    router.start()
+    try:
+        await router.wait_ready()
+        startup = time.perf_counter() - started
+        stats = await router.fan_out("stats", {})
+    finally:
+        router.stop()
+    return startup, stats
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Catalog shard memory scaling benchmark")
+    parser.add_argument("--vehicles", type=int, nargs="+", default=[1000, 2000, 4000])
+    parser.add_argument("--shards", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--makes", type=int, default=60)
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+    
+    logging.disable(logging.CRITICAL)
+    results = []
+    
+    for vehicles in args.vehicles:
+        work_dir = tempfile.mkdtemp(prefix="shard_scaling_")
+        try:
+            build_synthetic_catalog(work_dir, vehicles, args.makes)
+            size = catalog_bytes(work_dir)
+            
+            # Shard processes inherit the environment, and main reads its Config from it on import
+            os.environ["VEHICLES_DATA_DIR"] = os.path.join(work_dir, "labour_times")
+            os.environ["TECH_SPECS_DIR"] = os.path.join(work_dir, "tech_specs")
+            os.environ["IDENTITY_STORE_DIR"] = os.path.join(work_dir, "identity")
+            sys.path.insert(0, BASE_DIR)
+            import main
+            main.Config.VEHICLES_DATA_DIR = os.environ["VEHICLES_DATA_DIR"]
+            main.Config.TECH_SPECS_DIR = os.environ["TECH_SPECS_DIR"]
+            logging.disable(logging.CRITICAL)
+            
+            for shard_count in args.shards:
+                startup, stats = asyncio.run(measure(shard_count))
+                rss = [s["rssBytes"] for s in stats]
+                row = {
+                    "vehicles": vehicles,
+                    "catalogBytes": size,
+                    "shards": shard_count,
+                    "startupSeconds": round(startup, 2),
+                    "documentsPerShard": [s["availableVehicles"] + s["availableTechSpecs"] for s in stats],
+                    "rssBytesPerShard": rss
+                }
+                results.append(row)
+                print(
+                    f"{vehicles:>7} vehicles ({size / 2**20:7.1f} MiB on disk)  {shard_count} shards  "
+                    f"startup {startup:6.1f}s  max shard RSS {max(rss) / 2**20:7.1f} MiB  "
+                    f"total RSS {sum(rss) / 2**20:7.1f} MiB"
+                )
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+    
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
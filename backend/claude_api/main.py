@@ -5,6 +5,7 @@ With enhanced persistent caching capabilities
 """
 import os
 import time
+import asyncio
 import json
 import logging
 import httpx
@@ -83,6 +84,7 @@ class Config:
     # Internal API URLs
     MOT_API_URL = os.getenv("MOT_API_URL")
     BULLETINS_API_URL = os.getenv("BULLETINS_API_URL")
+    AUTO_DATA_API_URL = os.getenv("AUTO_DATA_API_URL")  # Optional - identity resolver
     
     # Security settings
     ALLOWED_ORIGINS = os.getenv("ALLOWED_ORIGINS", 
@@ -377,7 +379,52 @@ async def fetch_mot_data(registration: str):
         logger.error(f"Error connecting to MOT API: {str(e)}")
         raise HTTPException(status_code=503, detail=f"Error connecting to MOT API: {str(e)}")
 
-async def fetch_bulletin_data(make: str, model: str, engine_code: Optional[str] = None, year: Optional[int] = None):
+async def fetch_mileage_analytics(registration: str) -> Optional[dict]:
+    """
+    Fetch the mileage analytics the MOT API precomputes from the odometer readings.
+    Returns None if they are unavailable - the analysis goes ahead without them.
+    """
+    try:
+        async with httpx.AsyncClient(timeout=Config.TIMEOUT_SECONDS, limits=HTTP_LIMITS) as client:
+            response = await client.get(f"{Config.MOT_API_URL}/api/v1/vehicle/registration/{registration}/mileage")
+            response.raise_for_status()
+            return response.json()
+    except (httpx.HTTPStatusError, httpx.RequestError) as e:
+        logger.warning(f"Mileage analytics unavailable for {registration}: {str(e)}")
+        return None
+
+async def resolve_vehicle_identity(registration: str, mot_data: dict) -> Optional[dict]:
+    """
+    Resolve the vehicle to catalog IDs via the vehicle data API identity resolver.
+    The mapping is persisted per VRN there, so repeat analyses skip matching.
+    Returns None if the resolver is not configured or unavailable.
+    """
+    if not Config.AUTO_DATA_API_URL:
+        return None
+    
+    vehicle_data = {
+        "registration": registration,
+        "make": mot_data.get("make"),
+        "model": mot_data.get("model"),
+        "fuelType": mot_data.get("fuelType"),
+        "registrationDate": mot_data.get("registrationDate") or mot_data.get("manufactureDate"),
+        "engineSize": mot_data.get("engineSize")
+    }
+    
+    try:
+        async with httpx.AsyncClient(timeout=Config.TIMEOUT_SECONDS, limits=HTTP_LIMITS) as client:
+            response = await client.post(
+                f"{Config.AUTO_DATA_API_URL}/api/v1/identity/resolve",
+                json={"vehicleData": vehicle_data}
+            )
+            response.raise_for_status()
+            return response.json()
+    except (httpx.HTTPStatusError, httpx.RequestError) as e:
+        logger.warning(f"Identity resolution failed for {registration}: {str(e)}")
+        return None
+
+async def fetch_bulletin_data(make: str, model: str, engine_code: Optional[str] = None, year: Optional[int] = None,
+                              vehicle_id: Optional[str] = None):
     """Fetch technical bulletin data for the vehicle."""
     try:
         logger.info(f"Fetching bulletins for {make} {model}")
@@ -393,6 +440,10 @@ async def fetch_bulletin_data(make: str, model: str, engine_code: Optional[str]
         
         if year:
             vehicle_data["year"] = year
+        
+        # A resolved bulletin vehicle_id lets the bulletins API skip matching
+        if vehicle_id:
+            vehicle_data["vehicle_id"] = vehicle_id
             
         async with httpx.AsyncClient(timeout=Config.TIMEOUT_SECONDS, limits=HTTP_LIMITS) as client:
             bulletins_api_url = f"{Config.BULLETINS_API_URL}/api/v1/bulletins/lookup"
@@ -438,16 +489,44 @@ def prepare_mot_history_for_analysis(mot_data):
         for test in mot_data.get("motTests", [])
     ]
 
-async def analyze_with_claude(registration: str, mot_data: dict, bulletin_data: dict, vehicle_info: dict):
+def prepare_mileage_analytics_for_analysis(mileage_analytics):
+    """Findings and figures of the mileage analytics, without the per-reading detail."""
+    if not mileage_analytics:
+        return None
+    
+    return {
+        "mileageStats": mileage_analytics.get("stats"),
+        "anomalies": [
+            {
+                "date": anomaly.get("date"),
+                "type": anomaly.get("type"),
+                "severity": anomaly.get("severity"),
+                "message": anomaly.get("message")
+            }
+            for anomaly in mileage_analytics.get("anomalies", [])
+        ],
+        "lowUsePeriods": [
+            {"days": round(period.get("days", 0)), "severity": period.get("severity"), "description": period.get("description")}
+            for period in mileage_analytics.get("inactivityPeriods", [])
+        ],
+        "testGapsOver18Months": len(mileage_analytics.get("gaps", []))
+    }
+
+async def analyze_with_claude(registration: str, mot_data: dict, bulletin_data: dict, vehicle_info: dict,
+                              mileage_analytics: Optional[dict] = None):
     """Send data to Claude API for analysis."""
     try:
         logger.info(f"Analyzing data for {registration} with Claude API")
         
         mot_history = prepare_mot_history_for_analysis(mot_data)
+        mileage_summary = prepare_mileage_analytics_for_analysis(mileage_analytics)
         
         # Validate input data size before processing
         mot_history_str = json.dumps(mot_history, indent=2)
         bulletin_data_str = json.dumps(bulletin_data, indent=2)
+        mileage_section = ""
+        if mileage_summary:
+            mileage_section = f"\n  Mileage Analytics (precomputed from the odometer readings): {json.dumps(mileage_summary, indent=2)}"
         
         if len(mot_history_str) > Config.MAX_PROMPT_SIZE // 2:
             raise HTTPException(status_code=413, detail="MOT history data too large for analysis")
@@ -523,10 +602,11 @@ async def analyze_with_claude(registration: str, mot_data: dict, bulletin_data:
   - Use British English throughout (e.g., "tyre" not "tire", "colour" not "color", "centre" not "center")
   - Reference UK-specific terms (MOT, DVSA, advisory items, major defects, dangerous defects)
   - Mention mileage in miles, not kilometres
+  - Where Mileage Analytics are provided, base mileage, clocking and usage findings on them rather than re-deriving them from the readings
   - Reference UK driving conditions and usage patterns where relevant
 
   MOT History: {mot_history_str}
-  Technical Bulletins: {bulletin_data_str}"""
+  Technical Bulletins: {bulletin_data_str}{mileage_section}"""
         
         # Validate final prompt size
         if len(prompt) > Config.MAX_PROMPT_SIZE:
@@ -658,7 +738,10 @@ async def get_vehicle_analysis(registration: str, response: Response):
     
     try:
         # Step 1: Fetch MOT data
-        mot_data = await fetch_mot_data(registration)
+        mot_data, mileage_analytics = await asyncio.gather(
+            fetch_mot_data(registration),
+            fetch_mileage_analytics(registration)
+        )
         
         if not mot_data:
             raise HTTPException(status_code=404, detail="No MOT data found for this vehicle")
@@ -668,9 +751,17 @@ async def get_vehicle_analysis(registration: str, response: Response):
         model = mot_data.get("model")
         engine_code = mot_data.get("engineCode")
         year = None
+        bulletin_vehicle_id = None
+        
+        # Use the shared identity resolver when available
+        identity = await resolve_vehicle_identity(registration, mot_data) if make and model else None
+        if identity:
+            year = identity.get("year")
+            if identity.get("bulletins"):
+                bulletin_vehicle_id = identity["bulletins"].get("vehicleId")
         
         # Try to extract year from registration date
-        if mot_data.get("registrationDate"):
+        if not year and mot_data.get("registrationDate"):
             try:
                 reg_date = mot_data.get("registrationDate")
                 if isinstance(reg_date, str) and len(reg_date) >= 4:
@@ -699,10 +790,10 @@ async def get_vehicle_analysis(registration: str, response: Response):
             raise HTTPException(status_code=400, detail="Make and model information not available")
         
         # Step 2: Fetch technical bulletins data
-        bulletin_data = await fetch_bulletin_data(make, model, engine_code, year)
+        bulletin_data = await fetch_bulletin_data(make, model, engine_code, year, bulletin_vehicle_id)
         
         # Step 3: Analyze with Claude
-        analysis = await analyze_with_claude(registration, mot_data, bulletin_data, vehicle_info)
+        analysis = await analyze_with_claude(registration, mot_data, bulletin_data, vehicle_info, mileage_analytics)
         
         # Prepare response data
         result = {
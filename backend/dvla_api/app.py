@@ -4,19 +4,26 @@ A production-ready FastAPI wrapper for the DVLA Vehicle Enquiry Service API
 """
 import os
 import re
+import json
 import time
+import zlib
+import hashlib
+import sqlite3
 import logging
+import threading
 from datetime import datetime, timedelta
 import asyncio
+from contextlib import nullcontext
 from typing import Optional, Dict, Any, List, Union
 
 import httpx
+from cachetools import TTLCache
 from fastapi import FastAPI, HTTPException, Depends, Request, Response, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.gzip import GZipMiddleware # Import GZipMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.openapi.docs import get_swagger_ui_html
-from pydantic import BaseModel, Field, field_validator
+from pydantic import BaseModel, Field, ValidationError, field_validator
 from starlette.middleware.base import BaseHTTPMiddleware
 from dotenv import load_dotenv
 
@@ -53,6 +60,14 @@ class Config:
     # Caching settings
     CACHE_TTL = int(os.getenv("CACHE_TTL", "3600"))  # 1 hour by default
     CACHE_MAXSIZE = int(os.getenv("CACHE_MAXSIZE", "1000"))
+    # Past the TTL, cached data is served while a background request refreshes it, and when the DVLA API fails
+    CACHE_STALE_WHILE_REVALIDATE = int(os.getenv("CACHE_STALE_WHILE_REVALIDATE", str(24 * 3600)))
+    CACHE_STALE_IF_ERROR = int(os.getenv("CACHE_STALE_IF_ERROR", str(7 * 24 * 3600)))
+    # On-disk second tier of the cache (SQLite), kept across restarts and shared by the workers on the host - empty turns it off
+    CACHE_STORE_PATH = os.getenv("CACHE_STORE_PATH", "dvla_cache.db")
+    CACHE_STORE_COMPRESSION_LEVEL = int(os.getenv("CACHE_STORE_COMPRESSION_LEVEL", "6"))
+    CACHE_STORE_COMPACT_INTERVAL = float(os.getenv("CACHE_STORE_COMPACT_INTERVAL", "3600"))
+    CACHE_STORE_BUSY_TIMEOUT = float(os.getenv("CACHE_STORE_BUSY_TIMEOUT", "5"))  # Waiting for another worker's write
 
     # Rate limiting settings
     RATE_LIMIT_REQUESTS = int(os.getenv("RATE_LIMIT_REQUESTS", "5"))
@@ -61,6 +76,10 @@ class Config:
     # Timeout settings
     REQUEST_TIMEOUT = int(os.getenv("REQUEST_TIMEOUT", "10"))  # 10 seconds timeout
 
+    # Bulk lookups - vehicles per request, and DVLA requests in flight for all bulk requests together
+    BULK_MAX_VEHICLES = int(os.getenv("BULK_MAX_VEHICLES", "500"))
+    BULK_UPSTREAM_CONCURRENCY = int(os.getenv("BULK_UPSTREAM_CONCURRENCY", "5"))
+
     # Retry settings
     MAX_RETRIES = int(os.getenv("MAX_RETRIES", "3"))
     RETRY_BACKOFF_FACTOR = float(os.getenv("RETRY_BACKOFF_FACTOR", "0.5"))
@@ -110,6 +129,9 @@ class VehicleRequest(BaseModel):
 
         return v
 
+class BulkVehicleRequest(BaseModel):
+    registrationNumbers: List[str]
+
 class VehicleResponse(BaseModel):
     registrationNumber: str
     taxStatus: Optional[str] = None
@@ -139,9 +161,137 @@ class HealthResponse(BaseModel):
     environment: str
     timestamp: str
     version: str
+    cacheStore: Optional[Dict[str, Any]] = None
+
+class VehicleStore:
+    """
+    Persistent vehicle cache in SQLite, read through by the in-memory cache. Each row holds the
+    zlib-compressed JSON data with the time it was fetched and the time it expires; compact()
+    deletes expired rows and hands the freed pages back to the file system. WAL mode lets the
+    uvicorn workers on a host share the file. Calls block, so they are made from a worker
+    thread, and storage errors are logged and treated as misses. A copy of mot_api's
+    VehicleStore without its VIN column, as the services share no code and deploy separately -
+    WAL, pragma and compression fixes belong in both.
+    """
+    def __init__(self, path, retention, compression_level=6, busy_timeout=5):
+        self.path = path
+        self.retention = retention
+        self.compression_level = compression_level
+        self.busy_timeout = busy_timeout
+        self.connection = None
+        self.lock = threading.Lock()  # One connection per process, used from several threads
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.errors = 0
+        self.compacted = 0
+
+    def connect(self):
+        if self.connection is None:
+            connection = sqlite3.connect(self.path, timeout=self.busy_timeout, check_same_thread=False, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")  # Durable enough for a cache, and no fsync per write
+            connection.execute("PRAGMA auto_vacuum=INCREMENTAL")  # Only takes effect on a new database
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS vehicles ("
+                "key TEXT PRIMARY KEY, stored_at REAL NOT NULL, expires_at REAL NOT NULL, "
+                "size INTEGER NOT NULL, data BLOB NOT NULL)"
+            )
+            connection.execute("CREATE INDEX IF NOT EXISTS vehicles_expires_at ON vehicles (expires_at)")
+            self.connection = connection
+        return self.connection
+
+    def get(self, key):
+        """Return (data, time stored) for a key within the retention time, or (None, 0)"""
+        try:
+            with self.lock:
+                row = self.connect().execute(
+                    "SELECT stored_at, data FROM vehicles WHERE key = ? AND expires_at > ?", (key, time.time())
+                ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None, 0
+            data = json.loads(zlib.decompress(row[1]))
+        except (sqlite3.Error, zlib.error, ValueError) as e:
+            self.errors += 1
+            logger.warning(f"Cache store read failed for {key}: {str(e)}")
+            return None, 0
+        self.hits += 1
+        return data, row[0]
+
+    def set(self, key, data, stored_at):
+        """Store data for a key, unless another worker has stored a newer copy"""
+        blob = zlib.compress(json.dumps(data, separators=(",", ":")).encode("utf-8"), self.compression_level)
+        try:
+            with self.lock:
+                self.connect().execute(
+                    "INSERT INTO vehicles (key, stored_at, expires_at, size, data) VALUES (?, ?, ?, ?, ?) "
+                    "ON CONFLICT (key) DO UPDATE SET stored_at = excluded.stored_at, expires_at = excluded.expires_at, "
+                    "size = excluded.size, data = excluded.data WHERE excluded.stored_at >= vehicles.stored_at",
+                    (key, stored_at, stored_at + self.retention, len(blob), blob)
+                )
+        except sqlite3.Error as e:
+            self.errors += 1
+            logger.warning(f"Cache store write failed for {key}: {str(e)}")
+            return
+        self.writes += 1
+
+    def compact(self):
+        """Delete expired rows and release the free pages, returning how many rows were deleted"""
+        try:
+            with self.lock:
+                connection = self.connect()
+                deleted = connection.execute("DELETE FROM vehicles WHERE expires_at <= ?", (time.time(),)).rowcount
+                connection.execute("PRAGMA incremental_vacuum")
+                connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        except sqlite3.Error as e:
+            self.errors += 1
+            logger.warning(f"Cache store compaction failed: {str(e)}")
+            return 0
+        self.compacted += deleted
+        return deleted
+
+    def clear(self):
+        try:
+            with self.lock:
+                self.connect().execute("DELETE FROM vehicles")
+        except sqlite3.Error as e:
+            self.errors += 1
+            logger.warning(f"Cache store clear failed: {str(e)}")
+
+    def close(self):
+        with self.lock:
+            if self.connection is not None:
+                self.connection.close()
+                self.connection = None
+
+    def stats(self):
+        try:
+            with self.lock:
+                rows, stored_bytes = self.connect().execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM vehicles").fetchone()
+        except sqlite3.Error:
+            rows, stored_bytes = None, None
+        return {
+            "path": self.path,
+            "rows": rows,
+            "compressedBytes": stored_bytes,
+            "fileBytes": sum(os.path.getsize(self.path + suffix) for suffix in ("", "-wal") if os.path.exists(self.path + suffix)),
+            "hits": self.hits,
+            "misses": self.misses,
+            "writes": self.writes,
+            "errors": self.errors,
+            "compacted": self.compacted
+        }
 
 # Cache initialization
-vehicle_cache = {}
+CACHE_RETENTION = Config.CACHE_TTL + max(Config.CACHE_STALE_WHILE_REVALIDATE, Config.CACHE_STALE_IF_ERROR)
+vehicle_cache = TTLCache(maxsize=Config.CACHE_MAXSIZE, ttl=CACHE_RETENTION)  # cache_key -> {"data", "timestamp"}
+vehicle_refreshes = {}  # cache_key -> background refresh task of a stale entry
+cache_store = VehicleStore(
+    Config.CACHE_STORE_PATH, CACHE_RETENTION, Config.CACHE_STORE_COMPRESSION_LEVEL, Config.CACHE_STORE_BUSY_TIMEOUT
+) if Config.CACHE_STORE_PATH else None
+cache_compactor_task = None
+bulk_upstream_slots = asyncio.Semaphore(Config.BULK_UPSTREAM_CONCURRENCY)
 
 # FastAPI application - DEFINE APP BEFORE MIDDLEWARES
 app = FastAPI(
@@ -165,8 +315,10 @@ class RateLimiterMiddleware(BaseHTTPMiddleware):
 
         client_ip = request.client.host
 
-        # Only rate limit the vehicle endpoint
-        if request.url.path == "/api/vehicle" and request.method == "POST":
+        # Only rate limit the vehicle endpoints - a bulk request counts once
+        vehicle_post = request.method == "POST" and request.url.path in ("/api/vehicle", "/api/vehicle/bulk")
+        vehicle_get = request.method == "GET" and request.url.path.startswith("/api/vehicle/")
+        if vehicle_post or vehicle_get:
             now = time.time()
 
             # Initialize if client_ip not in dictionary
@@ -222,7 +374,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["GET", "POST", "OPTIONS"],
     allow_headers=["*"],
-    expose_headers=["X-Cache", "Cache-Control", "Content-Type"],
+    expose_headers=["X-Cache", "Cache-Control", "Content-Type", "Age", "ETag"],
     max_age=86400,  # Cache preflight requests for 24 hours
 )
 
@@ -261,29 +413,126 @@ def verify_api_key():
     return Config.DVLA_API_KEY
 
 # Cache helper functions
-def is_cache_valid(cache_key):
-    """Check if a cache entry is still valid."""
-    if cache_key in vehicle_cache:
-        cache_time = vehicle_cache[cache_key]["timestamp"]
-        return (time.time() - cache_time) < Config.CACHE_TTL
-    return False
-
-async def get_cached_vehicle_data(cache_key):
-    """Get vehicle data from cache if available and valid."""
-    if is_cache_valid(cache_key):
-        logger.debug(f"Cache hit for {cache_key}")
-        return vehicle_cache[cache_key]["data"]
-    logger.debug(f"Cache miss for {cache_key}")
-    return None
-
-def update_vehicle_cache(cache_key, data):
-    """Update the vehicle cache with new data."""
+async def get_cache_entry(cache_key):
+    """
+    Get (data, age in seconds) for a cache key, fresh or stale, or (None, 0) when there
+    is nothing within the stale windows. Reads through to the cache store when memory has no
+    fresh copy - another worker, or this one before a restart, may have fetched the vehicle.
+    """
+    entry = vehicle_cache.get(cache_key)
+    if entry is not None and time.time() - entry["timestamp"] >= CACHE_RETENTION:
+        del vehicle_cache[cache_key]
+        logger.debug(f"Cache entry expired for {cache_key}")
+        entry = None
+
+    if cache_store is not None and (entry is None or time.time() - entry["timestamp"] >= Config.CACHE_TTL):
+        stored_data, stored_at = await asyncio.to_thread(cache_store.get, cache_key)
+        if stored_data is not None and (entry is None or stored_at > entry["timestamp"]):
+            entry = {"data": stored_data, "timestamp": stored_at, "etag": vehicle_etag(stored_data)}
+            vehicle_cache[cache_key] = entry
+
+    if entry is None:
+        logger.debug(f"Cache miss for {cache_key}")
+        return None, 0
+
+    age = time.time() - entry["timestamp"]
+    logger.debug(f"Cache hit for {cache_key} ({age:.0f}s old)")
+    return entry["data"], age
+
+async def update_vehicle_cache(cache_key, data):
+    """Update the vehicle cache with new data, writing it through to the cache store."""
+    timestamp = time.time()
     vehicle_cache[cache_key] = {
         "data": data,
-        "timestamp": time.time()
+        "timestamp": timestamp,
+        "etag": vehicle_etag(data)
     }
+    if cache_store is not None:
+        await asyncio.to_thread(cache_store.set, cache_key, data, timestamp)
     logger.debug(f"Updated cache for {cache_key}")
 
+async def compact_cache_store():
+    """Background task deleting expired cache store rows every CACHE_STORE_COMPACT_INTERVAL seconds"""
+    while True:
+        await asyncio.sleep(Config.CACHE_STORE_COMPACT_INTERVAL)
+        deleted = await asyncio.to_thread(cache_store.compact)
+        if deleted:
+            logger.info(f"Compacted cache store: deleted {deleted} expired rows")
+
+@app.on_event("startup")
+async def startup_event():
+    """Open the cache store and start compacting it"""
+    global cache_compactor_task
+    if cache_store is not None:
+        await asyncio.to_thread(cache_store.connect)
+        cache_compactor_task = asyncio.create_task(compact_cache_store())
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop compacting and close the cache store"""
+    if cache_compactor_task is not None:
+        cache_compactor_task.cancel()
+    if cache_store is not None:
+        cache_store.close()
+
+def refresh_in_background(vrn, api_key, cache_key):
+    """Refresh a stale cache entry, unless a refresh of it is already running"""
+    if cache_key in vehicle_refreshes:
+        return
+
+    async def refresh():
+        try:
+            await fetch_dvla_vehicle(vrn, api_key)
+        except HTTPException as e:
+            logger.warning(f"Background refresh failed for VRN {vrn}: {e.detail}")
+        finally:
+            vehicle_refreshes.pop(cache_key, None)
+
+    vehicle_refreshes[cache_key] = asyncio.create_task(refresh())
+
+def vehicle_etag(data):
+    """
+    Weak ETag of vehicle data - a hash of its content rather than of the response bytes, which
+    the response model and gzip shape
+    """
+    content = json.dumps(data, sort_keys=True, separators=(",", ":")).encode("utf-8")
+    return f'W/"{hashlib.blake2b(content, digest_size=16).hexdigest()}"'
+
+def cached_etag(cache_key, data):
+    """
+    ETag of vehicle data, as computed when its cache entry was stored - worked out afresh only
+    when the entry has since been replaced or evicted
+    """
+    entry = vehicle_cache.get(cache_key)
+    if entry is not None and entry["data"] is data:
+        return entry["etag"]
+    return vehicle_etag(data)
+
+def etag_matches(if_none_match, etag):
+    """Whether an If-None-Match header matches an ETag, compared weakly as for a GET"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return etag.removeprefix("W/") in {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+
+def set_cache_headers(response, cache_status, age=0, etag=None):
+    """Cache and security headers of a vehicle response, with its ETag when given"""
+    response.headers["X-Cache"] = cache_status
+    response.headers["Cache-Control"] = (
+        f"max-age={Config.CACHE_TTL}, stale-while-revalidate={Config.CACHE_STALE_WHILE_REVALIDATE}, "
+        f"stale-if-error={Config.CACHE_STALE_IF_ERROR}"
+    )
+    if cache_status != "MISS":
+        response.headers["Age"] = str(int(age))
+    if etag is not None:
+        response.headers["ETag"] = etag
+
+    # Add security headers
+    response.headers["X-Content-Type-Options"] = "nosniff"
+    response.headers["X-Frame-Options"] = "DENY"
+    response.headers["Content-Security-Policy"] = "default-src 'self'"
+
 # Custom Swagger UI with authentication
 @app.get("/docs", include_in_schema=False)
 async def custom_swagger_ui_html():
@@ -304,6 +553,8 @@ async def root():
         "endpoints": [
             "/health",
             "/api/vehicle",
+            "/api/vehicle/{registration}",
+            "/api/vehicle/bulk",
             "/api/cache/clear"
         ]
     }
@@ -315,7 +566,8 @@ async def health_check():
         "status": "ok",
         "environment": "test" if Config.USE_TEST_ENV else "production",
         "timestamp": datetime.now().isoformat(),
-        "version": "1.0.0"
+        "version": "1.0.0",
+        "cacheStore": await asyncio.to_thread(cache_store.stats) if cache_store is not None else None
     }
 
 # Handle OPTIONS request explicitly for /api/vehicle
@@ -332,44 +584,9 @@ async def vehicle_options():
         }
     )
 
-# Main vehicle information endpoint
-@app.post("/api/vehicle", response_model=VehicleResponse,
-          responses={
-              400: {"model": ErrorResponse},
-              404: {"model": ErrorResponse},
-              429: {"model": ErrorResponse},
-              500: {"model": ErrorResponse},
-              503: {"model": ErrorResponse}
-          })
-async def get_vehicle_info(
-    request: VehicleRequest,
-    response: Response,
-    api_key: str = Depends(verify_api_key)
-):
-    vrn = request.registrationNumber
-    cache_key = f"reg_{vrn}"
-
-    logger.debug(f"Received request for VRN: {vrn}") # Debug level for request start
-
-    # Check cache first
-    cached_data = await get_cached_vehicle_data(cache_key)
-    is_cached = cached_data is not None
-
-    if is_cached:
-        # Set cache headers
-        response.headers["X-Cache"] = "HIT"
-        response.headers["Cache-Control"] = f"max-age={Config.CACHE_TTL}"
-        logger.info(f"Cache HIT for VRN: {vrn}") # Info level for cache hit
-
-        # Add security headers
-        response.headers["X-Content-Type-Options"] = "nosniff"
-        response.headers["X-Frame-Options"] = "DENY"
-        response.headers["Content-Security-Policy"] = "default-src 'self'"
-
-        return cached_data
-
-    logger.info(f"Cache MISS for VRN: {vrn}. Fetching from DVLA API.") # Info level for cache miss
-
+# DVLA API request with retries
+async def fetch_dvla_vehicle(vrn, api_key):
+    """Fetch vehicle data from the DVLA API, retrying rate limits and server errors, and cache it"""
     # Prepare headers
     headers = {
         "x-api-key": api_key,
@@ -400,16 +617,7 @@ async def get_vehicle_info(
             if resp.status_code == 200:
                 vehicle_data = resp.json()
                 # Cache the response
-                update_vehicle_cache(cache_key, vehicle_data)
-
-                # Set cache headers
-                response.headers["X-Cache"] = "MISS"
-                response.headers["Cache-Control"] = f"max-age={Config.CACHE_TTL}"
-
-                # Add security headers
-                response.headers["X-Content-Type-Options"] = "nosniff"
-                response.headers["X-Frame-Options"] = "DENY"
-                response.headers["Content-Security-Policy"] = "default-src 'self'"
+                await update_vehicle_cache(f"reg_{vrn}", vehicle_data)
 
                 logger.info(f"Successfully fetched vehicle data from DVLA API for VRN: {vrn}") # Info level for successful API call
                 return vehicle_data
@@ -511,12 +719,180 @@ async def get_vehicle_info(
         detail="Maximum retries exceeded"
     )
 
+# Main vehicle information endpoint
+@app.post("/api/vehicle", response_model=VehicleResponse,
+          responses={
+              400: {"model": ErrorResponse},
+              404: {"model": ErrorResponse},
+              429: {"model": ErrorResponse},
+              500: {"model": ErrorResponse},
+              503: {"model": ErrorResponse}
+          })
+async def get_vehicle_info(
+    request: VehicleRequest,
+    response: Response,
+    api_key: str = Depends(verify_api_key)
+):
+    vrn = request.registrationNumber
+
+    logger.debug(f"Received request for VRN: {vrn}") # Debug level for request start
+
+    vehicle_data, cache_status, age = await get_vehicle_data(vrn, api_key)
+    set_cache_headers(response, cache_status, age, cached_etag(f"reg_{vrn}", vehicle_data))
+    return vehicle_data
+
+# Vehicle information by GET, which browsers and proxies cache and revalidate
+@app.get("/api/vehicle/{registration}", response_model=VehicleResponse,
+         responses={
+             304: {"description": "Not modified since the ETag in If-None-Match"},
+             400: {"model": ErrorResponse},
+             404: {"model": ErrorResponse},
+             429: {"model": ErrorResponse},
+             500: {"model": ErrorResponse},
+             503: {"model": ErrorResponse}
+         })
+async def get_vehicle_info_by_registration(
+    registration: str,
+    request: Request,
+    response: Response,
+    api_key: str = Depends(verify_api_key)
+):
+    """
+    Vehicle information as from POST /api/vehicle, with an ETag - a request whose If-None-Match
+    has it gets 304 Not Modified without the body
+    """
+    try:
+        vrn = VehicleRequest(registrationNumber=registration).registrationNumber
+    except ValidationError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=e.errors()[0]["msg"])
+
+    vehicle_data, cache_status, age = await get_vehicle_data(vrn, api_key)
+    etag = cached_etag(f"reg_{vrn}", vehicle_data)
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        not_modified = Response(status_code=status.HTTP_304_NOT_MODIFIED)
+        set_cache_headers(not_modified, cache_status, age, etag)
+        return not_modified
+    set_cache_headers(response, cache_status, age, etag)
+    return vehicle_data
+
+async def get_vehicle_data(vrn, api_key, upstream_slots=None):
+    """
+    Get (data, cache status, age) for a VRN. Stale data is served while it is refreshed in the
+    background, and when the DVLA API fails. A miss waits for one of upstream_slots, when
+    given, before calling the DVLA API.
+    """
+    cache_key = f"reg_{vrn}"
+
+    # Check cache first - stale data is served while it is refreshed in the background
+    cached_data, age = await get_cache_entry(cache_key)
+
+    if cached_data is not None and age < Config.CACHE_TTL:
+        logger.info(f"Cache HIT for VRN: {vrn}") # Info level for cache hit
+        return cached_data, "HIT", age
+
+    if cached_data is not None and age < Config.CACHE_TTL + Config.CACHE_STALE_WHILE_REVALIDATE:
+        refresh_in_background(vrn, api_key, cache_key)
+        logger.info(f"Cache STALE for VRN: {vrn}. Refreshing from DVLA API in the background.")
+        return cached_data, "STALE", age
+
+    logger.info(f"Cache MISS for VRN: {vrn}. Fetching from DVLA API.") # Info level for cache miss
+
+    try:
+        async with upstream_slots or nullcontext():
+            vehicle_data = await fetch_dvla_vehicle(vrn, api_key)
+    except HTTPException as e:
+        # Rather stale data than an error when the DVLA API is down or rate limiting us
+        upstream_failed = e.status_code >= 500 or e.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+        if cached_data is None or not upstream_failed or age >= Config.CACHE_TTL + Config.CACHE_STALE_IF_ERROR:
+            raise
+        logger.warning(f"Serving stale data for VRN: {vrn} after DVLA API error {e.status_code}")
+        return cached_data, "STALE-IF-ERROR", age
+
+    return vehicle_data, "MISS", 0
+
+async def get_bulk_vehicle_result(vrn, api_key):
+    """One NDJSON line of a bulk lookup - the vehicle data, or the error it failed with"""
+    try:
+        vehicle_data, cache_status, age = await get_vehicle_data(vrn, api_key, bulk_upstream_slots)
+    except HTTPException as e:
+        return {"registrationNumber": vrn, "status": e.status_code, "error": e.detail}
+    return {"registrationNumber": vrn, "status": 200, "cache": cache_status, "age": int(age), "data": vehicle_data}
+
+async def stream_bulk_vehicles(vrns, invalid, api_key):
+    """
+    Yield an NDJSON line per invalid registration, then per vehicle as its lookup completes,
+    then a summary line. Lookups still running when the client goes away are cancelled.
+    """
+    summary = {"summary": True, "requested": len(vrns) + len(invalid), "found": 0, "failed": len(invalid), "fromCache": 0}
+    for registration, error in invalid:
+        yield json.dumps({"registrationNumber": registration, "status": 400, "error": error}, separators=(",", ":")) + "\n"
+
+    lookups = [asyncio.create_task(get_bulk_vehicle_result(vrn, api_key)) for vrn in vrns]
+    try:
+        for lookup in asyncio.as_completed(lookups):
+            result = await lookup
+            if result["status"] == 200:
+                summary["found"] += 1
+                summary["fromCache"] += result["cache"] != "MISS"
+            else:
+                summary["failed"] += 1
+            yield json.dumps(result, separators=(",", ":")) + "\n"
+    finally:
+        for lookup in lookups:
+            lookup.cancel()
+
+    logger.info(f"Bulk lookup of {summary['requested']} vehicles: {summary['found']} found ({summary['fromCache']} from cache), {summary['failed']} failed")
+    yield json.dumps(summary, separators=(",", ":")) + "\n"
+
+# Bulk vehicle information endpoint for fleets
+@app.post("/api/vehicle/bulk",
+          response_class=StreamingResponse,
+          responses={
+              200: {"content": {"application/x-ndjson": {}}},
+              400: {"model": ErrorResponse},
+              429: {"model": ErrorResponse}
+          })
+async def get_vehicles_bulk(
+    request: BulkVehicleRequest,
+    api_key: str = Depends(verify_api_key)
+):
+    """
+    Vehicle information for up to BULK_MAX_VEHICLES registrations, streamed as NDJSON - one
+    line per vehicle as soon as it is ready, so cached vehicles come back first, then a summary
+    line. Each registration is looked up once, and misses call the DVLA API
+    BULK_UPSTREAM_CONCURRENCY at a time across all bulk requests.
+    """
+    vrns = {}
+    invalid = []
+    for registration in request.registrationNumbers:
+        try:
+            vrns[VehicleRequest(registrationNumber=registration).registrationNumber] = None
+        except ValidationError as e:
+            invalid.append((registration, e.errors()[0]["msg"]))
+
+    if not vrns and not invalid:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No registration numbers given")
+    if len(vrns) + len(invalid) > Config.BULK_MAX_VEHICLES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {Config.BULK_MAX_VEHICLES} registration numbers per request"
+        )
+
+    logger.info(f"Bulk lookup of {len(vrns)} vehicles ({len(request.registrationNumbers)} given, {len(invalid)} invalid)")
+    return StreamingResponse(
+        stream_bulk_vehicles(list(vrns), invalid, api_key),
+        media_type="application/x-ndjson",
+        # X-Accel-Buffering: nginx would otherwise buffer the lines until its proxy buffers fill
+        headers={"X-Content-Type-Options": "nosniff", "Cache-Control": "no-store", "X-Accel-Buffering": "no"}
+    )
+
 # Endpoint to manually clear the cache
 @app.post("/api/cache/clear")
 async def clear_cache():
-    """Clear the vehicle data cache"""
-    global vehicle_cache
-    vehicle_cache = {}
+    """Clear the vehicle data cache, in memory and on disk"""
+    vehicle_cache.clear()
+    if cache_store is not None:
+        await asyncio.to_thread(cache_store.clear)
     logger.info("Cache cleared manually")
     return {"status": "success", "message": "Cache cleared successfully"}
 
@@ -1,14 +1,30 @@
 import os
-import requests
+import re
+import sys
+import math
+import heapq
+import hashlib
+import httpx
 import json
+import numpy as np
 import time
+import zlib
+import asyncio
 import logging
-from functools import lru_cache
-from typing import Dict, Any, Optional, Union, List
-from fastapi import FastAPI, HTTPException, Depends, Query, Response, Request
+import sqlite3
+import threading
+from array import array
+from collections import OrderedDict
+from contextlib import nullcontext
+from functools import partial
+from json.encoder import encode_basestring
+from email.utils import format_datetime
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Any, Optional, Union, List, Tuple
+from fastapi import FastAPI, HTTPException, Query, Response, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from pydantic import BaseModel, Field
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field, TypeAdapter, ValidationError
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -62,7 +78,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["GET", "POST", "OPTIONS"],
     allow_headers=["*"],
-    expose_headers=["X-Cache", "Cache-Control"]
+    expose_headers=["X-Cache", "Cache-Control", "Age", "Retry-After", "ETag", "Last-Modified"]
 )
 
 # Add middleware to log requests
@@ -78,14 +94,949 @@ async def log_requests(request: Request, call_next):
 TOKEN_CACHE_TTL = 3600 - 300  # Token TTL minus 5 minute buffer
 VEHICLE_CACHE_TTL = 300  # 5 minutes
 
+# Past the TTL, cached vehicle data is still served while it is refreshed in the background
+# (stale-while-revalidate), and when the upstream call fails (stale-if-error) - MOT histories
+# change a few times a year at most
+VEHICLE_STALE_WHILE_REVALIDATE = int(os.environ.get("VEHICLE_STALE_WHILE_REVALIDATE", str(24 * 3600)))
+VEHICLE_STALE_IF_ERROR = int(os.environ.get("VEHICLE_STALE_IF_ERROR", str(7 * 24 * 3600)))
+
+# Vehicle cache bounds - least recently used entries go first once either is exceeded
+VEHICLE_CACHE_MAX_ENTRIES = int(os.environ.get("VEHICLE_CACHE_MAX_ENTRIES", "10000"))
+VEHICLE_CACHE_MAX_BYTES = int(os.environ.get("VEHICLE_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))  # See VehicleCache for how entries are sized
+VEHICLE_CACHE_SWEEP_INTERVAL = float(os.environ.get("VEHICLE_CACHE_SWEEP_INTERVAL", "60"))
+VEHICLE_IDENTITY_MAX_ENTRIES = int(os.environ.get("VEHICLE_IDENTITY_MAX_ENTRIES", "100000"))  # Registration/VIN pairs remembered
+
+# Cached vehicles are kept in a compact form (see CompactVehicle) rather than as parsed JSON,
+# with strings that repeat across vehicles - makes, results, defect texts - shared from a table
+VEHICLE_CACHE_COMPACT = os.environ.get("VEHICLE_CACHE_COMPACT", "true").lower() == "true"
+VEHICLE_STRING_TABLE_MAX_ENTRIES = int(os.environ.get("VEHICLE_STRING_TABLE_MAX_ENTRIES", "200000"))
+# Response bodies of the most recently served compact vehicles, so popular ones aren't written out every time
+VEHICLE_HOT_BODIES_MAX_BYTES = int(os.environ.get("VEHICLE_HOT_BODIES_MAX_BYTES", str(32 * 1024 * 1024)))
+
+# On-disk second tier of the vehicle cache (SQLite), kept across restarts and shared by the
+# workers on the host - an empty path turns it off
+VEHICLE_STORE_PATH = os.environ.get("VEHICLE_STORE_PATH", "vehicle_cache.db")
+VEHICLE_STORE_COMPRESSION_LEVEL = int(os.environ.get("VEHICLE_STORE_COMPRESSION_LEVEL", "6"))
+VEHICLE_STORE_COMPACT_INTERVAL = float(os.environ.get("VEHICLE_STORE_COMPACT_INTERVAL", "3600"))
+VEHICLE_STORE_BUSY_TIMEOUT = float(os.environ.get("VEHICLE_STORE_BUSY_TIMEOUT", "5"))  # Waiting for another worker's write
+
+# Local MOT dataset ingested from the DVSA bulk and delta files (utils/Bulk-Data/mot_bulk_ingest.py),
+# answered from ahead of the live API - an empty path turns it off
+MOT_DATASET_PATH = os.environ.get("MOT_DATASET_PATH", "")
+MOT_DATASET_MAX_AGE_DAYS = int(os.environ.get("MOT_DATASET_MAX_AGE_DAYS", "45"))  # Not used once the latest file ingested is older
+MOT_DATASET_TEST_WINDOW_DAYS = int(os.environ.get("MOT_DATASET_TEST_WINDOW_DAYS", "31"))  # How early a vehicle can be tested before its MOT expires
+
+# Bulk lookups - vehicles per request, and upstream fetches in flight for all bulk requests
+# together (cache hits are served without waiting for a slot)
+BULK_MAX_VEHICLES = int(os.environ.get("BULK_MAX_VEHICLES", "500"))
+BULK_UPSTREAM_CONCURRENCY = int(os.environ.get("BULK_UPSTREAM_CONCURRENCY", "10"))
+
+# Mileage analytics thresholds - the ones the frontend mileage insights used client side
+UK_AVERAGE_ANNUAL_MILEAGE = 8000
+MILEAGE_HIGH_ANNUAL = 40000  # Very high annual mileage
+MILEAGE_HIGH_DAILY = 250  # Very high daily mileage over any interval
+MILEAGE_LOW_ACTIVITY_RATIO = 0.25  # Of the UK average daily mileage
+MILEAGE_INACTIVITY_MIN_DAYS = 60
+MOT_GAP_DAYS = 548  # 18 months between tests
+KM_PER_MILE = 1.609344
+
+# Background token renewal - renew this long before the cached token expires (more than the
+# 60 second buffer of get_access_token, so requests never wait for a token), retrying failures
+TOKEN_RENEW_BEFORE = float(os.environ.get("TOKEN_RENEW_BEFORE", "120"))
+TOKEN_RETRY_INTERVAL = float(os.environ.get("TOKEN_RETRY_INTERVAL", "15"))
+
+# Upstream settings - the URLs can point at a local stand-in for load tests
+MOT_API_BASE_URL = os.environ.get("MOT_API_BASE_URL", "https://history.mot.api.gov.uk")
+MOT_TOKEN_URL = os.environ.get("MOT_TOKEN_URL")  # Defaults to the Microsoft login endpoint of MOT_TENANT_ID
+UPSTREAM_TIMEOUT = float(os.environ.get("UPSTREAM_TIMEOUT", "10"))
+UPSTREAM_CONNECT_TIMEOUT = float(os.environ.get("UPSTREAM_CONNECT_TIMEOUT", "5"))
+UPSTREAM_POOL_TIMEOUT = float(os.environ.get("UPSTREAM_POOL_TIMEOUT", "5"))  # Waiting for a free connection
+UPSTREAM_MAX_CONNECTIONS = int(os.environ.get("UPSTREAM_MAX_CONNECTIONS", "100"))
+UPSTREAM_MAX_KEEPALIVE = int(os.environ.get("UPSTREAM_MAX_KEEPALIVE", "20"))
+UPSTREAM_KEEPALIVE_EXPIRY = float(os.environ.get("UPSTREAM_KEEPALIVE_EXPIRY", "30"))
+
+# DVSA quotas, enforced client side - requests a second (0 turns pacing off) with the burst
+# allowed on top, and requests a day. These apply per process, so divide them between workers,
+# and keep the burst a little under DVSA's to absorb network jitter
+UPSTREAM_RATE_LIMIT = float(os.environ.get("UPSTREAM_RATE_LIMIT", "15"))
+UPSTREAM_BURST = int(os.environ.get("UPSTREAM_BURST", "10"))
+UPSTREAM_DAILY_QUOTA = int(os.environ.get("UPSTREAM_DAILY_QUOTA", "500000"))  # 0 for no daily quota
+# Longest expected wait for a DVSA call before answering 503 instead, per traffic priority
+UPSTREAM_WAIT_BUDGET = float(os.environ.get("UPSTREAM_WAIT_BUDGET", "2"))
+UPSTREAM_BULK_WAIT_BUDGET = float(os.environ.get("UPSTREAM_BULK_WAIT_BUDGET", "30"))
+UPSTREAM_PREFETCH_WAIT_BUDGET = float(os.environ.get("UPSTREAM_PREFETCH_WAIT_BUDGET", "10"))
+
+# Priorities of DVSA calls - lower goes first
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BULK = 1
+PRIORITY_PREFETCH = 2  # Background refreshes of stale cache entries
+PRIORITY_NAMES = {PRIORITY_INTERACTIVE: "interactive", PRIORITY_BULK: "bulk", PRIORITY_PREFETCH: "prefetch"}
+
+# HTTP/2 needs the optional h2 package (pip install httpx[http2])
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
 # In-memory cache for tokens and vehicle data
 TOKEN_CACHE = {
     "access_token": None,
     "expires_at": 0,
 }
 
+class StringTable:
+    """
+    Strings shared by every compact cached vehicle, so a value that repeats across tests and
+    vehicles is held once. Values are never dropped; once the table is full,
+    new values are kept by their vehicles unshared.
+    """
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.values = {}
+
+    def __len__(self):
+        return len(self.values)
+
+    def intern(self, value):
+        """The shared copy of a value, added to the table if there's room"""
+        if value is None:
+            return None
+        shared = self.values.get(value)
+        if shared is None:
+            if len(self.values) >= self.max_entries:
+                return value
+            self.values[value] = shared = value
+        return shared
+
+    def owned_size(self, value) -> int:
+        """Bytes a value takes that aren't shared through the table"""
+        if value is None or isinstance(value, bool) or self.values.get(value) is value:
+            return 0
+        return sys.getsizeof(value)
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+EPOCH_ORDINAL = EPOCH.toordinal()
+ODOMETER_NOT_NUMERIC = -1  # In the odometer column - the value is kept in odometer_values
+
+def encode_timestamp(value: Optional[str]) -> Union[int, str, None]:
+    """A DVSA test time (2023-07-14T10:21:46.000Z) as epoch milliseconds, other values as they are"""
+    if not isinstance(value, str) or len(value) != 24 or not value.endswith("Z"):
+        return value
+    try:
+        millis = (datetime.fromisoformat(value[:-1] + "+00:00") - EPOCH) // timedelta(milliseconds=1)
+    except ValueError:
+        return value
+    return millis if decode_timestamp(millis) == value else value
+
+def decode_timestamp(value: Union[int, str, None]) -> Optional[str]:
+    if not isinstance(value, int):
+        return value
+    days, millis = divmod(value, 86400000)
+    seconds, millis = divmod(millis, 1000)
+    minutes, seconds = divmod(seconds, 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{date.fromordinal(EPOCH_ORDINAL + days).isoformat()}T{hours:02d}:{minutes:02d}:{seconds:02d}.{millis:03d}Z"
+
+def encode_date(value: Optional[str]) -> Union[int, str, None]:
+    """A YYYY-MM-DD date as its ordinal, other values as they are"""
+    if not isinstance(value, str) or len(value) != 10:
+        return value
+    try:
+        ordinal = date.fromisoformat(value).toordinal()
+    except ValueError:
+        return value
+    return ordinal if decode_date(ordinal) == value else value
+
+def decode_date(value: Union[int, str, None]) -> Optional[str]:
+    return date.fromordinal(value).isoformat() if isinstance(value, int) else value
+
+def encode_number(value: Optional[str]) -> Union[int, str, None]:
+    """A string of up to 18 digits without leading zeros as an int, other values as they are"""
+    if isinstance(value, str) and value.isdigit() and value.isascii() and len(value) <= 18 and str(int(value)) == value:
+        return int(value)
+    return value
+
+def decode_number(value: Union[int, str, None]) -> Optional[str]:
+    return str(value) if isinstance(value, int) else value
+
+def json_value(value: Union[str, bool, None]) -> str:
+    """A string, bool or None as JSON, escaped as the response model serializes it"""
+    if value is None:
+        return "null"
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return encode_basestring(value)
+
+class CompactMotTest:
+    """
+    One MOT test of a CompactVehicle - the odometer reading is in the vehicle's odometer column,
+    and each defect is its JSON, shared through the StringTable
+    """
+    __slots__ = ("completed", "result", "expiry", "unit", "result_type", "number", "data_source", "location", "defects")
+
+class CompactVehicle:
+    """
+    Vehicle data validated against the response model, held compactly: test times and dates as
+    ints, odometer readings in an array, tests as slotted records and repeated strings and
+    defects shared through a StringTable. Written out as the model's JSON output only when
+    served, by to_json() (to_dict() parses that back). nbytes is its approximate memory, less
+    the shared values.
+    """
+    __slots__ = ("kind", "fields", "tests", "odometers", "odometer_values", "nbytes")
+    
+    SHARED_FIELDS = {"make", "model", "fuelType", "primaryColour", "hasOutstandingRecall", "engineSize", "manufactureYear"}
+
+    @classmethod
+    def from_model(cls, vehicle: BaseModel, strings: StringTable) -> "CompactVehicle":
+        compact = cls()
+        compact.kind = type(vehicle)
+        compact.fields = tuple(
+            strings.intern(getattr(vehicle, name)) if name in cls.SHARED_FIELDS else getattr(vehicle, name)
+            for name in compact.kind.model_fields if name != "motTests"
+        )
+        compact.tests = None
+        compact.odometers = None
+        compact.odometer_values = None
+        nbytes = sys.getsizeof(compact) + sys.getsizeof(compact.fields) + sum(map(strings.owned_size, compact.fields))
+        
+        if "motTests" in compact.kind.model_fields:
+            records = []
+            compact.odometers = array("q")
+            for index, test in enumerate(vehicle.motTests):
+                record = CompactMotTest()
+                record.completed = encode_timestamp(test.completedDate)
+                record.result = strings.intern(test.testResult)
+                record.expiry = encode_date(test.expiryDate)
+                record.unit = strings.intern(test.odometerUnit)
+                record.result_type = strings.intern(test.odometerResultType)
+                record.number = encode_number(test.motTestNumber)
+                record.data_source = strings.intern(test.dataSource)
+                record.location = strings.intern(test.location)
+                record.defects = None if test.defects is None else tuple(
+                    strings.intern(
+                        f'{{"text":{json_value(defect.text)},"type":{json_value(defect.type)},"dangerous":{json_value(defect.dangerous)}}}'
+                    )
+                    for defect in test.defects
+                )
+                odometer = encode_number(test.odometerValue)
+                if isinstance(odometer, int):
+                    compact.odometers.append(odometer)
+                else:
+                    compact.odometers.append(ODOMETER_NOT_NUMERIC)
+                    if compact.odometer_values is None:
+                        compact.odometer_values = {}
+                    compact.odometer_values[index] = odometer
+                    nbytes += strings.owned_size(odometer)
+                records.append(record)
+                nbytes += sys.getsizeof(record) + sum(strings.owned_size(getattr(record, slot)) for slot in CompactMotTest.__slots__)
+                if record.defects:
+                    nbytes += sum(map(strings.owned_size, record.defects))
+            compact.tests = tuple(records)
+            nbytes += sys.getsizeof(compact.tests) + sys.getsizeof(compact.odometers)
+            if compact.odometer_values is not None:
+                nbytes += sys.getsizeof(compact.odometer_values)
+        compact.nbytes = nbytes
+        return compact
+
+    def test_json(self, index: int) -> str:
+        record = self.tests[index]
+        odometer = self.odometers[index]
+        odometer = self.odometer_values[index] if odometer == ODOMETER_NOT_NUMERIC else str(odometer)
+        defects = "null" if record.defects is None else "[" + ",".join(record.defects) + "]"
+        return (
+            f'{{"completedDate":{json_value(decode_timestamp(record.completed))},"testResult":{json_value(record.result)},'
+            f'"expiryDate":{json_value(decode_date(record.expiry))},"odometerValue":{json_value(odometer)},'
+            f'"odometerUnit":{json_value(record.unit)},"odometerResultType":{json_value(record.result_type)},'
+            f'"motTestNumber":{json_value(decode_number(record.number))},"dataSource":{json_value(record.data_source)},'
+            f'"location":{json_value(record.location)},"defects":{defects}}}'
+        )
+
+    def to_json(self) -> bytes:
+        """The response body of the vehicle"""
+        members = []
+        fields = iter(self.fields)
+        for name in self.kind.model_fields:
+            if name == "motTests":
+                value = "[" + ",".join(self.test_json(index) for index in range(len(self.tests))) + "]"
+            else:
+                value = json_value(next(fields))
+            members.append(f'"{name}":{value}')
+        return ("{" + ",".join(members) + "}").encode()
+
+    def to_dict(self) -> Dict[str, Any]:
+        """The vehicle as the response model outputs it"""
+        return json.loads(self.to_json())
+
+class HotBodies:
+    """
+    LRU of response bodies of recently served CompactVehicles, bounded by their total size. A
+    body is kept with the vehicle it was written from and only returned for that vehicle, so
+    a refreshed cache entry gets a new one; the vehicles are held while their bodies are.
+    """
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.bodies = OrderedDict()  # Least recently used first
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str, vehicle: CompactVehicle) -> Optional[bytes]:
+        kept = self.bodies.get(key)
+        if kept is None or kept[0] is not vehicle:
+            self.misses += 1
+            return None
+        self.bodies.move_to_end(key)
+        self.hits += 1
+        return kept[1]
+
+    def set(self, key: str, vehicle: CompactVehicle, body: bytes):
+        self.remove(key)
+        if len(body) > self.max_bytes:
+            return
+        self.bodies[key] = (vehicle, body)
+        self.bytes += len(body)
+        while self.bytes > self.max_bytes:
+            _, (_, evicted) = self.bodies.popitem(last=False)
+            self.bytes -= len(evicted)
+
+    def remove(self, key: str):
+        kept = self.bodies.pop(key, None)
+        if kept is not None:
+            self.bytes -= len(kept[1])
+
+    def clear(self):
+        self.bodies.clear()
+        self.bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self.bodies),
+            "bytes": self.bytes,
+            "maxBytes": self.max_bytes,
+            "hitRatio": round(self.hits / lookups, 3) if lookups else 0.0
+        }
+
+class VehicleCache:
+    """
+    LRU cache for vehicle data bounded by entry count and by approximate size in bytes - the
+    memory of a CompactVehicle (less its shared strings), or the JSON size of data kept as
+    parsed JSON, which takes a few times more. Entries are fresh for the TTL and kept as stale
+    data until the retention time; older entries are dropped when looked up and by sweep().
+    """
+    def __init__(self, max_entries: int, max_bytes: int, ttl: float, retention: float):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.retention = max(retention, ttl)
+        self.entries = OrderedDict()  # Least recently used first
+        self.bytes = 0
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key: str) -> Tuple[Optional[Union[CompactVehicle, Dict[str, Any]]], float]:
+        """
+        Return (data, age in seconds) for a key, fresh or stale, and mark it most recently
+        used. (None, 0) when there is no entry within the retention time.
+        """
+        entry = self.entries.get(key)
+        age = time.time() - entry["timestamp"] if entry is not None else 0
+        if entry is not None and age >= self.retention:
+            self.remove(key)
+            self.expirations += 1
+            entry = None
+        
+        if entry is None:
+            self.misses += 1
+            return None, 0
+        
+        self.entries.move_to_end(key)
+        if age < self.ttl:
+            self.hits += 1
+        else:
+            self.stale_hits += 1
+        return entry["data"], age
+
+    def set(self, key: str, data: Union[CompactVehicle, Dict[str, Any]], timestamp: Optional[float] = None):
+        """
+        Store data for a key, fetched at timestamp (now by default), evicting least recently
+        used entries to stay within bounds
+        """
+        size = data.nbytes if isinstance(data, CompactVehicle) else len(json.dumps(data, separators=(",", ":")))
+        self.remove(key)
+        if size > self.max_bytes:
+            logger.warning(f"Not caching {key}: {size} bytes is over the cache limit")
+            return
+        
+        self.entries[key] = {"data": data, "timestamp": timestamp or time.time(), "size": size}
+        self.bytes += size
+        while len(self.entries) > self.max_entries or self.bytes > self.max_bytes:
+            _, evicted = self.entries.popitem(last=False)
+            self.bytes -= evicted["size"]
+            self.evictions += 1
+
+    def attach(self, key: str, data: Dict[str, Any], name: str, value: Union[Dict[str, Any], bytes]):
+        """
+        Keep a value derived from a key's data with its entry, so it goes when the data is
+        replaced or evicted. Nothing is kept if the entry no longer holds that data. Counts
+        towards the size bound like the data, evicting least recently used entries to stay
+        within it.
+        """
+        entry = self.entries.get(key)
+        if entry is None or entry["data"] is not data:
+            return
+        derived = entry.setdefault("derived", {})
+        previous = derived.get(name)
+        size = len(value) if isinstance(value, bytes) else len(json.dumps(value, separators=(",", ":")))
+        if previous is not None:
+            size -= len(previous) if isinstance(previous, bytes) else len(json.dumps(previous, separators=(",", ":")))
+        derived[name] = value
+        entry["size"] += size
+        self.bytes += size
+        while self.bytes > self.max_bytes:
+            _, evicted = self.entries.popitem(last=False)
+            self.bytes -= evicted["size"]
+            self.evictions += 1
+
+    def derived(self, key: str, data: Dict[str, Any], name: str) -> Optional[Union[Dict[str, Any], bytes]]:
+        """A value attached to a key's entry, if the entry still holds that data"""
+        entry = self.entries.get(key)
+        if entry is None or entry["data"] is not data:
+            return None
+        return entry.get("derived", {}).get(name)
+
+    def remove(self, key: str):
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.bytes -= entry["size"]
+
+    def sweep(self) -> int:
+        """Drop every entry past the retention time, returning how many were dropped"""
+        cutoff = time.time() - self.retention
+        expired = [key for key, entry in self.entries.items() if entry["timestamp"] <= cutoff]
+        for key in expired:
+            self.remove(key)
+        self.expirations += len(expired)
+        return len(expired)
+
+    def clear(self):
+        self.entries.clear()
+        self.bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            "size": len(self.entries),
+            "bytes": self.bytes,
+            "maxEntries": self.max_entries,
+            "maxBytes": self.max_bytes,
+            "hits": self.hits,
+            "staleHits": self.stale_hits,
+            "misses": self.misses,
+            "hitRatio": round(self.hits / lookups, 3) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations
+        }
+
+class VehicleIdentities:
+    """
+    Registration <-> VIN index learned from MOT responses, so a vehicle looked up by either is
+    cached once, under its registration, and found by both. Holds up to max_entries pairs, the
+    least recently used going first. Linking a VIN to a new registration (or a registration to
+    another VIN, as when a private plate moves) drops the pair it replaces.
+    """
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.registrations = OrderedDict()  # VIN -> registration, least recently used first
+        self.vins = {}  # Registration -> VIN
+
+    def __len__(self):
+        return len(self.registrations)
+
+    def link(self, registration: str, vin: str):
+        self.unlink(self.vins.get(registration), registration)
+        self.unlink(vin, self.registrations.get(vin))
+        self.registrations[vin] = registration
+        self.vins[registration] = vin
+        while len(self.registrations) > self.max_entries:
+            self.unlink(*self.registrations.popitem(last=False))
+
+    def unlink(self, vin: Optional[str], registration: Optional[str]):
+        if vin in self.registrations and self.registrations[vin] == registration:
+            del self.registrations[vin]
+        if registration in self.vins and self.vins[registration] == vin:
+            del self.vins[registration]
+
+    def registration_for(self, vin: str) -> Optional[str]:
+        registration = self.registrations.get(vin)
+        if registration is not None:
+            self.registrations.move_to_end(vin)
+        return registration
+
+    def vin_for(self, registration: str) -> Optional[str]:
+        return self.vins.get(registration)
+
+    def clear(self):
+        self.registrations.clear()
+        self.vins.clear()
+
+class VehicleStore:
+    """
+    Persistent vehicle cache in SQLite, read through by VehicleCache on a miss. Each row holds
+    the zlib-compressed JSON data with the time it was fetched, the time it expires and the VIN
+    of the vehicle where known, so a VIN lookup finds a vehicle fetched by registration; expired
+    rows are deleted by compact(), which also hands the freed pages back to the file system.
+    The database runs in WAL mode, so the uvicorn workers on a host can share the file - readers
+    don't block the writer, and writers wait up to VEHICLE_STORE_BUSY_TIMEOUT for each other.
+    Calls block, so the service makes them from a worker thread. Storage errors are logged and
+    treated as misses - the store is only ever a cache. dvla_api has its own copy, as the services
+    share no code and deploy separately - WAL, pragma and compression fixes belong in both.
+    """
+    def __init__(self, path: str, retention: float, compression_level: int = 6, busy_timeout: float = 5):
+        self.path = path
+        self.retention = retention
+        self.compression_level = compression_level
+        self.busy_timeout = busy_timeout
+        self.connection: Optional[sqlite3.Connection] = None
+        self.lock = threading.Lock()  # One connection per process, used from several threads
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.errors = 0
+        self.compacted = 0
+
+    def connect(self) -> sqlite3.Connection:
+        if self.connection is None:
+            connection = sqlite3.connect(self.path, timeout=self.busy_timeout, check_same_thread=False, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")  # Durable enough for a cache, and no fsync per write
+            connection.execute("PRAGMA auto_vacuum=INCREMENTAL")  # Only takes effect on a new database
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS vehicles ("
+                "key TEXT PRIMARY KEY, stored_at REAL NOT NULL, expires_at REAL NOT NULL, "
+                "size INTEGER NOT NULL, data BLOB NOT NULL, vin TEXT)"
+            )
+            if "vin" not in {column[1] for column in connection.execute("PRAGMA table_info(vehicles)")}:
+                connection.execute("ALTER TABLE vehicles ADD COLUMN vin TEXT")  # Stores from before the VIN index
+            connection.execute("CREATE INDEX IF NOT EXISTS vehicles_expires_at ON vehicles (expires_at)")
+            connection.execute("CREATE INDEX IF NOT EXISTS vehicles_vin ON vehicles (vin) WHERE vin IS NOT NULL")
+            self.connection = connection
+        return self.connection
+
+    def get(self, key: str) -> Tuple[Optional[Dict[str, Any]], float]:
+        """Return (data, time stored) for a key within the retention time, or (None, 0)"""
+        try:
+            with self.lock:
+                row = self.connect().execute(
+                    "SELECT stored_at, data FROM vehicles WHERE key = ? AND expires_at > ?", (key, time.time())
+                ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None, 0
+            data = json.loads(zlib.decompress(row[1]))
+        except (sqlite3.Error, zlib.error, ValueError) as e:
+            self.errors += 1
+            logger.warning(f"Vehicle store read failed for {key}: {str(e)}")
+            return None, 0
+        self.hits += 1
+        return data, row[0]
+
+    def set(self, key: str, data: Dict[str, Any], stored_at: Optional[float] = None, vin: Optional[str] = None):
+        """Store data for a key, replacing any older copy"""
+        stored_at = stored_at or time.time()
+        blob = zlib.compress(json.dumps(data, separators=(",", ":")).encode("utf-8"), self.compression_level)
+        try:
+            with self.lock:
+                self.connect().execute(
+                    "INSERT INTO vehicles (key, stored_at, expires_at, size, data, vin) VALUES (?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT (key) DO UPDATE SET stored_at = excluded.stored_at, expires_at = excluded.expires_at, "
+                    "size = excluded.size, data = excluded.data, vin = COALESCE(excluded.vin, vehicles.vin) "
+                    "WHERE excluded.stored_at >= vehicles.stored_at",
+                    (key, stored_at, stored_at + self.retention, len(blob), blob, vin)
+                )
+        except sqlite3.Error as e:
+            self.errors += 1
+            logger.warning(f"Vehicle store write failed for {key}: {str(e)}")
+            return
+        self.writes += 1
+
+    def key_for_vin(self, vin: str) -> Optional[str]:
+        """Key of the newest row within the retention time for a VIN, if any"""
+        try:
+            with self.lock:
+                row = self.connect().execute(
+                    "SELECT key FROM vehicles WHERE vin = ? AND expires_at > ? ORDER BY stored_at DESC LIMIT 1", (vin, time.time())
+                ).fetchone()
+        except sqlite3.Error as e:
+            self.errors += 1
+            logger.warning(f"Vehicle store VIN lookup failed for {vin}: {str(e)}")
+            return None
+        return row[0] if row is not None else None
+
+    def remove(self, key: str):
+        try:
+            with self.lock:
+                self.connect().execute("DELETE FROM vehicles WHERE key = ?", (key,))
+        except sqlite3.Error as e:
+            self.errors += 1
+            logger.warning(f"Vehicle store delete failed for {key}: {str(e)}")
+
+    def compact(self) -> int:
+        """Delete expired rows and release the free pages, returning how many rows were deleted"""
+        try:
+            with self.lock:
+                connection = self.connect()
+                deleted = connection.execute("DELETE FROM vehicles WHERE expires_at <= ?", (time.time(),)).rowcount
+                connection.execute("PRAGMA incremental_vacuum")
+                connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        except sqlite3.Error as e:
+            self.errors += 1
+            logger.warning(f"Vehicle store compaction failed: {str(e)}")
+            return 0
+        self.compacted += deleted
+        return deleted
+
+    def clear(self):
+        try:
+            with self.lock:
+                self.connect().execute("DELETE FROM vehicles")
+        except sqlite3.Error as e:
+            self.errors += 1
+            logger.warning(f"Vehicle store clear failed: {str(e)}")
+
+    def close(self):
+        with self.lock:
+            if self.connection is not None:
+                self.connection.close()
+                self.connection = None
+
+    def stats(self) -> Dict[str, Any]:
+        try:
+            with self.lock:
+                rows, stored_bytes = self.connect().execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM vehicles").fetchone()
+        except sqlite3.Error:
+            rows, stored_bytes = None, None
+        return {
+            "path": self.path,
+            "rows": rows,
+            "compressedBytes": stored_bytes,
+            "fileBytes": sum(os.path.getsize(self.path + suffix) for suffix in ("", "-wal") if os.path.exists(self.path + suffix)),
+            "hits": self.hits,
+            "misses": self.misses,
+            "writes": self.writes,
+            "errors": self.errors,
+            "compacted": self.compacted
+        }
+
+class MotDataset:
+    """
+    Read-only view of the local MOT dataset written by utils/Bulk-Data/mot_bulk_ingest.py -
+    vehicle histories as of the date of the latest bulk or delta file ingested. A vehicle is
+    answered from it only while it can't have been tested since: its last test was a pass and
+    the window for testing early, before that MOT runs out, hasn't opened yet (for a vehicle
+    yet to have an MOT, before its first one is due). Vehicles it doesn't have, ones that may
+    have a recent test, and every vehicle once the dataset is older than max_age_days are left
+    to the live API. Calls block, so the service makes them from a worker thread.
+    """
+    AS_OF_CHECK_INTERVAL = 60  # Seconds between checks for newly ingested files
+
+    def __init__(self, path: str, max_age_days: int, test_window_days: int):
+        self.path = path
+        self.max_age = timedelta(days=max_age_days)
+        self.test_window = timedelta(days=test_window_days)
+        self.connection: Optional[sqlite3.Connection] = None
+        self.lock = threading.Lock()
+        self.dataset_as_of: Optional[date] = None
+        self.as_of_checked_at = 0.0
+        self.hits = 0
+        self.misses = 0
+        self.may_be_tested = 0
+        self.out_of_date = 0
+        self.errors = 0
+
+    def connect(self) -> sqlite3.Connection:
+        if self.connection is None:
+            self.connection = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, check_same_thread=False, isolation_level=None)
+        return self.connection
+
+    def as_of(self) -> Optional[date]:
+        """Date of the latest file ingested in full"""
+        if time.monotonic() - self.as_of_checked_at >= self.AS_OF_CHECK_INTERVAL:
+            row = self.connect().execute("SELECT MAX(as_of) FROM ingested_files WHERE done = 1").fetchone()
+            self.dataset_as_of = date.fromisoformat(row[0]) if row[0] else None
+            self.as_of_checked_at = time.monotonic()
+        return self.dataset_as_of
+
+    def may_have_new_test(self, data: Dict[str, Any], today: date) -> bool:
+        tests = data.get("motTests") or []
+        if tests:
+            latest = max(tests, key=lambda test: test.get("completedDate") or "")
+            if str(latest.get("testResult") or "").upper() != "PASSED":
+                return True  # Retests can come at any time
+            due = latest.get("expiryDate")
+        else:
+            due = data.get("motTestDueDate")
+        try:
+            due = date.fromisoformat(str(due)[:10])
+        except ValueError:
+            return True
+        return due - self.test_window <= today
+
+    def get(self, lookup: str, value: str) -> Optional[Dict[str, Any]]:
+        """A vehicle's data by registration or VIN (normalized), or None to ask the live API"""
+        column = "registration" if lookup == "registration" else "vin"
+        today = datetime.now(timezone.utc).date()
+        try:
+            with self.lock:
+                as_of = self.as_of()
+                if as_of is None or today - as_of > self.max_age:
+                    self.out_of_date += 1
+                    return None
+                # The newest copy, should a VIN have moved to another registration
+                row = self.connect().execute(
+                    f"SELECT data FROM vehicles WHERE {column} = ? ORDER BY as_of DESC LIMIT 1", (value,)
+                ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            data = json.loads(zlib.decompress(row[0]))
+        except (sqlite3.Error, zlib.error, ValueError) as e:
+            self.errors += 1
+            logger.warning(f"MOT dataset read failed for {lookup} {value}: {str(e)}")
+            return None
+        if self.may_have_new_test(data, today):
+            self.may_be_tested += 1
+            return None
+        self.hits += 1
+        return data
+
+    def close(self):
+        with self.lock:
+            if self.connection is not None:
+                self.connection.close()
+                self.connection = None
+
+    def stats(self) -> Dict[str, Any]:
+        try:
+            with self.lock:
+                as_of = self.as_of()
+                vehicles = self.connect().execute("SELECT COUNT(*) FROM vehicles").fetchone()[0]
+        except sqlite3.Error:
+            as_of, vehicles = None, None
+        return {
+            "path": self.path,
+            "asOf": as_of.isoformat() if as_of else None,
+            "vehicles": vehicles,
+            "hits": self.hits,
+            "misses": self.misses,
+            "mayHaveNewTest": self.may_be_tested,
+            "outOfDate": self.out_of_date,
+            "errors": self.errors
+        }
+
+class UpstreamScheduler:
+    """
+    Client-side scheduler keeping DVSA calls within the API quotas. A token bucket refilled at
+    `rate` calls a second, holding up to `burst`, paces the calls, and a counter reset at
+    midnight UTC enforces the daily quota. Callers queue by priority, so interactive lookups
+    go ahead of bulk lookups and both ahead of background refreshes. A caller whose expected
+    wait is over the budget of its priority is turned away at once with a 503, as is every
+    caller once the daily quota is used up. A 429 from DVSA empties the bucket until its
+    Retry-After has passed.
+    """
+    def __init__(self, rate: float, burst: int, daily_quota: int, wait_budgets: Dict[int, float]):
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self.daily_quota = daily_quota
+        self.wait_budgets = wait_budgets
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.queue: List[Tuple[int, int, asyncio.Future]] = []  # Heap of (priority, arrival, waiter)
+        self.arrivals = 0
+        self.dispatcher: Optional[asyncio.Task] = None
+        self.day = datetime.now(timezone.utc).date()
+        self.day_calls = 0
+        self.waiting = {priority: 0 for priority in wait_budgets}
+        self.granted = {priority: 0 for priority in wait_budgets}
+        self.rejected = {priority: 0 for priority in wait_budgets}
+        self.peak_queue = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.throttled = 0
+
+    def refill(self):
+        now = time.monotonic()
+        if now < self.paused_until:
+            self.tokens = 0
+        else:
+            self.tokens = min(self.burst, self.tokens + (now - max(self.updated, self.paused_until)) * self.rate)
+        self.updated = now
+
+    def expected_wait(self, priority: int) -> float:
+        """Seconds until a new caller of this priority would get its turn"""
+        ahead = sum(count for queued_priority, count in self.waiting.items() if queued_priority <= priority)
+        return max(0.0, ahead + 1 - self.tokens) / self.rate + max(0.0, self.paused_until - time.monotonic())
+
+    def reject(self, priority: int, detail: str, retry_after: float):
+        self.rejected[priority] += 1
+        raise HTTPException(status_code=503, detail=detail, headers={"Retry-After": str(max(1, math.ceil(retry_after)))})
+
+    async def acquire(self, priority: int = PRIORITY_INTERACTIVE):
+        """Wait for this caller's turn to call DVSA, or raise a 503 HTTPException"""
+        now = datetime.now(timezone.utc)
+        if now.date() != self.day:
+            self.day, self.day_calls = now.date(), 0
+        if self.daily_quota and self.day_calls + len(self.queue) >= self.daily_quota:
+            midnight = datetime.combine(now.date() + timedelta(days=1), datetime.min.time(), timezone.utc)
+            self.reject(priority, "Daily MOT API quota used up", (midnight - now).total_seconds())
+        
+        if self.rate <= 0:
+            return self.grant(priority, 0)
+        
+        self.refill()
+        if not self.queue and self.tokens >= 1:
+            self.tokens -= 1
+            return self.grant(priority, 0)
+        
+        wait = self.expected_wait(priority)
+        if wait > self.wait_budgets[priority]:
+            logger.warning(f"Turning away {PRIORITY_NAMES[priority]} MOT API call: expected wait {wait:.1f}s, {len(self.queue)} queued")
+            self.reject(priority, "MOT API is busy, please try again shortly", wait)
+        
+        waiter = asyncio.get_running_loop().create_future()
+        heapq.heappush(self.queue, (priority, self.arrivals, waiter))
+        self.arrivals += 1
+        self.waiting[priority] += 1
+        self.peak_queue = max(self.peak_queue, len(self.queue))
+        if self.dispatcher is None or self.dispatcher.done():
+            self.dispatcher = asyncio.create_task(self.dispatch())
+        
+        started = time.monotonic()
+        await waiter
+        self.grant(priority, time.monotonic() - started)
+
+    def grant(self, priority: int, waited: float):
+        self.day_calls += 1
+        self.granted[priority] += 1
+        self.total_wait += waited
+        self.max_wait = max(self.max_wait, waited)
+
+    async def dispatch(self):
+        """Hand out tokens to queued callers, highest priority first, as the bucket refills"""
+        while self.queue:
+            self.refill()
+            if self.tokens < 1:
+                await asyncio.sleep(max(self.paused_until - time.monotonic(), (1 - self.tokens) / self.rate))
+                continue
+            priority, _, waiter = heapq.heappop(self.queue)
+            self.waiting[priority] -= 1
+            if not waiter.done():  # Skip callers that went away
+                self.tokens -= 1
+                waiter.set_result(None)
+
+    def pause(self, seconds: float):
+        """Stop calling DVSA for a while after it answered 429"""
+        self.throttled += 1
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+        self.tokens = 0
+
+    def stats(self) -> Dict[str, Any]:
+        granted = sum(self.granted.values())
+        return {
+            "ratePerSecond": self.rate,
+            "burst": self.burst,
+            "tokens": round(self.tokens, 2),
+            "queueDepth": {PRIORITY_NAMES[priority]: count for priority, count in self.waiting.items()},
+            "peakQueueDepth": self.peak_queue,
+            "granted": {PRIORITY_NAMES[priority]: count for priority, count in self.granted.items()},
+            "rejected": {PRIORITY_NAMES[priority]: count for priority, count in self.rejected.items()},
+            "averageWait": round(self.total_wait / granted, 3) if granted else 0.0,
+            "maxWait": round(self.max_wait, 3),
+            "throttledByUpstream": self.throttled,
+            "dailyCalls": self.day_calls,
+            "dailyQuota": self.daily_quota
+        }
+
 # Vehicle data cache with TTL (5 minutes)
-VEHICLE_CACHE = {}
+VEHICLE_CACHE_RETENTION = VEHICLE_CACHE_TTL + max(VEHICLE_STALE_WHILE_REVALIDATE, VEHICLE_STALE_IF_ERROR)
+VEHICLE_STRINGS = StringTable(VEHICLE_STRING_TABLE_MAX_ENTRIES)
+VEHICLE_HOT_BODIES = HotBodies(VEHICLE_HOT_BODIES_MAX_BYTES)
+VEHICLE_CACHE = VehicleCache(VEHICLE_CACHE_MAX_ENTRIES, VEHICLE_CACHE_MAX_BYTES, VEHICLE_CACHE_TTL, VEHICLE_CACHE_RETENTION)
+VEHICLE_IDENTITIES = VehicleIdentities(VEHICLE_IDENTITY_MAX_ENTRIES)
+VEHICLE_STORE = VehicleStore(
+    VEHICLE_STORE_PATH, VEHICLE_CACHE_RETENTION, VEHICLE_STORE_COMPRESSION_LEVEL, VEHICLE_STORE_BUSY_TIMEOUT
+) if VEHICLE_STORE_PATH else None
+MOT_DATASET = MotDataset(MOT_DATASET_PATH, MOT_DATASET_MAX_AGE_DAYS, MOT_DATASET_TEST_WINDOW_DAYS) if MOT_DATASET_PATH else None
+cache_sweeper_task: Optional[asyncio.Task] = None
+store_compactor_task: Optional[asyncio.Task] = None
+
+# Upstream vehicle fetches in flight per cache key - concurrent misses for a vehicle share one
+VEHICLE_FETCHES: Dict[str, asyncio.Task] = {}
+UPSTREAM_STATS = {"upstreamCalls": 0, "datasetAnswers": 0, "coalescedRequests": 0, "backgroundRefreshes": 0, "staleOnError": 0}
+BULK_UPSTREAM_SLOTS = asyncio.Semaphore(BULK_UPSTREAM_CONCURRENCY)
+UPSTREAM_SCHEDULER = UpstreamScheduler(UPSTREAM_RATE_LIMIT, UPSTREAM_BURST, UPSTREAM_DAILY_QUOTA, {
+    PRIORITY_INTERACTIVE: UPSTREAM_WAIT_BUDGET,
+    PRIORITY_BULK: UPSTREAM_BULK_WAIT_BUDGET,
+    PRIORITY_PREFETCH: UPSTREAM_PREFETCH_WAIT_BUDGET
+})
+
+# In-flight token refresh shared by every caller, and the background renewal task
+token_refresh: Optional[asyncio.Task] = None
+token_renewal_task: Optional[asyncio.Task] = None
+
+# Shared upstream client - one keep-alive connection pool for DVSA and the token endpoint
+http_client: Optional[httpx.AsyncClient] = None
+
+def get_http_client() -> httpx.AsyncClient:
+    """Return the shared upstream client, creating it on first use"""
+    global http_client
+    if http_client is None or http_client.is_closed:
+        http_client = httpx.AsyncClient(
+            http2=HTTP2_AVAILABLE,
+            timeout=httpx.Timeout(UPSTREAM_TIMEOUT, connect=UPSTREAM_CONNECT_TIMEOUT, pool=UPSTREAM_POOL_TIMEOUT),
+            limits=httpx.Limits(
+                max_connections=UPSTREAM_MAX_CONNECTIONS,
+                max_keepalive_connections=UPSTREAM_MAX_KEEPALIVE,
+                keepalive_expiry=UPSTREAM_KEEPALIVE_EXPIRY
+            )
+        )
+        logger.info(f"Created upstream client (HTTP/2: {HTTP2_AVAILABLE}, max connections: {UPSTREAM_MAX_CONNECTIONS})")
+    return http_client
+
+@app.on_event("startup")
+async def startup_event():
+    """
+    Open the upstream connection pool and the vehicle store, start renewing the access token,
+    sweeping the cache and compacting the store
+    """
+    global token_renewal_task, cache_sweeper_task, store_compactor_task
+    get_http_client()
+    token_renewal_task = asyncio.create_task(renew_access_token())
+    cache_sweeper_task = asyncio.create_task(sweep_vehicle_cache())
+    if VEHICLE_STORE is not None:
+        await asyncio.to_thread(VEHICLE_STORE.connect)
+        store_compactor_task = asyncio.create_task(compact_vehicle_store())
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop the background tasks and close the upstream connection pool, the vehicle store and the MOT dataset"""
+    for task in (token_renewal_task, cache_sweeper_task, store_compactor_task):
+        if task is not None:
+            task.cancel()
+    if http_client is not None:
+        await http_client.aclose()
+    if VEHICLE_STORE is not None:
+        VEHICLE_STORE.close()
+    if MOT_DATASET is not None:
+        MOT_DATASET.close()
 
 # Pydantic models for API responses
 class Defect(BaseModel):
@@ -124,27 +1075,68 @@ class NewRegVehicle(VehicleBase):
     manufactureYear: Optional[str] = None
     motTestDueDate: Optional[str] = None
 
+# Validates and serializes vehicle data as the vehicle endpoints' response model would
+VEHICLE_RESPONSE = TypeAdapter(Union[VehicleWithMot, NewRegVehicle])
+
 class ErrorResponse(BaseModel):
     status: str = "error"
     errorCode: Optional[str] = None
     errorMessage: str
     requestId: Optional[str] = None
 
+class BulkVehicleRequest(BaseModel):
+    registrations: List[str] = Field(..., description="Registration numbers - spacing, case and duplicates don't matter")
+
 # Auth dependency with caching
 async def get_access_token() -> str:
     """
     Get OAuth access token for the MOT API with caching.
     Returns the token as a string.
     """
-    global TOKEN_CACHE
-    
     # Check if we have a valid cached token
     current_time = time.time()
     if TOKEN_CACHE["access_token"] and TOKEN_CACHE["expires_at"] > current_time + 60:
         # Add a 60-second buffer to ensure token is still valid
         return TOKEN_CACHE["access_token"]
     
-    # Get a new token
+    return await refresh_access_token()
+
+async def refresh_access_token() -> str:
+    """
+    Get a new token, with at most one token request in flight - concurrent callers
+    all wait for the same request and share its token or its error.
+    """
+    global token_refresh
+    if token_refresh is None:
+        token_refresh = asyncio.create_task(request_access_token())
+        token_refresh.add_done_callback(clear_token_refresh)
+    
+    # Shielded, so a caller that goes away doesn't cancel the refresh for the others
+    return await asyncio.shield(token_refresh)
+
+def clear_token_refresh(task: asyncio.Task):
+    """Let the next refresh start a new token request"""
+    global token_refresh
+    if token_refresh is task:
+        token_refresh = None
+    if not task.cancelled():
+        task.exception()  # Retrieved here too in case every waiter went away
+
+async def renew_access_token():
+    """Background task keeping a token cached - renews it TOKEN_RENEW_BEFORE seconds before expiry"""
+    while True:
+        if TOKEN_CACHE["access_token"]:
+            # At least a second apart, should the token endpoint hand out very short lived tokens
+            await asyncio.sleep(max(TOKEN_CACHE["expires_at"] - TOKEN_RENEW_BEFORE - time.time(), 1))
+        
+        try:
+            await refresh_access_token()
+        except Exception as e:
+            logger.warning(f"Background token renewal failed, retrying in {TOKEN_RETRY_INTERVAL}s: {str(e)}")
+            await asyncio.sleep(TOKEN_RETRY_INTERVAL)
+
+async def request_access_token() -> str:
+    """Request a new token from the token endpoint and cache it"""
     client_id = os.environ.get("MOT_CLIENT_ID")
     client_secret = os.environ.get("MOT_CLIENT_SECRET")
     tenant_id = os.environ.get("MOT_TENANT_ID")
@@ -156,7 +1148,7 @@ async def get_access_token() -> str:
             detail="Missing authentication configuration. Check environment variables."
         )
     
-    token_url = f"https://login.microsoftonline.com/{tenant_id}/oauth2/v2.0/token"
+    token_url = MOT_TOKEN_URL or f"https://login.microsoftonline.com/{tenant_id}/oauth2/v2.0/token"
     
     payload = {
         'grant_type': 'client_credentials',
@@ -171,7 +1163,8 @@ async def get_access_token() -> str:
     
     try:
         logger.info("Requesting new access token")
-        response = requests.post(token_url, data=payload, headers=headers)
+        current_time = time.time()
+        response = await get_http_client().post(token_url, data=payload, headers=headers)
         response.raise_for_status()
         token_data = response.json()
         
@@ -182,51 +1175,109 @@ async def get_access_token() -> str:
         
         logger.info("Successfully obtained new access token")
         return TOKEN_CACHE["access_token"]
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
         logger.error(f"Failed to authenticate with MOT API: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to authenticate with MOT API: {str(e)}")
 
 # Helper functions
-def is_cache_valid(cache_key):
-    """Check if a cache entry is still valid."""
-    if cache_key in VEHICLE_CACHE:
-        cache_time = VEHICLE_CACHE[cache_key]["timestamp"]
-        return (time.time() - cache_time) < VEHICLE_CACHE_TTL
-    return False
-
-async def get_cached_vehicle_data(cache_key):
-    """Get vehicle data from cache if available and valid."""
-    if is_cache_valid(cache_key):
-        logger.debug(f"Cache hit for {cache_key}")
-        return VEHICLE_CACHE[cache_key]["data"]
-    logger.debug(f"Cache miss for {cache_key}")
-    return None
+def compact_vehicle(data: Dict[str, Any]) -> Union[CompactVehicle, Dict[str, Any]]:
+    """
+    Vehicle data in the form it is cached in - validated against the response model and made
+    a CompactVehicle, or the parsed JSON as it is when VEHICLE_CACHE_COMPACT is off or it
+    doesn't validate (the response model then rejects it when it's served, as it always has)
+    """
+    if not VEHICLE_CACHE_COMPACT:
+        return data
+    try:
+        vehicle = VEHICLE_RESPONSE.validate_python(data)
+    except ValidationError:
+        return data
+    return CompactVehicle.from_model(vehicle, VEHICLE_STRINGS)
 
-def update_vehicle_cache(cache_key, data):
-    """Update the vehicle cache with new data."""
-    VEHICLE_CACHE[cache_key] = {
-        "data": data,
-        "timestamp": time.time()
-    }
+def vehicle_dict(data: Union[CompactVehicle, Dict[str, Any]]) -> Dict[str, Any]:
+    """Cached vehicle data as parsed JSON, expanding a CompactVehicle"""
+    return data.to_dict() if isinstance(data, CompactVehicle) else data
+
+def identify_vehicle(lookup: str, value: str, data: Dict[str, Any]) -> str:
+    """
+    Cache key for data fetched by a lookup - its registration's, when it has one, with the VIN
+    (looked up by, or in the data) linked to it. An entry still cached under the VIN alone is
+    superseded and dropped.
+    """
+    registration = normalize_lookup_value(data.get("registration") or "")
+    if not registration:
+        return vehicle_cache_key(lookup, value)
+    vin = normalize_lookup_value(value if lookup == "vin" else data.get("vin") or "")
+    if vin:
+        VEHICLE_IDENTITIES.link(registration, vin)
+        VEHICLE_CACHE.remove(f"vin_{vin}")
+        VEHICLE_HOT_BODIES.remove(f"vin_{vin}")
+    return f"reg_{registration}"
+
+async def update_vehicle_cache(cache_key, data) -> Union[CompactVehicle, Dict[str, Any]]:
+    """
+    Update the vehicle cache with new data, writing it through to the vehicle store. Returns the
+    data as cached.
+    """
+    stored_at = time.time()
+    cached_data = compact_vehicle(data)
+    VEHICLE_CACHE.set(cache_key, cached_data, stored_at)
+    if VEHICLE_STORE is not None:
+        vin = VEHICLE_IDENTITIES.vin_for(cache_key[4:]) if cache_key.startswith("reg_") else None
+        await asyncio.to_thread(VEHICLE_STORE.set, cache_key, data, stored_at, vin)
     logger.debug(f"Updated cache for {cache_key}")
+    return cached_data
 
-async def get_vehicle_by_registration(registration: str, access_token: str) -> Dict[str, Any]:
-    """Get vehicle details from the MOT API using registration number with caching."""
-    # Check cache first
-    cache_key = f"reg_{registration.upper()}"
-    cached_data = await get_cached_vehicle_data(cache_key)
-    if cached_data:
-        return cached_data
-    
+async def load_stored_vehicle(cache_key: str) -> Tuple[Optional[Dict[str, Any]], float]:
+    """
+    Look a key up in the vehicle store, as (data, time stored). (None, 0) when the store is
+    off or has no copy within the retention time. A VIN not yet in the identity index is looked
+    for among the vehicles stored by registration, and linked to it when found.
+    """
+    if VEHICLE_STORE is None:
+        return None, 0
+    if cache_key.startswith("vin_"):
+        stored_key = await asyncio.to_thread(VEHICLE_STORE.key_for_vin, cache_key[4:])
+        if stored_key is not None and stored_key.startswith("reg_"):
+            VEHICLE_IDENTITIES.link(stored_key[4:], cache_key[4:])
+            cache_key = stored_key
+    return await asyncio.to_thread(VEHICLE_STORE.get, cache_key)
+
+async def load_dataset_vehicle(lookup: str, value: str) -> Optional[Dict[str, Any]]:
+    """A vehicle from the local MOT dataset, or None when it's off or the live API has to be asked"""
+    if MOT_DATASET is None:
+        return None
+    return await asyncio.to_thread(MOT_DATASET.get, lookup, value)
+
+async def sweep_vehicle_cache():
+    """Background task dropping expired vehicle cache entries every VEHICLE_CACHE_SWEEP_INTERVAL seconds"""
+    while True:
+        await asyncio.sleep(VEHICLE_CACHE_SWEEP_INTERVAL)
+        expired = VEHICLE_CACHE.sweep()
+        if expired:
+            logger.info(f"Swept {expired} expired vehicle cache entries ({len(VEHICLE_CACHE)} left, {VEHICLE_CACHE.bytes} bytes)")
+
+async def compact_vehicle_store():
+    """Background task deleting expired vehicle store rows every VEHICLE_STORE_COMPACT_INTERVAL seconds"""
+    while True:
+        await asyncio.sleep(VEHICLE_STORE_COMPACT_INTERVAL)
+        deleted = await asyncio.to_thread(VEHICLE_STORE.compact)
+        if deleted:
+            logger.info(f"Compacted vehicle store: deleted {deleted} expired rows")
+
+async def fetch_mot_vehicle(lookup: str, value: str, access_token: str, priority: int = PRIORITY_INTERACTIVE) -> Dict[str, Any]:
+    """
+    Fetch vehicle details from the MOT API over the shared client, once the upstream scheduler
+    gives this priority its turn. lookup is "registration" or "vin", as in the DVSA endpoint path.
+    """
+    label = "registration" if lookup == "registration" else "VIN"
     api_key = os.environ.get("MOT_API_KEY")
     
     if not api_key:
         logger.error("API key not configured")
         raise HTTPException(status_code=500, detail="API key not configured")
     
-    base_url = "https://history.mot.api.gov.uk"
-    endpoint = f"/v1/trade/vehicles/registration/{registration}"
-    url = base_url + endpoint
+    url = f"{MOT_API_BASE_URL}/v1/trade/vehicles/{lookup}/{value}"
     
     headers = {
         "accept": "application/json",
@@ -234,127 +1285,491 @@ async def get_vehicle_by_registration(registration: str, access_token: str) -> D
         "X-API-Key": api_key
     }
     
+    await UPSTREAM_SCHEDULER.acquire(priority)
     try:
-        logger.info(f"Fetching vehicle data for registration: {registration}")
-        session = requests.Session()
-        response = session.get(url, headers=headers, timeout=10)  # Add timeout
+        logger.info(f"Fetching vehicle data for {label}: {value}")
+        response = await get_http_client().get(url, headers=headers)
         response.raise_for_status()
-        data = response.json()
-        
-        # Update cache
-        update_vehicle_cache(cache_key, data)
-        
-        return data
-    except requests.exceptions.HTTPError as err:
+        return response.json()
+    except httpx.HTTPStatusError as err:
         if err.response.status_code == 404:
-            logger.warning(f"Vehicle not found: {registration}")
+            logger.warning(f"Vehicle not found: {value}")
             raise HTTPException(status_code=404, detail="Vehicle not found")
         if err.response.status_code == 400:
-            logger.warning(f"Invalid registration format: {registration}")
-            raise HTTPException(status_code=400, detail="Invalid registration format")
+            logger.warning(f"Invalid {label} format: {value}")
+            raise HTTPException(status_code=400, detail=f"Invalid {label} format")
+        if err.response.status_code == 429:
+            retry_after = err.response.headers.get("retry-after", "")
+            UPSTREAM_SCHEDULER.pause(float(retry_after) if retry_after.isdigit() else 1)
+            logger.warning(f"MOT API rate limited us, pausing calls for {retry_after or 1}s")
         
         # Try to extract error details from the API response
         try:
             error_data = err.response.json()
-            error_code = error_data.get("errorCode", "Unknown")
-            error_message = error_data.get("errorMessage", "No message provided")
-            request_id = error_data.get("requestId", "Unknown")
-            
-            logger.error(f"MOT API Error: {error_code} - {error_message} - Request ID: {request_id}")
-            raise HTTPException(
-                status_code=err.response.status_code,
-                detail={
-                    "errorCode": error_code,
-                    "errorMessage": error_message,
-                    "requestId": request_id
-                }
-            )
-        except:
+        except ValueError:
             # If we can't parse the error response, raise a generic error
             logger.error(f"Error accessing MOT API: {str(err)}")
             raise HTTPException(
                 status_code=500,
                 detail=f"Error accessing MOT API: {str(err)}"
             )
-    except requests.exceptions.Timeout:
-        logger.error(f"Timeout while accessing MOT API for registration: {registration}")
+        
+        error_code = error_data.get("errorCode", "Unknown")
+        error_message = error_data.get("errorMessage", "No message provided")
+        request_id = error_data.get("requestId", "Unknown")
+        
+        logger.error(f"MOT API Error: {error_code} - {error_message} - Request ID: {request_id}")
+        raise HTTPException(
+            status_code=err.response.status_code,
+            detail={
+                "errorCode": error_code,
+                "errorMessage": error_message,
+                "requestId": request_id
+            }
+        )
+    except httpx.TimeoutException:
+        logger.error(f"Timeout while accessing MOT API for {label}: {value}")
         raise HTTPException(status_code=504, detail="Request to MOT API timed out")
     except Exception as e:
-        logger.error(f"Unexpected error for registration {registration}: {str(e)}")
+        logger.error(f"Unexpected error for {label} {value}: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Unexpected error: {str(e)}")
 
-async def get_vehicle_by_vin(vin: str, access_token: str) -> Dict[str, Any]:
-    """Get vehicle details from the MOT API using VIN with caching."""
+def normalize_lookup_value(value: str) -> str:
+    """Registration or VIN without spaces, upper case"""
+    return re.sub(r"\s+", "", value).upper()
+
+def vehicle_cache_key(lookup: str, value: str) -> str:
+    """
+    Cache key of a registration or VIN lookup - spacing and case don't matter. A VIN whose
+    registration is known shares the registration's key.
+    """
+    value = normalize_lookup_value(value)
+    if lookup == "registration":
+        return f"reg_{value}"
+    registration = VEHICLE_IDENTITIES.registration_for(value)
+    return f"reg_{registration}" if registration is not None else f"vin_{value}"
+
+async def get_vehicle(
+    lookup: str, value: str, upstream_slots: Optional[asyncio.Semaphore] = None,
+    priority: int = PRIORITY_INTERACTIVE
+) -> Tuple[Union[CompactVehicle, Dict[str, Any]], str, float]:
+    """
+    Get vehicle details by registration or VIN with caching, as (data as cached, cache status, age).
+    The in-memory cache reads through to the vehicle store when it has no fresh copy - another
+    worker, or this one before a restart, may have fetched the vehicle. Fresh data is a HIT. Stale data within VEHICLE_STALE_WHILE_REVALIDATE is served as STALE
+    while a background fetch refreshes it. Otherwise the data is fetched (a MISS) - from the local
+    MOT dataset if it has the vehicle up to date, else from DVSA - falling back to stale data
+    within VEHICLE_STALE_IF_ERROR if the upstream fails (STALE-IF-ERROR). A miss
+    waits for one of upstream_slots, when given, before fetching, and is scheduled at priority;
+    background refreshes are prefetch traffic.
+    """
     # Check cache first
-    cache_key = f"vin_{vin.upper()}"
-    cached_data = await get_cached_vehicle_data(cache_key)
-    if cached_data:
+    cache_key = vehicle_cache_key(lookup, value)
+    cached_data, age = VEHICLE_CACHE.get(cache_key)
+    if cached_data is None or age >= VEHICLE_CACHE_TTL:
+        stored_data, stored_at = await load_stored_vehicle(cache_key)
+        if stored_data is not None and (cached_data is None or time.time() - stored_at < age):
+            cache_key = identify_vehicle(lookup, value, stored_data)
+            cached_data, age = compact_vehicle(stored_data), time.time() - stored_at
+            VEHICLE_CACHE.set(cache_key, cached_data, stored_at)
+    
+    if cached_data is not None and age < VEHICLE_CACHE_TTL:
+        logger.debug(f"Cache hit for {cache_key}")
+        return cached_data, "HIT", age
+    
+    if cached_data is not None and age < VEHICLE_CACHE_TTL + VEHICLE_STALE_WHILE_REVALIDATE:
+        if cache_key not in VEHICLE_FETCHES:
+            UPSTREAM_STATS["backgroundRefreshes"] += 1
+            start_vehicle_fetch(lookup, value, cache_key, PRIORITY_PREFETCH)
+        logger.debug(f"Serving stale {cache_key} ({age:.0f}s old) while revalidating")
+        return cached_data, "STALE", age
+    
+    logger.debug(f"Cache miss for {cache_key}")
+    try:
+        async with upstream_slots or nullcontext():
+            # Shielded, so a caller that goes away doesn't cancel the fetch for the others
+            data = await asyncio.shield(start_vehicle_fetch(lookup, value, cache_key, priority))
+        return data, "MISS", 0
+    except HTTPException as e:
+        upstream_failed = e.status_code >= 500 or e.status_code == 429
+        if cached_data is None or not upstream_failed or age >= VEHICLE_CACHE_TTL + VEHICLE_STALE_IF_ERROR:
+            raise
+        UPSTREAM_STATS["staleOnError"] += 1
+        logger.warning(f"Serving stale {cache_key} ({age:.0f}s old) after upstream error {e.status_code}")
+        return cached_data, "STALE-IF-ERROR", age
+
+def start_vehicle_fetch(lookup: str, value: str, cache_key: str, priority: int) -> asyncio.Task:
+    """
+    Start an upstream fetch for a cache key, or join the one already in flight (which keeps the
+    priority it was started with)
+    """
+    fetch = VEHICLE_FETCHES.get(cache_key)
+    if fetch is None:
+        fetch = asyncio.create_task(fetch_and_cache_vehicle(lookup, normalize_lookup_value(value), cache_key, priority))
+        fetch.add_done_callback(partial(clear_vehicle_fetch, cache_key))
+        VEHICLE_FETCHES[cache_key] = fetch
+    else:
+        UPSTREAM_STATS["coalescedRequests"] += 1
+        logger.debug(f"Joining upstream fetch in flight for {cache_key}")
+    return fetch
+
+async def fetch_and_cache_vehicle(
+    lookup: str, value: str, cache_key: str, priority: int
+) -> Union[CompactVehicle, Dict[str, Any]]:
+    """
+    Fetch a vehicle and cache it - from the local MOT dataset when it has an up to date copy,
+    otherwise from DVSA
+    """
+    data = await load_dataset_vehicle(lookup, value)
+    if data is not None:
+        UPSTREAM_STATS["datasetAnswers"] += 1
+        cached_data = compact_vehicle(data)
+        VEHICLE_CACHE.set(identify_vehicle(lookup, value, data), cached_data)  # Already on disk, so not written through
         return cached_data
     
-    api_key = os.environ.get("MOT_API_KEY")
+    UPSTREAM_STATS["upstreamCalls"] += 1
+    # The token is taken here rather than by the routes, so cache hits don't need one and a
+    # token endpoint outage is an upstream error like any other, covered by stale data
+    access_token = await get_access_token()
+    data = await fetch_mot_vehicle(lookup, value, access_token, priority)
     
-    if not api_key:
-        logger.error("API key not configured")
-        raise HTTPException(status_code=500, detail="API key not configured")
+    # Update cache, under the registration whichever way the vehicle was looked up
+    return await update_vehicle_cache(identify_vehicle(lookup, value, data), data)
+
+def clear_vehicle_fetch(cache_key: str, task: asyncio.Task):
+    """Let the next miss for the key start a new fetch"""
+    if VEHICLE_FETCHES.get(cache_key) is task:
+        del VEHICLE_FETCHES[cache_key]
+    if not task.cancelled():
+        task.exception()  # Retrieved here too in case every waiter went away
+
+async def get_bulk_vehicle_result(registration: str) -> Dict[str, Any]:
+    """One NDJSON line of a bulk lookup - the vehicle data, or the error it failed with"""
+    try:
+        data, cache_status, age = await get_vehicle("registration", registration, BULK_UPSTREAM_SLOTS, PRIORITY_BULK)
+    except HTTPException as e:
+        return {"registration": registration, "status": e.status_code, "error": e.detail}
+    return {"registration": registration, "status": 200, "cache": cache_status, "age": int(age), "data": vehicle_dict(data)}
+
+async def stream_bulk_vehicles(registrations: List[str]):
+    """
+    Look every registration up at once and yield an NDJSON line per vehicle as it completes,
+    then a summary line. Lookups still running when the client goes away are cancelled.
+    """
+    lookups = [asyncio.create_task(get_bulk_vehicle_result(registration)) for registration in registrations]
+    summary = {"summary": True, "requested": len(registrations), "found": 0, "failed": 0, "fromCache": 0}
+    try:
+        for lookup in asyncio.as_completed(lookups):
+            result = await lookup
+            if result["status"] == 200:
+                summary["found"] += 1
+                summary["fromCache"] += result["cache"] != "MISS"
+            else:
+                summary["failed"] += 1
+            yield json.dumps(result, separators=(",", ":")) + "\n"
+    finally:
+        for lookup in lookups:
+            lookup.cancel()
     
-    base_url = "https://history.mot.api.gov.uk"
-    endpoint = f"/v1/trade/vehicles/vin/{vin}"
-    url = base_url + endpoint
+    logger.info(f"Bulk lookup of {len(registrations)} vehicles: {summary['found']} found ({summary['fromCache']} from cache), {summary['failed']} failed")
+    yield json.dumps(summary, separators=(",", ":")) + "\n"
+
+def parse_odometer_readings(mot_tests: List[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+    """
+    Odometer readings of MOT tests as arrays sorted by test date - time (epoch seconds), miles,
+    unit and index of the test in motTests. Tests without a date or a positive reading are left
+    out, and kilometre readings are converted to miles.
+    """
+    times, values, units, indexes = [], [], [], []
+    for index, test in enumerate(mot_tests):
+        try:
+            completed = datetime.fromisoformat(str(test.get("completedDate") or "").replace("Z", "+00:00"))
+            value = int(str(test.get("odometerValue") or "").replace(",", ""))
+        except ValueError:
+            continue
+        if value <= 0:
+            continue
+        if completed.tzinfo is None:
+            completed = completed.replace(tzinfo=timezone.utc)
+        times.append(completed.timestamp())
+        values.append(value)
+        units.append(str(test.get("odometerUnit") or "MI").upper())
+        indexes.append(index)
     
-    headers = {
-        "accept": "application/json",
-        "Authorization": f"Bearer {access_token}",
-        "X-API-Key": api_key
+    times = np.array(times, dtype=np.float64)
+    units = np.array(units, dtype=str)
+    miles = np.array(values, dtype=np.float64)
+    miles[units == "KM"] /= KM_PER_MILE
+    order = np.argsort(times, kind="stable")  # DVSA lists newest first
+    return {"times": times[order], "miles": miles[order], "units": units[order], "testIndex": np.array(indexes, dtype=np.int64)[order]}
+
+def robust_outlier_scores(rates: np.ndarray) -> np.ndarray:
+    """Modified z-scores of daily mileage rates, from their median and median absolute deviation"""
+    if rates.size < 3:
+        return np.zeros_like(rates)
+    median = np.median(rates)
+    deviation = np.median(np.abs(rates - median))
+    if deviation == 0:
+        deviation = np.mean(np.abs(rates - median)) * 1.2533  # Mean absolute deviation, scaled alike
+    if deviation == 0:
+        return np.zeros_like(rates)
+    return 0.6745 * (rates - median) / deviation
+
+def mileage_analytics(data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Mileage analytics of a vehicle's MOT history - annualised mileage per interval between
+    tests with an outlier score, odometer rollbacks, unusual increases, periods of low use,
+    gaps between tests and overall mileage figures. Readings are parsed once, and every check
+    runs over the whole history as array operations.
+    """
+    readings = parse_odometer_readings(data.get("motTests") or [])
+    times, miles = readings["times"], readings["miles"]
+    result = {
+        "readings": {
+            "dates": [datetime.fromtimestamp(t, timezone.utc).isoformat().replace("+00:00", "Z") for t in times],
+            "miles": np.rint(miles).astype(np.int64).tolist(),
+            "units": readings["units"].tolist(),
+            "testIndex": readings["testIndex"].tolist()
+        },
+        "intervals": {"days": [], "miles": [], "dailyMiles": [], "annualisedMiles": [], "outlierScore": []},
+        "anomalies": [],
+        "inactivityPeriods": [],
+        "gaps": [],
+        "stats": {"hasBeenClocked": False, "totalMileage": 0, "averageAnnualMileage": None, "adjustedValues": False}
     }
+    if times.size < 2:
+        return result
     
-    try:
-        logger.info(f"Fetching vehicle data for VIN: {vin}")
-        session = requests.Session()
-        response = session.get(url, headers=headers, timeout=10)  # Add timeout
-        response.raise_for_status()
-        data = response.json()
-        
-        # Update cache
-        update_vehicle_cache(cache_key, data)
-        
-        return data
-    except requests.exceptions.HTTPError as err:
-        if err.response.status_code == 404:
-            logger.warning(f"Vehicle not found: {vin}")
-            raise HTTPException(status_code=404, detail="Vehicle not found")
-        if err.response.status_code == 400:
-            logger.warning(f"Invalid VIN format: {vin}")
-            raise HTTPException(status_code=400, detail="Invalid VIN format")
-        
-        # Try to extract error details from the API response
+    elapsed_days = np.diff(times) / 86400
+    days = np.maximum(1, elapsed_days)  # At least a day, so rates stay finite
+    diffs = np.diff(miles)
+    daily = diffs / days
+    annualised = daily * 365
+    
+    # Rollbacks score as outliers too, against the rates of the intervals that went forward
+    forward = diffs >= 0
+    scores = np.zeros_like(daily)
+    scores[forward] = robust_outlier_scores(daily[forward])
+    scores[~forward] = -np.inf
+    result["intervals"] = {
+        "days": np.round(days, 1).tolist(),
+        "miles": np.rint(diffs).astype(np.int64).tolist(),
+        "dailyMiles": np.round(daily, 1).tolist(),
+        "annualisedMiles": np.rint(annualised).astype(np.int64).tolist(),
+        "outlierScore": [None if np.isinf(score) else round(float(score), 2) for score in scores]
+    }
+    
+    # Rollbacks - every decrease is high severity, graded for display by its size
+    for i in np.flatnonzero(diffs < 0):
+        drop = int(round(-diffs[i]))
+        result["anomalies"].append({
+            "index": int(i + 1),
+            "date": result["readings"]["dates"][i + 1],
+            "type": "decrease",
+            "severity": "high",
+            "severityDetail": "minor" if drop < 100 else "major" if drop < 1000 else "critical",
+            "message": f"Mileage decreased by {drop:,} miles from previous reading",
+            "details": {"diff": -drop, "timeBetweenReadings": float(days[i])}
+        })
+    
+    # Unusually high increases, against a band that narrows as intervals get longer
+    uk_daily = UK_AVERAGE_ANNUAL_MILEAGE / 365
+    expected_daily = uk_daily * np.select([days <= 30, days <= 90, days <= 180, days <= 365], [5.0, 4.0, 3.0, 2.5], 2.0)
+    spikes = (diffs > 0) & (
+        ((days >= 300) & (annualised > MILEAGE_HIGH_ANNUAL))
+        | ((days < 300) & (days > 7) & (daily > expected_daily))
+        | (daily > MILEAGE_HIGH_DAILY)
+    )
+    severities = np.where(
+        (annualised > MILEAGE_HIGH_ANNUAL * 1.5) | (daily > MILEAGE_HIGH_DAILY * 1.5), "high",
+        np.where((annualised < MILEAGE_HIGH_ANNUAL * 1.2) & (daily < MILEAGE_HIGH_DAILY * 1.2), "low", "medium")
+    )
+    for i in np.flatnonzero(spikes):
+        message = (
+            f"Unusually high mileage increase ({int(np.floor(daily[i] + 0.5))} miles/day, "
+            f"{int(np.floor(annualised[i] + 0.5)):,} miles/year equivalent)"
+        )
+        if annualised[i] > MILEAGE_HIGH_ANNUAL:
+            message += f" - well above typical UK average of {UK_AVERAGE_ANNUAL_MILEAGE:,} miles/year"
+        result["anomalies"].append({
+            "index": int(i + 1),
+            "date": result["readings"]["dates"][i + 1],
+            "type": "spike",
+            "severity": str(severities[i]),
+            "message": message,
+            "details": {
+                "diff": int(round(diffs[i])),
+                "days": float(days[i]),
+                "dailyAvg": float(daily[i]),
+                "annualizedMileage": float(annualised[i])
+            }
+        })
+    result["anomalies"].sort(key=lambda anomaly: anomaly["index"])
+    
+    # Long intervals of little or no use
+    low_daily = uk_daily * MILEAGE_LOW_ACTIVITY_RATIO
+    for i in np.flatnonzero(forward & (days >= MILEAGE_INACTIVITY_MIN_DAYS) & (daily < low_daily)):
+        months = int(np.floor(days[i] / 30 + 0.5))
+        if diffs[i] == 0:
+            description, severity = f"Vehicle appears to have been unused for {months} months", "high"
+        elif daily[i] < low_daily * 0.5:
+            description, severity = f"Very low usage period ({int(np.floor(daily[i] + 0.5))} miles/day for {months} months)", "medium"
+        else:
+            description, severity = f"Below average usage ({int(np.floor(daily[i] + 0.5))} miles/day for {months} months)", "low"
+        result["inactivityPeriods"].append({
+            "startIndex": int(i),
+            "endIndex": int(i + 1),
+            "days": float(days[i]),
+            "dailyAverage": float(daily[i]),
+            "description": description,
+            "severity": severity
+        })
+    
+    result["gaps"] = [
+        {"startIndex": int(i), "endIndex": int(i + 1), "days": round(float(elapsed_days[i]), 1)}
+        for i in np.flatnonzero(elapsed_days > MOT_GAP_DAYS)
+    ]
+    
+    # Overall mileage - after a rollback, only the forward intervals count
+    years = (times[-1] - times[0]) / (86400 * 365.25)
+    unadjusted_total = int(round(miles[-1] - miles[0]))
+    unadjusted_annual = int(np.floor(unadjusted_total / years + 0.5)) if years >= 0.5 else None
+    if forward.all():
+        result["stats"] = {
+            "hasBeenClocked": False,
+            "totalMileage": unadjusted_total,
+            "averageAnnualMileage": unadjusted_annual,
+            "adjustedValues": False
+        }
+    else:
+        total = int(round(diffs[diffs > 0].sum()))
+        result["stats"] = {
+            "hasBeenClocked": True,
+            "totalMileage": total,
+            "averageAnnualMileage": int(np.floor(total / years + 0.5)) if years >= 0.5 else None,
+            "unadjustedTotalMileage": unadjusted_total,
+            "unadjustedAnnualMileage": unadjusted_annual,
+            "adjustedValues": True
+        }
+    return result
+
+async def get_vehicle_mileage(lookup: str, value: str) -> Tuple[Dict[str, Any], str, float]:
+    """
+    Mileage analytics of a vehicle as (analytics, cache status, age) - computed once per MOT
+    record and kept with it in the vehicle cache
+    """
+    data, cache_status, age = await get_vehicle(lookup, value)
+    cache_key = vehicle_cache_key(lookup, value)
+    analytics = VEHICLE_CACHE.derived(cache_key, data, "mileage")
+    if analytics is None:
+        vehicle = vehicle_dict(data)
+        analytics = {"registration": vehicle.get("registration"), **mileage_analytics(vehicle)}
+        VEHICLE_CACHE.attach(cache_key, data, "mileage", analytics)
+    return analytics, cache_status, age
+
+def vehicle_response_body(cache_key: str, data: Union[CompactVehicle, Dict[str, Any]]) -> Optional[bytes]:
+    """
+    The JSON body of a vehicle response. A CompactVehicle was validated when it was cached and
+    is written out here, unless its body is still among the hot ones; data cached as parsed JSON is validated against the response model once
+    per cache entry and the body kept with it, so hits send the bytes as they are. None when the
+    data doesn't validate.
+    """
+    if isinstance(data, CompactVehicle):
+        body = VEHICLE_HOT_BODIES.get(cache_key, data)
+        if body is None:
+            body = data.to_json()
+            VEHICLE_HOT_BODIES.set(cache_key, data, body)
+        return body
+    body = VEHICLE_CACHE.derived(cache_key, data, "body")
+    if body is None:
         try:
-            error_data = err.response.json()
-            error_code = error_data.get("errorCode", "Unknown")
-            error_message = error_data.get("errorMessage", "No message provided")
-            request_id = error_data.get("requestId", "Unknown")
-            
-            logger.error(f"MOT API Error: {error_code} - {error_message} - Request ID: {request_id}")
-            raise HTTPException(
-                status_code=err.response.status_code,
-                detail={
-                    "errorCode": error_code,
-                    "errorMessage": error_message,
-                    "requestId": request_id
-                }
-            )
-        except:
-            # If we can't parse the error response, raise a generic error
-            logger.error(f"Error accessing MOT API: {str(err)}")
-            raise HTTPException(
-                status_code=500,
-                detail=f"Error accessing MOT API: {str(err)}"
-            )
-    except requests.exceptions.Timeout:
-        logger.error(f"Timeout while accessing MOT API for VIN: {vin}")
-        raise HTTPException(status_code=504, detail="Request to MOT API timed out")
-    except Exception as e:
-        logger.error(f"Unexpected error for VIN {vin}: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Unexpected error: {str(e)}")
+            body = VEHICLE_RESPONSE.dump_json(VEHICLE_RESPONSE.validate_python(data))
+        except ValidationError as e:
+            logger.warning(f"Vehicle data for {cache_key} doesn't match the response model: {e.error_count()} errors")
+            return None
+        VEHICLE_CACHE.attach(cache_key, data, "body", body)
+    return body
+
+def latest_test_time(data: Union[CompactVehicle, Dict[str, Any]]) -> Optional[datetime]:
+    """When a vehicle's newest MOT test was completed - None when it has no tests"""
+    if isinstance(data, CompactVehicle):
+        completed = (decode_timestamp(test.completed) for test in data.tests)
+    else:
+        completed = (test.get("completedDate") for test in data.get("motTests") or [])
+    latest = None
+    for value in completed:
+        try:
+            when = datetime.fromisoformat(str(value or "").replace("Z", "+00:00"))
+        except ValueError:
+            continue
+        when = when if when.tzinfo is not None else when.replace(tzinfo=timezone.utc)
+        latest = when if latest is None or when > latest else latest
+    return latest
+
+def vehicle_validators(body: bytes, data: Union[CompactVehicle, Dict[str, Any]]) -> Dict[str, Optional[str]]:
+    """ETag (a hash of the body) and Last-Modified (when the newest MOT test was completed) of a vehicle response"""
+    latest = latest_test_time(data)
+    return {
+        "etag": f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"',
+        "lastModified": format_datetime(latest.astimezone(timezone.utc), usegmt=True) if latest is not None else None
+    }
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header matches an ETag, compared weakly as for a GET"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return etag.removeprefix("W/") in {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+
+def vehicle_response(
+    lookup: str, value: str, data: Union[CompactVehicle, Dict[str, Any]], cache_status: str, age: float,
+    response: Response, if_none_match: Optional[str] = None
+):
+    """
+    Raw JSON response of a vehicle lookup with its cache headers and validators, or 304 Not
+    Modified when If-None-Match has its ETag. The validators are kept with the cache entry, so
+    a revalidation of a cached vehicle doesn't write its body out. Data that doesn't validate is
+    returned as is for the response model to reject, as it always has.
+    """
+    cache_key = vehicle_cache_key(lookup, value)
+    validators = VEHICLE_CACHE.derived(cache_key, data, "validators")
+    if validators is None:
+        body = vehicle_response_body(cache_key, data)
+        if body is None:
+            set_vehicle_cache_headers(response, cache_status, age)
+            return data
+        validators = vehicle_validators(body, data)
+        VEHICLE_CACHE.attach(cache_key, data, "validators", validators)
+    else:
+        body = None
+    
+    if etag_matches(if_none_match, validators["etag"]):
+        not_modified = Response(status_code=304)
+        set_vehicle_cache_headers(not_modified, cache_status, age, validators)
+        return not_modified
+    raw_response = Response(content=body or vehicle_response_body(cache_key, data), media_type="application/json")
+    set_vehicle_cache_headers(raw_response, cache_status, age, validators)
+    return raw_response
+
+def set_vehicle_cache_headers(response: Response, cache_status: str, age: float, validators: Optional[Dict[str, Optional[str]]] = None):
+    """Cache and security headers of a vehicle response, with its ETag and Last-Modified when given"""
+    response.headers["X-Cache"] = cache_status
+    response.headers["Cache-Control"] = (
+        f"max-age={VEHICLE_CACHE_TTL}, stale-while-revalidate={VEHICLE_STALE_WHILE_REVALIDATE}, "
+        f"stale-if-error={VEHICLE_STALE_IF_ERROR}"
+    )
+    if cache_status != "MISS":
+        response.headers["Age"] = str(int(age))
+    if validators is not None:
+        response.headers["ETag"] = validators["etag"]
+        if validators["lastModified"] is not None:
+            response.headers["Last-Modified"] = validators["lastModified"]
+    
+    # Add security headers
+    response.headers["X-Content-Type-Options"] = "nosniff"
+    response.headers["X-Frame-Options"] = "DENY"
+    response.headers["Content-Security-Policy"] = "default-src 'self'"
 
 # API routes
 @app.get("/")
@@ -365,14 +1780,25 @@ async def root():
         "version": "1.0.0",
         "endpoints": [
             "/api/v1/vehicle/registration/{registration}",
-            "/api/v1/vehicle/vin/{vin}"
+            "/api/v1/vehicle/vin/{vin}",
+            "/api/v1/vehicle/registration/{registration}/mileage",
+            "/api/v1/vehicle/vin/{vin}/mileage",
+            "/api/v1/vehicle/bulk"
         ]
     }
 
 @app.get("/health")
 async def health_check():
     """Health check endpoint for monitoring"""
-    return {"status": "healthy", "version": "1.0.0"}
+    return {
+        "status": "healthy",
+        "version": "1.0.0",
+        "vehicleCache": {**VEHICLE_CACHE.stats(), "compact": VEHICLE_CACHE_COMPACT, "sharedStrings": len(VEHICLE_STRINGS), "knownVins": len(VEHICLE_IDENTITIES)},
+        "hotBodies": VEHICLE_HOT_BODIES.stats(),
+        "vehicleStore": await asyncio.to_thread(VEHICLE_STORE.stats) if VEHICLE_STORE is not None else None,
+        "motDataset": await asyncio.to_thread(MOT_DATASET.stats) if MOT_DATASET is not None else None,
+        "upstream": {**UPSTREAM_STATS, "inFlight": len(VEHICLE_FETCHES), "scheduler": UPSTREAM_SCHEDULER.stats()}
+    }
 
 @app.get("/api/v1/vehicle/registration/{registration}", 
          response_model=Union[VehicleWithMot, NewRegVehicle],
@@ -383,34 +1809,14 @@ async def health_check():
          })
 async def get_vehicle_info_by_registration(
     registration: str,
-    response: Response,
-    access_token: str = Depends(get_access_token)
+    request: Request,
+    response: Response
 ):
     """
     Get complete vehicle information and MOT history by registration number
     """
-    # Check if data is from cache to set appropriate headers
-    cache_key = f"reg_{registration.upper()}"
-    is_cached = is_cache_valid(cache_key)
-    
-    vehicle_data = await get_vehicle_by_registration(registration, access_token)
-    
-    # Set cache control headers
-    if is_cached:
-        # If data was from cache, tell browser it's cached
-        response.headers["X-Cache"] = "HIT"
-        response.headers["Cache-Control"] = f"max-age={VEHICLE_CACHE_TTL}"
-    else:
-        # If data was freshly fetched, set the cache control
-        response.headers["X-Cache"] = "MISS"
-        response.headers["Cache-Control"] = f"max-age={VEHICLE_CACHE_TTL}"
-    
-    # Add security headers
-    response.headers["X-Content-Type-Options"] = "nosniff"
-    response.headers["X-Frame-Options"] = "DENY"
-    response.headers["Content-Security-Policy"] = "default-src 'self'"
-    
-    return vehicle_data
+    vehicle_data, cache_status, age = await get_vehicle("registration", registration)
+    return vehicle_response("registration", registration, vehicle_data, cache_status, age, response, request.headers.get("if-none-match"))
 
 @app.get("/api/v1/vehicle/vin/{vin}", 
          response_model=Union[VehicleWithMot, NewRegVehicle],
@@ -421,45 +1827,114 @@ async def get_vehicle_info_by_registration(
          })
 async def get_vehicle_info_by_vin(
     vin: str,
-    response: Response,
-    access_token: str = Depends(get_access_token)
+    request: Request,
+    response: Response
 ):
     """
     Get complete vehicle information and MOT history by VIN
     """
-    # Check if data is from cache to set appropriate headers
-    cache_key = f"vin_{vin.upper()}"
-    is_cached = is_cache_valid(cache_key)
-    
-    vehicle_data = await get_vehicle_by_vin(vin, access_token)
-    
-    # Set cache control headers
-    if is_cached:
-        # If data was from cache, tell browser it's cached
-        response.headers["X-Cache"] = "HIT"
-        response.headers["Cache-Control"] = f"max-age={VEHICLE_CACHE_TTL}"
-    else:
-        # If data was freshly fetched, set the cache control
-        response.headers["X-Cache"] = "MISS"
-        response.headers["Cache-Control"] = f"max-age={VEHICLE_CACHE_TTL}"
-    
-    # Add security headers
-    response.headers["X-Content-Type-Options"] = "nosniff"
-    response.headers["X-Frame-Options"] = "DENY"
-    response.headers["Content-Security-Policy"] = "default-src 'self'"
+    vehicle_data, cache_status, age = await get_vehicle("vin", vin)
+    return vehicle_response("vin", vin, vehicle_data, cache_status, age, response, request.headers.get("if-none-match"))
+
+@app.get("/api/v1/vehicle/registration/{registration}/mileage",
+         responses={
+             404: {"model": ErrorResponse},
+             400: {"model": ErrorResponse},
+             500: {"model": ErrorResponse}
+         })
+async def get_mileage_by_registration(
+    registration: str,
+    response: Response
+):
+    """
+    Mileage analytics from the MOT history by registration number - readings, annualised
+    mileage, rollbacks, unusual increases, low use, gaps between tests and outlier scores
+    """
+    analytics, cache_status, age = await get_vehicle_mileage("registration", registration)
+    set_vehicle_cache_headers(response, cache_status, age)
+    return analytics
+
+@app.get("/api/v1/vehicle/vin/{vin}/mileage",
+         responses={
+             404: {"model": ErrorResponse},
+             400: {"model": ErrorResponse},
+             500: {"model": ErrorResponse}
+         })
+async def get_mileage_by_vin(
+    vin: str,
+    response: Response
+):
+    """
+    Mileage analytics from the MOT history by VIN
+    """
+    analytics, cache_status, age = await get_vehicle_mileage("vin", vin)
+    set_vehicle_cache_headers(response, cache_status, age)
+    return analytics
+
+@app.post("/api/v1/vehicle/bulk",
+          response_class=StreamingResponse,
+          responses={
+              400: {"model": ErrorResponse},
+              200: {"content": {"application/x-ndjson": {}}}
+          })
+async def get_vehicles_bulk(request: BulkVehicleRequest):
+    """
+    MOT history of up to BULK_MAX_VEHICLES registrations, streamed as NDJSON - one line per
+    vehicle as soon as it is ready, so cached vehicles come back first, then a summary line.
+    Each registration is looked up once, and misses are fetched BULK_UPSTREAM_CONCURRENCY at
+    a time across all bulk requests.
+    """
+    registrations = list(dict.fromkeys(
+        normalize_lookup_value(registration) for registration in request.registrations if registration.strip()
+    ))
+    if not registrations:
+        raise HTTPException(status_code=400, detail="No registrations given")
+    if len(registrations) > BULK_MAX_VEHICLES:
+        raise HTTPException(status_code=400, detail=f"At most {BULK_MAX_VEHICLES} registrations per request")
     
-    return vehicle_data
+    logger.info(f"Bulk lookup of {len(registrations)} vehicles ({len(request.registrations)} given)")
+    return StreamingResponse(
+        stream_bulk_vehicles(registrations),
+        media_type="application/x-ndjson",
+        # X-Accel-Buffering: nginx would otherwise buffer the lines until its proxy buffers fill
+        headers={"X-Content-Type-Options": "nosniff", "Cache-Control": "no-store", "X-Accel-Buffering": "no"}
+    )
 
 # Endpoint to manually clear the cache
+async def forget_vehicle(lookup: str, value: str) -> List[str]:
+    """Drop a vehicle from every cache tier under its registration and its VIN, returning the keys"""
+    value = normalize_lookup_value(value)
+    registration = value if lookup == "registration" else VEHICLE_IDENTITIES.registration_for(value)
+    vin = value if lookup == "vin" else VEHICLE_IDENTITIES.vin_for(value)
+    keys = [f"reg_{registration}"] * (registration is not None) + [f"vin_{vin}"] * (vin is not None)
+    for key in keys:
+        VEHICLE_CACHE.remove(key)
+        VEHICLE_HOT_BODIES.remove(key)
+        if VEHICLE_STORE is not None:
+            await asyncio.to_thread(VEHICLE_STORE.remove, key)
+    return keys
+
 @app.post("/api/v1/cache/clear")
-async def clear_cache():
-    """Clear all caches (tokens and vehicle data)"""
-    global TOKEN_CACHE, VEHICLE_CACHE
+async def clear_cache(
+    registration: Optional[str] = Query(None, description="Only clear this vehicle (under its VIN too)"),
+    vin: Optional[str] = Query(None, description="Only clear this vehicle (under its registration too)")
+):
+    """Clear all caches (tokens and vehicle data), or one vehicle's data"""
+    if registration or vin:
+        keys = await forget_vehicle("registration", registration) if registration else await forget_vehicle("vin", vin)
+        logger.info(f"Cache cleared manually for {', '.join(keys)}")
+        return {"status": "success", "message": "Vehicle cleared from the cache", "keys": keys}
+    
+    global TOKEN_CACHE
     TOKEN_CACHE = {
         "access_token": None,
         "expires_at": 0,
     }
-    VEHICLE_CACHE = {}
+    VEHICLE_CACHE.clear()
+    VEHICLE_HOT_BODIES.clear()
+    VEHICLE_IDENTITIES.clear()
+    if VEHICLE_STORE is not None:
+        await asyncio.to_thread(VEHICLE_STORE.clear)
     logger.info("Cache cleared manually")
     return {"status": "success", "message": "Cache cleared successfully"}
 
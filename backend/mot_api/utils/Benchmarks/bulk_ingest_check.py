@@ -0,0 +1,257 @@
+"""
+MOT bulk data ingest check - utils/Bulk-Data/mot_bulk_ingest.py and mot_api answering from
+the dataset it builds, with generated sample files shaped like the DVSA bulk and delta files.
+
+1. Resume: the ingest of a bulk file (gzipped JSON lines) is killed part way and run again;
+   it must pick up where it stopped and end with every vehicle. A third run skips the file.
+2. Delta: a CSV delta file of new tests and new vehicles must add to the dataset.
+3. Memory: peak memory of the ingest must not grow with the file (a file --scale times
+   the size, in a JSON array this time).
+4. Lookups: mot_api with MOT_DATASET_PATH must answer vehicles the dataset has up to date,
+   by registration and VIN, without calling the DVSA stand-in, and go to it for vehicles that
+   may have been tested since (due for their MOT soon, or last failed) and for misses.
+
+Usage (from backend/mot_api):
+    python utils/Benchmarks/bulk_ingest_check.py
+    python utils/Benchmarks/bulk_ingest_check.py --vehicles 100000 --scale 5
+"""
+import os
+import re
+import csv
+import sys
+import gzip
+import json
+import time
+import zlib
+import random
+import shutil
+import signal
+import sqlite3
+import asyncio
+import logging
+import argparse
+import tempfile
+import subprocess
+from datetime import date, timedelta
+
+import httpx
+
+from dvsa_stub import DvsaStub, synthetic_mot_history
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+INGEST = os.path.join(BASE_DIR, "utils", "Bulk-Data", "mot_bulk_ingest.py")
+TODAY = date.today()
+CSV_COLUMNS = (
+    "registration", "vin", "make", "model", "fuelType", "primaryColour", "completedDate", "testResult", "expiryDate",
+    "odometerValue", "odometerUnit", "odometerResultType", "motTestNumber", "dataSource", "location", "defects"
+)
+
+def sample_vehicle(i, rng):
+    """
+    A bulk file vehicle with a VIN and tests dated from today. One in ten is due its MOT within
+    the early testing window and one in ten failed its last test; the rest aren't due for months.
+    """
+    registration = f"DS{i:06d}"
+    vehicle = synthetic_mot_history(registration, rng.randint(1, 12))
+    vehicle["vin"] = f"SAMPLEVIN{i:08d}"
+    due = TODAY + timedelta(days=10 if i % 10 == 0 else rng.randint(60, 330))
+    for k, test in enumerate(vehicle["motTests"]):  # Newest first
+        completed = due - timedelta(days=365 * (k + 1))
+        test["completedDate"] = f"{completed.isoformat()}T10:{k % 60:02d}:00.000Z"
+        test["testResult"] = "FAILED" if k == 0 and i % 10 == 1 else "PASSED"
+        test["expiryDate"] = None if test["testResult"] == "FAILED" else (completed + timedelta(days=365)).isoformat()
+    return vehicle
+
+def due_soon(i):
+    return i % 10 in (0, 1)
+
+def write_bulk(path, vehicles, seed, as_array=False):
+    """A bulk file of sample vehicles, written as it's generated"""
+    rng = random.Random(seed)
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "wt", encoding="utf-8") as file:
+        if as_array:
+            file.write("[\n")
+        for i in range(vehicles):
+            file.write(("," if as_array and i else "") + json.dumps(sample_vehicle(i, rng)) + "\n")
+        if as_array:
+            file.write("]\n")
+
+def write_delta(path, updated, new):
+    """A CSV delta of a pass today for each of `updated` and a first test for `new` vehicles"""
+    with open(path, "w", newline="", encoding="utf-8") as file:
+        writer = csv.DictWriter(file, CSV_COLUMNS)
+        writer.writeheader()
+        for n, (registration, vin) in enumerate(updated + new):
+            writer.writerow({
+                "registration": registration, "vin": vin, "make": "FORD", "model": "FOCUS", "fuelType": "Petrol",
+                "primaryColour": "Blue", "completedDate": f"{TODAY.isoformat()}T09:00:00.000Z", "testResult": "PASSED",
+                "expiryDate": (TODAY + timedelta(days=364)).isoformat(), "odometerValue": "54321", "odometerUnit": "MI",
+                "odometerResultType": "READ", "motTestNumber": f"9{n:011d}",
+                "dataSource": "DVSA", "location": "", "defects": json.dumps([{"text": "Tyre worn", "type": "ADVISORY", "dangerous": False}])
+            })
+
+def run_ingest(db, *files, chunk_size=2000):
+    result = subprocess.run(
+        [sys.executable, INGEST, "--db", db, "--chunk-size", str(chunk_size), *files],
+        capture_output=True, text=True, check=True
+    )
+    return result.stdout
+
+def peak_memory(output):
+    match = re.search(r"peak memory (\d+) MB", output)
+    return int(match.group(1)) if match else None
+
+def file_progress(db):
+    try:
+        connection = sqlite3.connect(f"file:{db}?mode=ro", uri=True)
+        try:
+            return connection.execute("SELECT COALESCE(MAX(records), 0), COALESCE(MAX(done), 0) FROM ingested_files").fetchone()
+        finally:
+            connection.close()
+    except sqlite3.Error:
+        return 0, 0
+
+def count_vehicles(db):
+    connection = sqlite3.connect(db)
+    try:
+        return connection.execute("SELECT COUNT(*) FROM vehicles").fetchone()[0]
+    finally:
+        connection.close()
+
+def resume(work_dir, db, vehicles):
+    """Kill the ingest of a bulk file part way, then finish it"""
+    bulk = os.path.join(work_dir, f"bulk-light-vehicle_{(TODAY - timedelta(days=20)).isoformat()}.jsonl.gz")
+    write_bulk(bulk, vehicles, seed=1)
+
+    process = subprocess.Popen([sys.executable, INGEST, "--db", db, "--chunk-size", "500", bulk], stdout=subprocess.DEVNULL)
+    deadline = time.monotonic() + 120
+    while file_progress(db)[0] < min(vehicles // 4, 5000) and process.poll() is None and time.monotonic() < deadline:
+        time.sleep(0.01)
+    process.send_signal(signal.SIGKILL)
+    process.wait()
+    killed_at, done = file_progress(db)
+    interrupted = not done and 0 < killed_at < vehicles
+
+    output = run_ingest(db, bulk)
+    resumed = f"resuming after {killed_at} records" in output
+    stored = count_vehicles(db)
+    skipped = "already ingested" in run_ingest(db, bulk)
+    print(
+        f"resume: killed after {killed_at} of {vehicles} records, second run "
+        f"{'resumed from there' if resumed else 'did not resume'}, {stored} vehicles stored, "
+        f"third run {'skipped the file' if skipped else 'ingested it again'}"
+    )
+    return bulk, interrupted and resumed and stored == vehicles and skipped
+
+def delta(work_dir, db, vehicles):
+    """A CSV delta of passes for vehicles due soon and of new vehicles"""
+    updated = [(f"DS{i:06d}", f"SAMPLEVIN{i:08d}") for i in range(0, min(vehicles, 500), 10)]
+    new = [(f"NW{i:06d}", f"NEWVIN{i:011d}") for i in range(100)]
+    path = os.path.join(work_dir, f"delta-{TODAY.isoformat()}.csv")
+    write_delta(path, updated, new)
+    run_ingest(db, path)
+
+    connection = sqlite3.connect(db)
+    try:
+        data = json.loads(zlib.decompress(connection.execute("SELECT data FROM vehicles WHERE registration = 'DS000000'").fetchone()[0]))
+    finally:
+        connection.close()
+    stored = count_vehicles(db)
+    latest = data["motTests"][0]["completedDate"][:10]
+    print(f"delta: {len(updated)} vehicles with a new test, {len(new)} new vehicles - {stored} vehicles stored, DS000000 last tested {latest}")
+    return stored == vehicles + len(new) and latest == TODAY.isoformat(), updated
+
+def memory(work_dir, vehicles, scale):
+    """Peak ingest memory for a file and one `scale` times larger"""
+    peaks = []
+    for size in (vehicles, vehicles * scale):
+        path = os.path.join(work_dir, f"bulk-{size}_{TODAY.isoformat()}.json")
+        write_bulk(path, size, seed=2, as_array=True)
+        output = run_ingest(os.path.join(work_dir, f"memory-{size}.db"), path)
+        peaks.append(peak_memory(output))
+        os.remove(path)
+    if None in peaks:
+        print("memory: peak memory not reported on this platform")
+        return True
+    print(f"memory: peak {peaks[0]} MB ingesting {vehicles} vehicles, {peaks[1]} MB ingesting {vehicles * scale}")
+    return peaks[1] <= peaks[0] * 1.25 + 5
+
+async def lookups(db, updated):
+    """mot_api answers from the dataset, and asks the stand-in only when it has to"""
+    stub = DvsaStub(latency=0.01).start()
+    os.environ.update({
+        "MOT_CLIENT_ID": "ingest-check",
+        "MOT_CLIENT_SECRET": "ingest-check",
+        "MOT_TENANT_ID": "ingest-check",
+        "MOT_API_KEY": "ingest-check",
+        "MOT_API_BASE_URL": stub.url,
+        "MOT_TOKEN_URL": stub.url + "/token",
+        "MOT_DATASET_PATH": db,
+        "UPSTREAM_RATE_LIMIT": "0",
+        "VEHICLE_STORE_PATH": ""
+    })
+    sys.path.insert(0, BASE_DIR)
+    import main
+    logging.disable(logging.CRITICAL)
+
+    updated = {registration for registration, _ in updated}
+    current = [f"DS{i:06d}" for i in range(2, 300) if not due_soon(i)][:50]
+    may_be_tested = [f"DS{i:06d}" for i in range(500, 600) if due_soon(i)]  # Past the vehicles in the delta
+    ok = True
+    try:
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://mot-api") as client:
+            async def upstream_calls(paths):
+                stub.reset()
+                responses = await asyncio.gather(*(client.get(path) for path in paths))
+                return [r.status_code for r in responses], stub.stats()["vehicleRequests"], responses
+
+            statuses, calls, responses = await upstream_calls([f"/api/v1/vehicle/registration/{r}" for r in current])
+            ok = ok and set(statuses) == {200} and calls == 0 and all(r.json()["registration"] in current for r in responses)
+            print(f"lookups: {len(current)} vehicles in the dataset and not due - {calls} DVSA calls")
+
+            vins = [f"/api/v1/vehicle/vin/sample vin{i:08d}" for i in range(102, 112) if not due_soon(i)]
+            statuses, calls, responses = await upstream_calls(vins)
+            ok = ok and set(statuses) == {200} and calls == 0 and all(r.json()["registration"].startswith("DS") for r in responses)
+            print(f"lookups: {len(vins)} of them by VIN - {calls} DVSA calls")
+
+            statuses, calls, _ = await upstream_calls([f"/api/v1/vehicle/registration/{r}" for r in sorted(updated)[:10]])
+            ok = ok and set(statuses) == {200} and calls == 0
+            print(f"lookups: 10 vehicles due soon but tested in the delta - {calls} DVSA calls")
+
+            statuses, calls, _ = await upstream_calls([f"/api/v1/vehicle/registration/{r}" for r in may_be_tested])
+            ok = ok and set(statuses) == {200} and calls == len(may_be_tested)
+            print(f"lookups: {len(may_be_tested)} vehicles due soon or last failed - {calls} DVSA calls")
+
+            statuses, calls, _ = await upstream_calls([f"/api/v1/vehicle/registration/UNKNOWN{i}" for i in range(10)])
+            ok = ok and set(statuses) == {200} and calls == 10
+            print(f"lookups: 10 vehicles not in the dataset - {calls} DVSA calls")
+            print(f"dataset: {(await client.get('/health')).json()['motDataset']}")
+    finally:
+        await main.shutdown_event()
+        stub.stop()
+    return ok
+
+def run(args):
+    work_dir = tempfile.mkdtemp(prefix="mot_ingest_check_")
+    db = os.path.join(work_dir, "mot_dataset.db")
+    try:
+        _, ok = resume(work_dir, db, args.vehicles)
+        delta_ok, updated = delta(work_dir, db, args.vehicles)
+        ok = delta_ok and ok
+        ok = memory(work_dir, args.memory_vehicles, args.scale) and ok
+        ok = asyncio.run(lookups(db, updated)) and ok
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return ok
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="MOT bulk data ingest check")
+    parser.add_argument("--vehicles", type=int, default=20000, help="Vehicles in the bulk file")
+    parser.add_argument("--memory-vehicles", type=int, default=20000, help="Vehicles in the smaller file of the memory check")
+    parser.add_argument("--scale", type=int, default=4, help="How many times larger the larger file of the memory check is")
+    args = parser.parse_args()
+
+    ok = run(args)
+    print("OK" if ok else "FAILED")
+    sys.exit(0 if ok else 1)
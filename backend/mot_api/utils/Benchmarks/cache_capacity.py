@@ -0,0 +1,101 @@
+"""
+Vehicle cache capacity per GB, with cached MOT histories kept as parsed JSON (as before
+VEHICLE_CACHE_COMPACT) and in their compact form.
+
+Fills a VehicleCache with the same synthetic vehicles both ways - parsed from JSON, as they
+arrive from DVSA - and measures the memory each fill takes with tracemalloc, string table
+included. Also shows the size the cache accounts each entry at (what VEHICLE_CACHE_MAX_BYTES
+bounds) against the measured size, and the CPU time to compact a vehicle and to write a
+compact one out as JSON.
+
+The stand-in's histories draw their defects from a short list, so defect texts are shared
+more than with real DVSA data; registrations and test numbers are all distinct.
+
+Usage (from backend/mot_api):
+    python utils/Benchmarks/cache_capacity.py
+    python utils/Benchmarks/cache_capacity.py --vehicles 20000 --max-tests 25
+"""
+import os
+import sys
+import json
+import time
+import random
+import logging
+import argparse
+import tracemalloc
+
+from dvsa_stub import synthetic_mot_history
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+GB = 1024 ** 3
+
+def fill(main, payloads, compact):
+    """Cache every payload, returning (cache, measured bytes, CPU seconds)"""
+    main.VEHICLE_CACHE_COMPACT = compact
+    cache = main.VehicleCache(len(payloads), GB * 64, 300, 300)
+    started = time.process_time()
+    for i, payload in enumerate(payloads):
+        cache.set(f"reg_V{i}", main.compact_vehicle(json.loads(payload)))
+    elapsed = time.process_time() - started
+    cache.clear()
+    main.VEHICLE_STRINGS.values.clear()  # Refilled below, so its memory is measured too
+    
+    # Again, measuring memory - tracemalloc slows everything down
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    for i, payload in enumerate(payloads):
+        cache.set(f"reg_V{i}", main.compact_vehicle(json.loads(payload)))
+    measured = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+    return cache, measured, elapsed
+
+def run(args):
+    os.environ.update({
+        "MOT_CLIENT_ID": "capacity-bench",
+        "MOT_CLIENT_SECRET": "capacity-bench",
+        "MOT_TENANT_ID": "capacity-bench",
+        "MOT_API_KEY": "capacity-bench",
+        "VEHICLE_STORE_PATH": ""
+    })
+    sys.path.insert(0, BASE_DIR)
+    import main
+    logging.disable(logging.CRITICAL)
+
+    rng = random.Random(args.seed)
+    payloads = [json.dumps(synthetic_mot_history(f"V{i}", rng.randint(0, args.max_tests))) for i in range(args.vehicles)]
+    json_bytes = sum(map(len, payloads))
+    print(f"{args.vehicles} vehicles, 0-{args.max_tests} MOT tests each, {json_bytes / args.vehicles:.0f} bytes of JSON on average")
+
+    ok = True
+    results = {}
+    for label, compact in (("parsed JSON", False), ("compact", True)):
+        cache, measured, elapsed = fill(main, payloads, compact)
+        per_vehicle = measured / args.vehicles
+        results[label] = per_vehicle
+        print(
+            f"{label:>12}: {per_vehicle:>7.0f} bytes a vehicle measured, {cache.bytes / args.vehicles:>7.0f} accounted, "
+            f"{GB / per_vehicle:>9,.0f} vehicles per GB, {elapsed / args.vehicles * 1e6:.0f} us to cache one"
+        )
+        ok = ok and len(cache) == args.vehicles
+        if compact:
+            vehicles = [entry["data"] for entry in cache.entries.values()]
+            ok = ok and all(isinstance(vehicle, main.CompactVehicle) for vehicle in vehicles)
+            started = time.process_time()
+            for vehicle in vehicles:
+                vehicle.to_json()
+            print(f"{'':>12}  {(time.process_time() - started) / args.vehicles * 1e6:.0f} us to write one out as JSON, {len(main.VEHICLE_STRINGS)} shared strings")
+        del cache
+
+    print(f"capacity: {results['parsed JSON'] / results['compact']:.1f}x the vehicles per GB")
+    return ok
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="mot_api vehicle cache capacity benchmark")
+    parser.add_argument("--vehicles", type=int, default=5000)
+    parser.add_argument("--max-tests", type=int, default=20, help="MOT tests per vehicle are drawn from 0 to this")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    ok = run(args)
+    print("OK" if ok else "FAILED")
+    sys.exit(0 if ok else 1)
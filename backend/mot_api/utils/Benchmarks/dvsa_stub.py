@@ -0,0 +1,202 @@
+"""
+Local stand-in for the DVSA MOT History API and its OAuth token endpoint.
+
+Serves synthetic MOT histories with a fixed upstream latency and counts requests and
+peak concurrency, so mot_api can be load tested without touching the real services.
+Registrations starting with "NOTFOUND" return 404. Given a rate limit and/or daily quota,
+it enforces them the way DVSA does - 429 with Retry-After once they are used up. The
+stand-in runs in its own process so it doesn't compete with the service under test for
+the GIL.
+
+Usage from a benchmark:
+    stub = DvsaStub(latency=0.1).start()
+    os.environ["MOT_API_BASE_URL"] = stub.url
+    os.environ["MOT_TOKEN_URL"] = stub.url + "/token"
+    ...
+    print(stub.stats())
+    stub.stop()
+"""
+import math
+import time
+import socket
+import asyncio
+import hashlib
+import multiprocessing
+
+import httpx
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+MAKES = [("FORD", "FIESTA"), ("VAUXHALL", "CORSA"), ("VOLKSWAGEN", "GOLF"), ("BMW", "3 SERIES"), ("TOYOTA", "YARIS")]
+DEFECTS = [
+    ("Nearside Front Tyre worn close to legal limit/worn on edge (5.2.3 (e))", "ADVISORY"),
+    ("Offside Rear Brake pad(s) wearing thin (1.1.13 (a) (ii))", "ADVISORY"),
+    ("Nearside Headlamp aim too high (4.1.2 (a))", "MAJOR"),
+    ("Windscreen wiper does not clear the windscreen effectively (3.4 (b) (i))", "MINOR"),
+    ("Front Brake disc worn, pitted or scored, but not seriously weakened (1.1.14 (a) (ii))", "ADVISORY"),
+    ("Exhaust has a minor leak of exhaust gases (6.1.2 (a))", "MINOR")
+]
+
+def synthetic_mot_history(registration: str, tests: int = 10) -> dict:
+    """A DVSA shaped vehicle with `tests` annual MOT tests, deterministic per registration"""
+    seed = int(hashlib.md5(registration.encode()).hexdigest(), 16)
+    make, model = MAKES[seed % len(MAKES)]
+    first_year = 2024 - tests - 3
+    mileage = 0
+    mot_tests = []
+    
+    for i in range(tests):
+        year = first_year + 3 + i
+        mileage += 6000 + (seed >> i) % 6000
+        failed = (seed >> (i + 3)) % 5 == 0
+        defects = [
+            {"text": text, "type": defect_type, "dangerous": False}
+            for j, (text, defect_type) in enumerate(DEFECTS) if (seed >> (i + j)) % 3 == 0
+        ]
+        mot_tests.append({
+            "completedDate": f"{year}-0{1 + seed % 9}-1{i % 10}T10:{i % 60:02d}:00.000Z",
+            "testResult": "FAILED" if failed else "PASSED",
+            "expiryDate": None if failed else f"{year + 1}-0{1 + seed % 9}-0{1 + i % 9}",
+            "odometerValue": str(mileage),
+            "odometerUnit": "MI",
+            "odometerResultType": "READ",
+            "motTestNumber": str(100000000000 + (seed + i) % 899999999999),
+            "dataSource": "DVSA",
+            "location": None,
+            "defects": defects
+        })
+    
+    return {
+        "registration": registration,
+        "make": make,
+        "model": model,
+        "fuelType": "Petrol" if seed % 2 else "Diesel",
+        "primaryColour": "Silver",
+        "registrationDate": f"{first_year}-03-01",
+        "manufactureDate": f"{first_year}-02-01",
+        "firstUsedDate": f"{first_year}-03-01",
+        "engineSize": str(1000 + seed % 1000),
+        "hasOutstandingRecall": "Unknown",
+        "motTests": list(reversed(mot_tests))  # Newest first, as DVSA returns them
+    }
+
+def build_stub_app(latency: float, tests: int, token_latency: float, token_expires_in: int,
+                   rate_limit: float = 0, burst: int = 1, daily_quota: int = 0) -> FastAPI:
+    """
+    The stand-in application - DVSA vehicle lookups, the token endpoint and its own counters.
+    rate_limit (requests a second, bursting to burst) and daily_quota are off when 0.
+    """
+    app = FastAPI()
+    stats = {"vehicleRequests": 0, "tokenRequests": 0, "inFlight": 0, "peakInFlight": 0, "throttled": 0}
+    bucket = {"tokens": float(burst), "updated": time.monotonic(), "used": 0}
+
+    def over_quota():
+        """Retry-After seconds when the request is over a quota, None when it may go ahead"""
+        if daily_quota and bucket["used"] >= daily_quota:
+            return 3600
+        if rate_limit:
+            now = time.monotonic()
+            bucket["tokens"] = min(burst, bucket["tokens"] + (now - bucket["updated"]) * rate_limit)
+            bucket["updated"] = now
+            if bucket["tokens"] < 1:
+                return math.ceil((1 - bucket["tokens"]) / rate_limit)
+            bucket["tokens"] -= 1
+        bucket["used"] += 1
+        return None
+
+    @app.post("/token")
+    async def token():
+        stats["tokenRequests"] += 1
+        await asyncio.sleep(token_latency)
+        return {
+            "access_token": f"stub-token-{stats['tokenRequests']}",
+            "expires_in": token_expires_in,
+            "token_type": "Bearer"
+        }
+
+    @app.get("/v1/trade/vehicles/{lookup}/{value}")
+    async def vehicle(lookup: str, value: str, request: Request):
+        stats["vehicleRequests"] += 1
+        retry_after = over_quota()
+        if retry_after is not None:
+            stats["throttled"] += 1
+            return JSONResponse(
+                status_code=429, headers={"Retry-After": str(retry_after)},
+                content={"errorCode": "MOTH-RL-01", "errorMessage": "Too many requests"}
+            )
+        
+        stats["inFlight"] += 1
+        stats["peakInFlight"] = max(stats["peakInFlight"], stats["inFlight"])
+        try:
+            await asyncio.sleep(latency)
+        finally:
+            stats["inFlight"] -= 1
+        
+        if not request.headers.get("authorization", "").startswith("Bearer stub-token-"):
+            return JSONResponse(status_code=401, content={"errorCode": "MOTH-UA-01", "errorMessage": "Unauthorized"})
+        if value.upper().startswith("NOTFOUND"):
+            return JSONResponse(status_code=404, content={"errorCode": "MOTH-NF-01", "errorMessage": "Not found"})
+        return synthetic_mot_history(value.upper(), tests)
+
+    @app.get("/stub/stats")
+    async def get_stats():
+        return stats
+
+    @app.post("/stub/reset")
+    async def reset():
+        stats.update({"vehicleRequests": 0, "tokenRequests": 0, "peakInFlight": 0, "throttled": 0})
+        return stats
+    
+    return app
+
+def serve_stub(port: int, settings: dict):
+    uvicorn.run(build_stub_app(**settings), host="127.0.0.1", port=port, log_level="warning", lifespan="off")
+
+class DvsaStub:
+    """DVSA stand-in served by uvicorn in a child process"""
+    def __init__(self, latency: float = 0.05, tests: int = 10, token_latency: float = 0.0, token_expires_in: int = 3600,
+                 rate_limit: float = 0, burst: int = 1, daily_quota: int = 0):
+        self.settings = {
+            "latency": latency,
+            "tests": tests,
+            "token_latency": token_latency,
+            "token_expires_in": token_expires_in,
+            "rate_limit": rate_limit,
+            "burst": burst,
+            "daily_quota": daily_quota
+        }
+        self.port = self.free_port()
+        self.url = f"http://127.0.0.1:{self.port}"
+        self.process = None
+
+    @staticmethod
+    def free_port() -> int:
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            return sock.getsockname()[1]
+
+    def start(self) -> "DvsaStub":
+        context = multiprocessing.get_context("spawn")
+        self.process = context.Process(target=serve_stub, args=(self.port, self.settings), daemon=True)
+        self.process.start()
+        
+        deadline = time.monotonic() + 10
+        while True:
+            try:
+                self.stats()
+                return self
+            except httpx.TransportError:
+                if time.monotonic() > deadline or not self.process.is_alive():
+                    raise RuntimeError("DVSA stub failed to start")
+                time.sleep(0.05)
+
+    def stats(self) -> dict:
+        return httpx.get(f"{self.url}/stub/stats").json()
+
+    def reset(self):
+        httpx.post(f"{self.url}/stub/reset")
+
+    def stop(self):
+        self.process.terminate()
+        self.process.join(timeout=5)
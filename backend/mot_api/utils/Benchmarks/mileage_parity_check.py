@@ -0,0 +1,169 @@
+"""
+Parity check of the server-side mileage analytics against the frontend's mileage anomaly
+detector (mileageAnomalyDetector.jsx), which MileageInsights falls back to.
+
+Random MOT histories - rollbacks, unchanged readings, short intervals and long gaps
+included - are parsed once by parse_odometer_readings, and the same readings go through
+mileage_analytics and, under Node, through findMileageAnomalies, findInactivityPeriods and
+calculateAccurateMileageStats. Anomalies, low-use periods and stats are compared field by
+field. The one intended difference is the severityDetail of a rollback under 100 miles:
+"minor" here, "major" in the JS, whose branch order never reaches "minor". Readings are all
+in miles - the server converts kilometre readings and the frontend's local fallback doesn't,
+so those histories differ by design.
+
+Needs node on the PATH.
+
+Usage (from backend/mot_api):
+    python utils/Benchmarks/mileage_parity_check.py
+    python utils/Benchmarks/mileage_parity_check.py --histories 2000 --seed 7
+"""
+import os
+import sys
+import json
+import math
+import random
+import shutil
+import logging
+import argparse
+import tempfile
+import subprocess
+from datetime import datetime, timedelta, timezone
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+DETECTOR = os.path.join(
+    BASE_DIR, "..", "..", "frontend", "src", "components", "Premium", "DVLA", "Mileage", "MileageInsights",
+    "mileageAnomalyDetector.jsx"
+)
+
+# Reads readings as [[epoch ms, miles], ...] per history on stdin, writes the detector's results
+NODE_RUNNER = """
+import { readFileSync } from "fs";
+import { findMileageAnomalies, findInactivityPeriods, calculateAccurateMileageStats } from "./mileageAnomalyDetector.mjs";
+
+const histories = JSON.parse(readFileSync(0, "utf8"));
+const results = histories.map((readings) => {
+  const data = readings.map(([time, mileage]) => ({ date: new Date(time), mileage }));
+  const anomalies = findMileageAnomalies(data);
+  return {
+    anomalies: anomalies.map(({ index, type, severity, severityDetail, message, details }) => ({
+      index, type, severity, severityDetail, message,
+      diff: details.diff, days: details.days ?? details.timeBetweenReadings,
+      dailyAvg: details.dailyAvg, annualizedMileage: details.annualizedMileage
+    })),
+    inactivityPeriods: findInactivityPeriods(data).map((period) => ({
+      startIndex: data.indexOf(period.start), endIndex: data.indexOf(period.end),
+      days: period.days, dailyAverage: period.dailyAverage, description: period.description, severity: period.severity
+    })),
+    stats: calculateAccurateMileageStats(data, anomalies)
+  };
+});
+process.stdout.write(JSON.stringify(results));
+"""
+
+def random_history(rng, index):
+    """MOT tests of one vehicle, newest first as DVSA lists them"""
+    tests = []
+    when = datetime(2005, 1, 1, tzinfo=timezone.utc) + timedelta(days=rng.randint(0, 2000), minutes=rng.randint(0, 1440))
+    mileage = rng.randint(1, 20000)
+    for _ in range(rng.randint(0, 15)):
+        when += timedelta(days=rng.choice([rng.randint(1, 10), rng.randint(20, 120), rng.randint(300, 400), rng.randint(500, 1200)]),
+                          minutes=rng.randint(0, 1440))
+        mileage = max(1, mileage + rng.choice([0, -rng.randint(1, 99), -rng.randint(100, 5000), rng.randint(1, 2000),
+                                               rng.randint(3000, 15000), rng.randint(20000, 120000)]))
+        tests.append({
+            "completedDate": when.isoformat(timespec="milliseconds").replace("+00:00", "Z"),
+            "odometerValue": str(mileage),
+            "odometerUnit": "MI",
+            "motTestNumber": str(index * 100 + len(tests))
+        })
+    return list(reversed(tests))
+
+def close(a, b):
+    if isinstance(a, float) or isinstance(b, float):
+        return a is not None and b is not None and math.isclose(a, b, rel_tol=1e-9, abs_tol=1e-9)
+    return a == b
+
+def compare(expected, actual):
+    """Differences between the JS (expected) and server (actual) results of one history"""
+    differences = []
+    if len(expected["anomalies"]) != len(actual["anomalies"]):
+        return [f"anomalies: {len(expected['anomalies'])} in JS, {len(actual['anomalies'])} here"]
+    for js, py in zip(expected["anomalies"], actual["anomalies"]):
+        details = py["details"]
+        fields = {
+            "index": py["index"], "type": py["type"], "severity": py["severity"], "message": py["message"],
+            "diff": details["diff"], "days": details.get("days", details.get("timeBetweenReadings")),
+            "dailyAvg": details.get("dailyAvg"), "annualizedMileage": details.get("annualizedMileage")
+        }
+        if py["type"] == "decrease":
+            intended = "major" if py["severityDetail"] == "minor" else py["severityDetail"]
+            fields["severityDetail"] = intended
+        differences += [f"anomaly {py['index']} {name}: {js.get(name)!r} in JS, {value!r} here"
+                        for name, value in fields.items() if not close(js.get(name), value)]
+
+    if len(expected["inactivityPeriods"]) != len(actual["inactivityPeriods"]):
+        return differences + [f"low-use periods: {len(expected['inactivityPeriods'])} in JS, {len(actual['inactivityPeriods'])} here"]
+    for js, py in zip(expected["inactivityPeriods"], actual["inactivityPeriods"]):
+        differences += [f"low-use period {py['startIndex']} {name}: {js[name]!r} in JS, {py[name]!r} here"
+                        for name in ("startIndex", "endIndex", "days", "dailyAverage", "description", "severity")
+                        if not close(js[name], py[name])]
+
+    differences += [f"stats {name}: {value!r} in JS, {actual['stats'].get(name)!r} here"
+                    for name, value in expected["stats"].items() if not close(value, actual["stats"].get(name))]
+    return differences
+
+def run(args):
+    os.environ.update({
+        "MOT_CLIENT_ID": "parity-check",
+        "MOT_CLIENT_SECRET": "parity-check",
+        "MOT_TENANT_ID": "parity-check",
+        "MOT_API_KEY": "parity-check",
+        "VEHICLE_STORE_PATH": ""
+    })
+    sys.path.insert(0, BASE_DIR)
+    import main
+    logging.disable(logging.CRITICAL)
+
+    rng = random.Random(args.seed)
+    histories = [random_history(rng, i) for i in range(args.histories)]
+    readings = [main.parse_odometer_readings(tests) for tests in histories]
+
+    work_dir = tempfile.mkdtemp(prefix="mileage_parity_")
+    try:
+        shutil.copyfile(DETECTOR, os.path.join(work_dir, "mileageAnomalyDetector.mjs"))
+        with open(os.path.join(work_dir, "run.mjs"), "w") as f:
+            f.write(NODE_RUNNER)
+        payload = json.dumps([[[t * 1000, m] for t, m in zip(r["times"].tolist(), r["miles"].tolist())] for r in readings])
+        completed = subprocess.run(["node", "run.mjs"], cwd=work_dir, input=payload, capture_output=True, text=True, check=True)
+        expected = json.loads(completed.stdout)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    mismatched = 0
+    counts = {"anomalies": 0, "inactivityPeriods": 0, "clocked": 0}
+    for i, (tests, js) in enumerate(zip(histories, expected)):
+        actual = main.mileage_analytics({"motTests": tests})
+        counts["anomalies"] += len(actual["anomalies"])
+        counts["inactivityPeriods"] += len(actual["inactivityPeriods"])
+        counts["clocked"] += actual["stats"]["hasBeenClocked"]
+        differences = compare(js, actual)
+        if differences:
+            mismatched += 1
+            if mismatched <= 5:
+                print(f"history {i}: " + "; ".join(differences[:5]))
+
+    print(
+        f"{args.histories} histories, {counts['anomalies']} anomalies, {counts['inactivityPeriods']} low-use periods, "
+        f"{counts['clocked']} clocked - {mismatched} differ from the JS detector"
+    )
+    return mismatched == 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="mot_api mileage analytics parity check against the frontend detector")
+    parser.add_argument("--histories", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    ok = run(args)
+    print("OK" if ok else "FAILED")
+    sys.exit(0 if ok else 1)
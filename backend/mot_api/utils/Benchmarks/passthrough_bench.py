@@ -0,0 +1,117 @@
+"""
+CPU cost of a cached vehicle response against MOT history length, for the raw passthrough
+the vehicle endpoints use and for the response model path they replaced.
+
+Cached vehicles were validated when they were cached, and are served as the JSON body
+written out from their compact form when they were last served (or, with
+VEHICLE_CACHE_COMPACT=false, as the body kept with the cache entry); the model path
+validates the data against Union[VehicleWithMot, NewRegVehicle] and serializes it again on
+every request, which grows with every MotTest and Defect. Both are cache hits of the same vehicle through the whole
+app (middleware included) called in-process, so the difference is the serialization alone.
+The two bodies are also checked to be byte for byte the same.
+
+Usage (from backend/mot_api):
+    python utils/Benchmarks/passthrough_bench.py
+    python utils/Benchmarks/passthrough_bench.py --tests 1 10 50 100 --requests 5000
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import logging
+import argparse
+from typing import Union
+
+from fastapi import Response
+
+from dvsa_stub import synthetic_mot_history
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+
+async def call(app, path):
+    """GET path straight through the ASGI app, returning (status, body)"""
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "root_path": "", "query_string": b"",
+        "headers": [(b"host", b"mot-api")], "server": ("mot-api", 80), "client": ("127.0.0.1", 50000)
+    }
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    await app(scope, receive, send)
+    status = next(m["status"] for m in messages if m["type"] == "http.response.start")
+    return status, b"".join(m.get("body", b"") for m in messages if m["type"] == "http.response.body")
+
+async def cpu_per_request(app, path, requests):
+    """Mean process CPU time of a request in microseconds"""
+    for _ in range(min(requests, 100)):
+        await call(app, path)
+    started = time.process_time()
+    for _ in range(requests):
+        await call(app, path)
+    return (time.process_time() - started) / requests * 1e6
+
+def add_model_route(main, parsed):
+    """
+    The vehicle endpoint as it was before the passthrough - the same cache lookup, then the
+    parsed JSON (from parsed, by registration) through the response model on every request
+    """
+    @main.app.get("/bench/model/{registration}", response_model=Union[main.VehicleWithMot, main.NewRegVehicle])
+    async def get_vehicle_through_model(registration: str, response: Response):
+        vehicle_data, cache_status, age = await main.get_vehicle("registration", registration)
+        main.set_vehicle_cache_headers(response, cache_status, age)
+        return parsed[registration]
+
+async def main_async(args):
+    os.environ.update({
+        "MOT_CLIENT_ID": "passthrough-bench",
+        "MOT_CLIENT_SECRET": "passthrough-bench",
+        "MOT_TENANT_ID": "passthrough-bench",
+        "MOT_API_KEY": "passthrough-bench",
+        "MOT_API_BASE_URL": "http://127.0.0.1:9",  # Never called - every lookup is a cache hit
+        "VEHICLE_STORE_PATH": ""
+    })
+    sys.path.insert(0, BASE_DIR)
+    import main
+    logging.disable(logging.CRITICAL)
+    parsed = {}
+    add_model_route(main, parsed)
+    main.TOKEN_CACHE.update({"access_token": "passthrough-bench", "expires_at": time.time() + 3600})
+
+    ok = True
+    print(f"{'tests':>6} {'body KB':>8} {'model us':>9} {'raw us':>8} {'saved':>6}")
+    try:
+        for tests in args.tests:
+            registration = f"PT{tests}"
+            parsed[registration] = json.loads(json.dumps(synthetic_mot_history(registration, tests)))
+            main.VEHICLE_CACHE.set(main.vehicle_cache_key("registration", registration), main.compact_vehicle(parsed[registration]))
+
+            model_status, model_body = await call(main.app, f"/bench/model/{registration}")
+            raw_status, raw_body = await call(main.app, f"/api/v1/vehicle/registration/{registration}")
+            if model_status != 200 or raw_status != 200 or model_body != raw_body:
+                print(f"{tests:>6} bodies differ (model {model_status}, raw {raw_status})")
+                ok = False
+                continue
+
+            model_cpu = await cpu_per_request(main.app, f"/bench/model/{registration}", args.requests)
+            raw_cpu = await cpu_per_request(main.app, f"/api/v1/vehicle/registration/{registration}", args.requests)
+            print(f"{tests:>6} {len(raw_body) / 1024:>8.1f} {model_cpu:>9.0f} {raw_cpu:>8.0f} {1 - raw_cpu / model_cpu:>6.0%}")
+    finally:
+        await main.shutdown_event()
+    return ok
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="mot_api raw passthrough CPU benchmark")
+    parser.add_argument("--tests", type=int, nargs="+", default=[0, 1, 5, 10, 20, 40, 80], help="MOT history lengths")
+    parser.add_argument("--requests", type=int, default=2000, help="Requests timed per history length and path")
+    args = parser.parse_args()
+
+    ok = asyncio.run(main_async(args))
+    print("OK" if ok else "FAILED")
+    sys.exit(0 if ok else 1)
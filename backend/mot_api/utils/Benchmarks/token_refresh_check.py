@@ -0,0 +1,110 @@
+"""
+Token refresh check for mot_api against a local stand-in token endpoint.
+
+1. Stampede: many concurrent lookups with no cached token must cause exactly one
+   token request, and every lookup must succeed with it.
+2. Renewal: with short lived tokens and the background renewal running, lookups
+   across several token lifetimes must never wait for the token endpoint.
+
+Usage (from backend/mot_api):
+    python utils/Benchmarks/token_refresh_check.py
+    python utils/Benchmarks/token_refresh_check.py --concurrency 500 --token-latency 0.5
+"""
+import os
+import sys
+import time
+import asyncio
+import logging
+import argparse
+
+import httpx
+
+from dvsa_stub import DvsaStub
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+
+async def stampede(main, client, stub, concurrency):
+    """Concurrent lookups with an empty token cache"""
+    main.TOKEN_CACHE.update({"access_token": None, "expires_at": 0})
+    main.VEHICLE_CACHE.clear()
+    stub.reset()
+    
+    responses = await asyncio.gather(*(
+        client.get(f"/api/v1/vehicle/registration/TS{i}") for i in range(concurrency)
+    ))
+    failed = [r.status_code for r in responses if r.status_code != 200]
+    token_requests = stub.stats()["tokenRequests"]
+    print(f"stampede: {concurrency} concurrent lookups, {len(failed)} failed, {token_requests} token request(s)")
+    return not failed and token_requests == 1
+
+async def renewal(main, client, stub, seconds, token_latency, upstream_latency):
+    """Steady lookups across several token lifetimes with the background renewal running"""
+    main.TOKEN_CACHE.update({"access_token": None, "expires_at": 0})
+    await main.startup_event()
+    await asyncio.sleep(token_latency * 2)  # Initial token
+    stub.reset()
+    
+    latencies = []
+    deadline = time.monotonic() + seconds
+    i = 0
+    while time.monotonic() < deadline:
+        main.VEHICLE_CACHE.clear()
+        started = time.perf_counter()
+        response = await client.get(f"/api/v1/vehicle/registration/RN{i}")
+        latencies.append(time.perf_counter() - started)
+        if response.status_code != 200:
+            print(f"renewal: lookup failed with {response.status_code}")
+            return False
+        i += 1
+        await asyncio.sleep(0.05)
+    
+    token_requests = stub.stats()["tokenRequests"]
+    slowest = max(latencies)
+    print(
+        f"renewal: {len(latencies)} lookups over {seconds}s, {token_requests} background token renewal(s), "
+        f"slowest lookup {slowest * 1000:.0f} ms (token latency {token_latency * 1000:.0f} ms)"
+    )
+    # No lookup may include a token round-trip on top of the DVSA one
+    return token_requests >= 1 and slowest < upstream_latency + token_latency * 0.8
+
+async def main_async(args):
+    # Tokens are usable for args.token_lifetime seconds on top of mot_api's 300 second expiry
+    # buffer and the 60 seconds get_access_token keeps spare; renewal comes half way through
+    stub = DvsaStub(latency=args.latency, token_latency=args.token_latency,
+                    token_expires_in=300 + 60 + args.token_lifetime).start()
+    os.environ.update({
+        "MOT_CLIENT_ID": "token-check",
+        "MOT_CLIENT_SECRET": "token-check",
+        "MOT_TENANT_ID": "token-check",
+        "MOT_API_KEY": "token-check",
+        "MOT_API_BASE_URL": stub.url,
+        "MOT_TOKEN_URL": stub.url + "/token",
+        "TOKEN_RENEW_BEFORE": str(60 + args.token_lifetime / 2),
+        "UPSTREAM_RATE_LIMIT": "0",  # The stand-in has no quota - no pacing, so the service alone is measured
+        "VEHICLE_STORE_PATH": ""  # Every run starts cold
+    })
+    sys.path.insert(0, BASE_DIR)
+    import main
+    logging.disable(logging.CRITICAL)
+    
+    transport = httpx.ASGITransport(app=main.app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://mot-api", timeout=60) as client:
+            ok = await stampede(main, client, stub, args.concurrency)
+            ok = await renewal(main, client, stub, args.token_lifetime * 3, args.token_latency, args.latency + 0.1) and ok
+    finally:
+        await main.shutdown_event()
+        stub.stop()
+    return ok
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="mot_api token refresh check")
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.05, help="Stand-in DVSA latency in seconds")
+    parser.add_argument("--token-latency", type=float, default=0.3, help="Stand-in token endpoint latency in seconds")
+    parser.add_argument("--token-lifetime", type=float, default=4, help="Usable token lifetime in seconds")
+    args = parser.parse_args()
+    
+    ok = asyncio.run(main_async(args))
+    print("OK" if ok else "FAILED")
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,131 @@
+"""
+Concurrency scaling load test for mot_api against a local DVSA stand-in.
+
+Every request is a cache miss for a distinct registration, so each one makes a DVSA
+round-trip of --latency seconds. With a non-blocking upstream client, throughput grows
+with concurrency (up to the connection limit) and /health stays fast under load; with a
+blocking client it stays at roughly 1 / latency requests per second.
+
+With --hot every worker asks for the same registration at the same moment instead, as
+when a shared link goes round; concurrent misses are coalesced, so each round should
+make a single upstream request per step.
+
+Usage (from backend/mot_api):
+    python utils/Benchmarks/upstream_load.py
+    python utils/Benchmarks/upstream_load.py --concurrency 1 10 50 200 --latency 0.2 --output results.json
+    python utils/Benchmarks/upstream_load.py --hot
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import logging
+import argparse
+import statistics
+
+import httpx
+
+from dvsa_stub import DvsaStub
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+async def timed_get(client, url, latencies):
+    started = time.perf_counter()
+    response = await client.get(url)
+    latencies.append(time.perf_counter() - started)
+    return response.status_code
+
+async def run_round(main, client, concurrency, requests_per_worker, round_id, hot=False):
+    """Fire concurrency workers of sequential cache-miss lookups, probing /health meanwhile"""
+    main.VEHICLE_CACHE.clear()
+    latencies, health_latencies = [], []
+    done = asyncio.Event()
+    
+    async def worker(worker_id):
+        for i in range(requests_per_worker):
+            registration = f"LT{round_id}N{i}" if hot else f"LT{round_id}W{worker_id}N{i}"
+            status = await timed_get(client, f"/api/v1/vehicle/registration/{registration}", latencies)
+            if status != 200:
+                raise RuntimeError(f"Lookup of {registration} failed with {status}")
+    
+    async def health_probe():
+        while not done.is_set():
+            await timed_get(client, "/health", health_latencies)
+            await asyncio.sleep(0.01)
+    
+    probe = asyncio.create_task(health_probe())
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(w) for w in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    done.set()
+    await probe
+    
+    return {
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "seconds": round(elapsed, 3),
+        "requestsPerSecond": round(len(latencies) / elapsed, 1),
+        "p50Ms": round(statistics.median(latencies) * 1000, 1),
+        "p95Ms": round(percentile(latencies, 0.95) * 1000, 1),
+        "healthP95Ms": round(percentile(health_latencies, 0.95) * 1000, 1) if health_latencies else None
+    }
+
+async def main_async(args):
+    stub = DvsaStub(latency=args.latency).start()
+    os.environ.update({
+        "MOT_CLIENT_ID": "load-test",
+        "MOT_CLIENT_SECRET": "load-test",
+        "MOT_TENANT_ID": "load-test",
+        "MOT_API_KEY": "load-test",
+        "MOT_API_BASE_URL": stub.url,
+        "MOT_TOKEN_URL": stub.url + "/token",
+        "UPSTREAM_RATE_LIMIT": "0",  # The stand-in has no quota - no pacing, so the service alone is measured
+        "VEHICLE_STORE_PATH": ""  # Every run starts cold
+    })
+    sys.path.insert(0, BASE_DIR)
+    import main
+    logging.disable(logging.CRITICAL)
+    
+    results = []
+    transport = httpx.ASGITransport(app=main.app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://mot-api", timeout=60) as client:
+            await client.get("/api/v1/vehicle/registration/WARMUP")  # Token and first connection
+            for round_id, concurrency in enumerate(args.concurrency):
+                stub.reset()
+                row = await run_round(main, client, concurrency, args.requests, round_id, args.hot)
+                stats = stub.stats()
+                row["upstreamRequests"] = stats["vehicleRequests"]
+                row["upstreamPeakInFlight"] = stats["peakInFlight"]
+                results.append(row)
+                print(
+                    f"concurrency {concurrency:>4}  {row['requests']:>5} requests  {row['requestsPerSecond']:>8.1f} req/s  "
+                    f"p50 {row['p50Ms']:>7.1f} ms  p95 {row['p95Ms']:>7.1f} ms  "
+                    f"/health p95 {row['healthP95Ms']} ms  upstream requests {row['upstreamRequests']} "
+                    f"(peak in flight {row['upstreamPeakInFlight']})"
+                )
+    finally:
+        await main.shutdown_event()
+        stub.stop()
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="mot_api upstream concurrency load test")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 10, 50, 100])
+    parser.add_argument("--requests", type=int, default=5, help="Sequential lookups per concurrent worker")
+    parser.add_argument("--latency", type=float, default=0.1, help="Stand-in DVSA latency in seconds")
+    parser.add_argument("--hot", action="store_true", help="Every worker looks up the same registrations")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+    
+    results = asyncio.run(main_async(args))
+    
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
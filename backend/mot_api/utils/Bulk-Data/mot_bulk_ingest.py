@@ -0,0 +1,299 @@
+"""
+Offline ingest of DVSA MOT bulk data files into the local MOT dataset mot_api answers from
+(see MOT_DATASET_PATH in main.py), so most history lookups need no upstream call.
+
+Reads the bulk file and the monthly delta files in either shape:
+- JSON: one vehicle per record, as the MOT History API returns it (registration, make, ...,
+  motTests, and vin where present), as JSON lines or a JSON array. Each record replaces the
+  vehicle's history.
+- CSV: one MOT test per row, with columns named after the API fields - the vehicle's
+  (registration, vin, make, model, ...) and the test's (completedDate, testResult, ...,
+  motTestNumber, and defects as a JSON array). Rows add to or replace tests of the vehicle
+  by test number.
+Files may be gzipped, or zipped with any number of them inside.
+
+Files are streamed and written in chunks of --chunk-size records, one transaction per chunk,
+so memory use doesn't grow with the file. Each chunk also records how far into the file the
+ingest got: an interrupted ingest picks up from its last chunk when run again, and files
+already ingested are skipped, so each month's delta can be given along with the ones before
+it. Every file is dated (--as-of, else a date in its name, else its modification date) and a
+vehicle is only replaced by data from a file dated the same or later.
+
+Usage (from backend/mot_api):
+    python "utils/Bulk-Data/mot_bulk_ingest.py" bulk-light-vehicle_2025-06-01.json.gz
+    python "utils/Bulk-Data/mot_bulk_ingest.py" --db mot_dataset.db delta-2025-07-01.csv delta-2025-08-01.csv.gz
+    python "utils/Bulk-Data/mot_bulk_ingest.py" --status
+"""
+import io
+import os
+import re
+import csv
+import sys
+import json
+import time
+import zlib
+import gzip
+import sqlite3
+import zipfile
+import argparse
+from datetime import date, datetime
+
+VEHICLE_FIELDS = (
+    "registration", "vin", "make", "model", "fuelType", "primaryColour", "registrationDate", "manufactureDate",
+    "firstUsedDate", "engineSize", "hasOutstandingRecall", "manufactureYear", "motTestDueDate"
+)
+TEST_FIELDS = (
+    "completedDate", "testResult", "expiryDate", "odometerValue", "odometerUnit", "odometerResultType",
+    "motTestNumber", "dataSource", "location", "defects"
+)
+READ_SIZE = 1024 * 1024  # Characters read from a JSON file at a time
+
+SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS vehicles ("
+    "registration TEXT PRIMARY KEY, vin TEXT, as_of TEXT NOT NULL, data BLOB NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS vehicles_vin ON vehicles (vin) WHERE vin IS NOT NULL",
+    "CREATE TABLE IF NOT EXISTS ingested_files ("
+    "name TEXT PRIMARY KEY, size INTEGER NOT NULL, as_of TEXT NOT NULL, records INTEGER NOT NULL, "
+    "done INTEGER NOT NULL, started_at REAL NOT NULL, finished_at REAL)"
+)
+
+def normalize(value):
+    """Registration or VIN without spaces, upper case - as mot_api looks them up"""
+    return re.sub(r"\s+", "", value).upper() if value else None
+
+def open_database(path):
+    connection = sqlite3.connect(path, isolation_level=None)
+    connection.execute("PRAGMA journal_mode=WAL")  # mot_api can keep reading while a delta goes in
+    connection.execute("PRAGMA synchronous=NORMAL")
+    for statement in SCHEMA:
+        connection.execute(statement)
+    return connection
+
+def file_date(path, as_of=None):
+    """The date a file's data is as of - given, from a date in its name, or its modification date"""
+    if as_of:
+        return date.fromisoformat(as_of).isoformat()
+    name = os.path.basename(path)
+    for pattern, order in ((r"(\d{4})-(\d{2})-(\d{2})", "ymd"), (r"(\d{2})-(\d{2})-(\d{4})", "dmy"), (r"(\d{4})(\d{2})(\d{2})", "ymd")):
+        match = re.search(pattern, name)
+        if match:
+            parts = [int(part) for part in match.groups()]
+            year, month, day = parts if order == "ymd" else parts[::-1]
+            try:
+                return date(year, month, day).isoformat()
+            except ValueError:
+                pass
+    return date.fromtimestamp(os.path.getmtime(path)).isoformat()
+
+def open_sources(path):
+    """(name, size, text stream) for each data file in path - itself, or the files in a zip"""
+    size = os.path.getsize(path)
+    if zipfile.is_zipfile(path):
+        with zipfile.ZipFile(path) as archive:
+            for member in archive.infolist():
+                if member.is_dir():
+                    continue
+                with archive.open(member) as raw:
+                    if member.filename.endswith(".gz"):
+                        raw = gzip.GzipFile(fileobj=raw)
+                    yield f"{os.path.basename(path)}:{member.filename}", member.file_size, member.filename, io.TextIOWrapper(raw, encoding="utf-8", newline="")
+        return
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rb") as raw:
+        yield os.path.basename(path), size, path, io.TextIOWrapper(raw, encoding="utf-8", newline="")
+
+def file_format(name):
+    base = name[:-3] if name.endswith(".gz") else name
+    return "csv" if base.lower().endswith(".csv") else "json"
+
+def iter_json_records(stream):
+    """Vehicle records of JSON lines or a JSON array, decoded one at a time"""
+    decoder = json.JSONDecoder()
+    buffer, position, eof = "", 0, False
+    while True:
+        while position < len(buffer) and buffer[position] in " \t\r\n,[]":
+            position += 1
+        if position == len(buffer):
+            if eof:
+                return
+            buffer, position = stream.read(READ_SIZE), 0
+            eof = not buffer
+            continue
+        try:
+            record, position = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            chunk = stream.read(READ_SIZE)  # The record runs on past the buffer
+            buffer, position, eof = buffer[position:] + chunk, 0, not chunk
+            continue
+        yield record
+
+def iter_csv_records(stream):
+    """A vehicle record with one test for each CSV row"""
+    for row in csv.DictReader(stream):
+        row = {key: (value if value != "" else None) for key, value in row.items() if key}
+        vehicle = {field: row.get(field) for field in VEHICLE_FIELDS if field in row}
+        if any(row.get(field) is not None for field in TEST_FIELDS):
+            test = {field: row.get(field) for field in TEST_FIELDS}
+            if test["defects"] is not None:
+                test["defects"] = json.loads(test["defects"])
+            vehicle["motTests"] = [test]
+        yield vehicle
+
+def test_key(test):
+    return test.get("motTestNumber") or f"{test.get('completedDate')}/{test.get('testResult')}"
+
+def merge_tests(existing, tests):
+    """`existing` tests with `tests` added, replacing any with the same test number, newest first"""
+    merged = {test_key(test): test for test in existing}
+    merged.update((test_key(test), test) for test in tests)
+    return sorted(merged.values(), key=lambda test: test.get("completedDate") or "", reverse=True)
+
+def write_chunk(connection, records, replace, as_of):
+    """
+    Upsert a chunk of vehicle records. Whole records replace the vehicle; test rows are merged
+    into it. Either way data as of an earlier date than the stored vehicle's leaves it as it is,
+    apart from tests it didn't have.
+    """
+    vehicles = {}
+    if replace:
+        for record in records:
+            registration = normalize(record.get("registration"))
+            if registration:
+                vehicles[registration] = record  # The last record of a registration in the chunk wins
+    else:
+        for record in records:
+            registration = normalize(record.get("registration"))
+            if not registration:
+                continue
+            vehicle = vehicles.get(registration)
+            if vehicle is None:
+                vehicles[registration] = vehicle = {"motTests": []}
+            tests = vehicle["motTests"] + record.pop("motTests", [])
+            vehicle.update((key, value) for key, value in record.items() if value is not None)
+            vehicle["motTests"] = tests
+
+    for registration, vehicle in vehicles.items():
+        row = connection.execute("SELECT as_of, data FROM vehicles WHERE registration = ?", (registration,)).fetchone()
+        vehicle_as_of = as_of
+        if row is None:
+            if not replace:
+                vehicle["motTests"] = merge_tests([], vehicle["motTests"])
+        else:
+            stored = json.loads(zlib.decompress(row[1]))
+            if as_of < row[0]:
+                # Older than the stored vehicle - only take the tests it doesn't have
+                stored["motTests"] = merge_tests(vehicle.get("motTests", []), stored.get("motTests", []))
+                vehicle, vehicle_as_of = stored, row[0]
+            elif not replace:
+                stored.update((key, value) for key, value in vehicle.items() if key != "motTests")
+                stored["motTests"] = merge_tests(stored.get("motTests", []), vehicle["motTests"])
+                vehicle = stored
+        vehicle["registration"] = vehicle.get("registration") or registration
+        data = zlib.compress(json.dumps(vehicle, separators=(",", ":")).encode("utf-8"))
+        connection.execute(
+            "INSERT INTO vehicles (registration, vin, as_of, data) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT (registration) DO UPDATE SET vin = excluded.vin, as_of = excluded.as_of, data = excluded.data",
+            (registration, normalize(vehicle.get("vin")), vehicle_as_of, data)
+        )
+
+def ingest_source(connection, name, size, stream, data_format, as_of, chunk_size, log):
+    """Ingest one data file from where a previous run stopped, returning the records written"""
+    row = connection.execute("SELECT records, done FROM ingested_files WHERE name = ? AND size = ?", (name, size)).fetchone()
+    if row is not None and row[1]:
+        log(f"{name}: already ingested ({row[0]} records), skipping")
+        return 0
+    skip = row[0] if row is not None else 0
+    if row is None:
+        connection.execute(
+            "INSERT OR REPLACE INTO ingested_files (name, size, as_of, records, done, started_at) VALUES (?, ?, ?, 0, 0, ?)",
+            (name, size, as_of, time.time())
+        )
+    elif skip:
+        log(f"{name}: resuming after {skip} records")
+
+    records = iter_csv_records(stream) if data_format == "csv" else iter_json_records(stream)
+    done, written, chunk = 0, 0, []
+    started = time.monotonic()
+    for record in records:
+        done += 1
+        if done <= skip:
+            continue
+        chunk.append(record)
+        if len(chunk) >= chunk_size:
+            commit_chunk(connection, name, chunk, data_format, as_of, done)
+            written += len(chunk)
+            chunk = []
+            log(f"{name}: {done} records ({written / (time.monotonic() - started):,.0f} a second)")
+    commit_chunk(connection, name, chunk, data_format, as_of, done, finished=True)
+    written += len(chunk)
+    log(f"{name}: done, {done} records ({written} written this run)")
+    return written
+
+def commit_chunk(connection, name, chunk, data_format, as_of, records, finished=False):
+    """Write a chunk and the progress it brings the file to in one transaction"""
+    connection.execute("BEGIN IMMEDIATE")
+    try:
+        write_chunk(connection, chunk, data_format != "csv", as_of)
+        connection.execute(
+            "UPDATE ingested_files SET records = ?, done = ?, finished_at = ? WHERE name = ?",
+            (records, int(finished), time.time() if finished else None, name)
+        )
+        connection.execute("COMMIT")
+    except BaseException:
+        connection.execute("ROLLBACK")
+        raise
+
+def ingest(db_path, paths, as_of=None, chunk_size=5000, log=print):
+    """Ingest files in the order given, returning the records written"""
+    connection = open_database(db_path)
+    written = 0
+    try:
+        for path in paths:
+            dated = file_date(path, as_of)
+            for name, size, inner_name, stream in open_sources(path):
+                written += ingest_source(connection, name, size, stream, file_format(inner_name), dated, chunk_size, log)
+        connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    finally:
+        connection.close()
+    return written
+
+def status(db_path):
+    connection = open_database(db_path)
+    try:
+        vehicles, with_vin = connection.execute("SELECT COUNT(*), COUNT(vin) FROM vehicles").fetchone()
+        print(f"{db_path}: {vehicles} vehicles ({with_vin} with a VIN)")
+        for name, as_of, records, done, started_at, finished_at in connection.execute(
+            "SELECT name, as_of, records, done, started_at, finished_at FROM ingested_files ORDER BY started_at"
+        ):
+            when = datetime.fromtimestamp(finished_at or started_at).strftime("%Y-%m-%d %H:%M")
+            print(f"  {name}: as of {as_of}, {records} records, {'done' if done else 'incomplete'} ({when})")
+    finally:
+        connection.close()
+
+def peak_memory_mb():
+    """Peak resident memory of this process, where the platform reports it"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ingest DVSA MOT bulk and delta files into the local MOT dataset")
+    parser.add_argument("files", nargs="*", help="Bulk and delta files (.json, .jsonl, .csv, optionally .gz, or .zip), oldest first")
+    parser.add_argument("--db", default="mot_dataset.db", help="Dataset database (MOT_DATASET_PATH of mot_api)")
+    parser.add_argument("--as-of", help="Date the files' data is as of (YYYY-MM-DD), if not in their names")
+    parser.add_argument("--chunk-size", type=int, default=5000, help="Records written per transaction")
+    parser.add_argument("--status", action="store_true", help="Show the vehicles and files ingested so far")
+    args = parser.parse_args()
+
+    if args.status or not args.files:
+        status(args.db)
+        sys.exit(0)
+    started = time.monotonic()
+    written = ingest(args.db, args.files, args.as_of, args.chunk_size)
+    peak = peak_memory_mb()
+    print(f"Ingested {written} records in {time.monotonic() - started:.1f}s" + (f", peak memory {peak:.0f} MB" if peak else ""))
@@ -515,6 +515,7 @@ def find_vehicle_match(make: str, model: str, engine_code: Optional[str] = None,
     if key in vehicle_index:
         match = vehicle_index[key]
         match["_matchConfidence"] = "exact"
+        match["_matchScore"] = 1.0
         logger.info(f"Exact match found for {make} {model}")
         return match
     
@@ -525,6 +526,7 @@ def find_vehicle_match(make: str, model: str, engine_code: Optional[str] = None,
         if base_key in vehicle_index:
             match = vehicle_index[base_key]
             match["_matchConfidence"] = "high"
+            match["_matchScore"] = 0.95
             logger.info(f"Base model match found for {make} {model} -> {make} {base_model}")
             return match
     
@@ -535,6 +537,7 @@ def find_vehicle_match(make: str, model: str, engine_code: Optional[str] = None,
         if norm_key in vehicle_index:
             match = vehicle_index[norm_key]
             match["_matchConfidence"] = "high"
+            match["_matchScore"] = 0.9
             logger.info(f"Normalized model match found for {make} {model} -> {make} {normalized}")
             return match
     
@@ -641,6 +644,7 @@ def find_vehicle_match(make: str, model: str, engine_code: Optional[str] = None,
         
         # Add match confidence based on score
         score = candidates[0]["score"]
+        best_match["_matchScore"] = score
         if score > 0.9:
             best_match["_matchConfidence"] = "exact"
         elif score > 0.7:
@@ -992,6 +996,43 @@ async def lookup_bulletins_post(request: VehicleRequest, response: Response):
         detail=f"No bulletins found for {make} {model}{year_msg}{engine_msg}{category_msg}{bulletin_msg}"
     )
 
+@app.post("/api/v1/bulletins/resolve")
+async def resolve_bulletin_vehicle(request: VehicleRequest):
+    """
+    Resolve vehicle data to a bulletin vehicle_id without returning the bulletins.
+    Used by the vehicle identity resolver, which persists the mapping per registration.
+    """
+    if not bulletin_data or not vehicle_index:
+        raise HTTPException(status_code=500, detail="Bulletin data not loaded")
+    
+    make = request.make
+    model = request.model or request.vehicleModel
+    
+    if request.vehicle_id and request.vehicle_id in bulletin_data:
+        entry = vehicle_index.get(request.vehicle_id, {})
+        return {
+            "vehicle_id": request.vehicle_id,
+            "make": entry.get("make", make),
+            "model": entry.get("model", model),
+            "match_confidence": "exact",
+            "score": 1.0
+        }
+    
+    match = find_vehicle_match(make, model, extract_engine_code(request), extract_year_from_vehicleData(request))
+    if match and match["vehicle_id"] in bulletin_data:
+        return {
+            "vehicle_id": match["vehicle_id"],
+            "make": match["make"],
+            "model": match["model"],
+            "match_confidence": match.get("_matchConfidence", "fuzzy"),
+            "score": match.get("_matchScore", Config.MIN_MATCH_SCORE)
+        }
+    
+    raise HTTPException(
+        status_code=404,
+        detail=f"No bulletin vehicle found for {make} {model}"
+    )
+
 async def filter_bulletin_results(result, category=None, bulletin_id=None):
     """Helper function to filter bulletins by category or bulletin ID"""
     if category and category in result.get("categories", {}):
@@ -10,6 +10,7 @@ import sys
 import signal
 import subprocess
 import re
+import urllib.request
 from PyQt6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QGridLayout, QVBoxLayout, QHBoxLayout,
     QPushButton, QLabel, QTextEdit, QGroupBox, QFrame, QScrollBar
@@ -30,7 +31,8 @@ SERVICES = {
     "mot_api": {"name": "MOT API", "dir": os.path.join(BACKEND_DIR, "mot_api"), "cmd": "python", "args": ["main.py"]},
     "stripe_api": {"name": "Stripe API", "dir": os.path.join(BACKEND_DIR, "stripe_api"), "cmd": "python", "args": ["main.py"]},
     "frontend": {"name": "Frontend", "dir": FRONTEND_DIR, "cmd": "npm", "args": ["run", "dev"]},
-    "auto_data_api": {"name": "Auto Data API", "dir": os.path.join(BACKEND_DIR, "auto_data_api"), "cmd": "python", "args": ["main.py"]},
+    "auto_data_api": {"name": "Auto Data API", "dir": os.path.join(BACKEND_DIR, "auto_data_api"), "cmd": "python", "args": ["main.py"],
+                      "ready_url": "http://127.0.0.1:8005/ready"},  # Loads its catalog after the port opens
     "claude_api": {"name": "Claude API", "dir": os.path.join(BACKEND_DIR, "claude_api"), "cmd": "python", "args": ["main.py"]},
     "tsb_api": {"name": "TSB API", "dir": os.path.join(BACKEND_DIR, "tsb_api"), "cmd": "python", "args": ["app.py"]}
 
@@ -348,6 +350,11 @@ class ServicePanel(QGroupBox):
         else:
             self.npm_path = None
         
+        # Services with a readiness endpoint are polled until it answers 200
+        self.ready_timer = QTimer(self)
+        self.ready_timer.setInterval(1000)
+        self.ready_timer.timeout.connect(self.check_ready)
+        
         self.init_ui()
         
     def init_ui(self):
@@ -564,11 +571,29 @@ class ServicePanel(QGroupBox):
         # Check if process started successfully
         if self.process.waitForStarted(3000):  # Wait up to 3 seconds
             self.is_running = True
-            self.status_label.setText("Running")
-            self.status_label.setStyleSheet(f"color: {OneDarkTheme.GREEN}; font-weight: bold;")
+            if "ready_url" in self.service_config:
+                self.status_label.setText("Loading...")
+                self.status_label.setStyleSheet(f"color: {OneDarkTheme.YELLOW}; font-weight: bold;")
+                self.ready_timer.start()
+            else:
+                self.status_label.setText("Running")
+                self.status_label.setStyleSheet(f"color: {OneDarkTheme.GREEN}; font-weight: bold;")
         else:
             self.handle_error(self.process.error())
     
+    def check_ready(self):
+        """Show the service as running once its readiness endpoint answers 200."""
+        try:
+            with urllib.request.urlopen(self.service_config["ready_url"], timeout=0.5) as response:
+                ready = response.status == 200
+        except OSError:  # 503 while loading, or not listening yet
+            ready = False
+        
+        if ready and self.is_running:
+            self.ready_timer.stop()
+            self.status_label.setText("Running")
+            self.status_label.setStyleSheet(f"color: {OneDarkTheme.GREEN}; font-weight: bold;")
+    
     def stop_service(self):
         """Stop the service process."""
         if not self.is_running or self.process is None:
@@ -603,6 +628,7 @@ class ServicePanel(QGroupBox):
             return
             
         self.is_running = False
+        self.ready_timer.stop()
         
         # Update UI
         self.start_button.setEnabled(True)
@@ -630,6 +656,7 @@ class ServicePanel(QGroupBox):
         
         # Update UI when an error occurs
         self.is_running = False
+        self.ready_timer.stop()
         self.start_button.setEnabled(True)
         self.stop_button.setEnabled(False)
         self.status_label.setText("Error")
@@ -689,13 +689,21 @@ const VehicleMileageInsights = ({ registration, vin, paymentId, onDataLoad }) =>
         
         console.log(`Fetching vehicle data from: ${endpoint}`);
         
-        const response = await fetch(endpoint, {
+        const requestOptions = {
           headers: {
             'Accept': 'application/json',
           },
           credentials: isDevelopment ? 'include' : 'same-origin',
           mode: isDevelopment ? 'cors' : 'same-origin'
-        });
+        };
+        
+        // Mileage analytics are precomputed by the MOT API - requested alongside the vehicle data,
+        // and analysed locally instead if they can't be had
+        const analyticsRequest = fetch(`${endpoint}/mileage`, requestOptions)
+          .then(res => (res.ok ? res.json() : null))
+          .catch(() => null);
+        
+        const response = await fetch(endpoint, requestOptions);
         
         if (!response.ok) {
           // Improved error handling with content-type check
@@ -714,7 +722,7 @@ const VehicleMileageInsights = ({ registration, vin, paymentId, onDataLoad }) =>
         
         const vehicleData = await response.json();
         console.log('Received vehicle data:', vehicleData);
-        processVehicleData(vehicleData);
+        processVehicleData(vehicleData, await analyticsRequest);
         setLoading(false);
       } catch (err) {
         console.error("Error fetching vehicle data for insights:", err);
@@ -726,8 +734,8 @@ const VehicleMileageInsights = ({ registration, vin, paymentId, onDataLoad }) =>
     fetchData();
   }, [registration, vin]);
 
-  // Process vehicle data from API
-  const processVehicleData = (data) => {
+  // Process vehicle data from API, with the MOT API's mileage analytics when available
+  const processVehicleData = (data, mileageAnalytics) => {
     console.log('Processing vehicle data for insights');
     
     // Extract basic vehicle info
@@ -811,6 +819,26 @@ const VehicleMileageInsights = ({ registration, vin, paymentId, onDataLoad }) =>
         .sort((a, b) => a.date - b.date);
     }
     
+    // Prefer the readings the MOT API analysed - kilometre readings come back in miles
+    const serverReadings = mileageAnalytics?.readings;
+    const useServerAnalytics = Boolean(serverReadings && serverReadings.miles.length >= 2);
+    if (useServerAnalytics) {
+      formattedData = serverReadings.miles.map((mileage, i) => {
+        const test = data.motTests[serverReadings.testIndex[i]] || {};
+        const date = new Date(serverReadings.dates[i]);
+        return {
+          date,
+          formattedDate: date.toLocaleDateString('en-GB', { 
+            day: '2-digit', month: 'short', year: 'numeric' 
+          }),
+          mileage,
+          formattedMileage: mileage.toLocaleString(),
+          testResult: test.testResult ? String(test.testResult).trim().toUpperCase() : 'UNKNOWN',
+          rawTest: test
+        };
+      });
+    }
+    
     // Check if we have enough data for analysis
     if (formattedData.length < 2) {
       console.warn('Not enough MOT data points for analysis');
@@ -818,15 +846,40 @@ const VehicleMileageInsights = ({ registration, vin, paymentId, onDataLoad }) =>
       return;
     }
     
-    // Use enhanced anomaly detection and inactivity period detection
-    const detectedAnomalies = findMileageAnomalies(formattedData);
-    const detectedInactivityPeriods = findInactivityPeriods(formattedData);
+    let detectedAnomalies;
+    let detectedInactivityPeriods;
+    let accurateMileageStats;
+    let hasMotGaps;
     
-    // Calculate accurate mileage statistics accounting for clocking
-    const accurateMileageStats = calculateAccurateMileageStats(formattedData, detectedAnomalies);
-    
-    // Check for MOT gaps
-    const hasMotGaps = checkForMOTGaps(formattedData);
+    if (useServerAnalytics) {
+      // Precomputed anomalies and inactivity periods refer to readings by index
+      detectedAnomalies = mileageAnalytics.anomalies.map(anomaly => ({
+        ...anomaly,
+        date: new Date(anomaly.date),
+        details: {
+          ...anomaly.details,
+          current: formattedData[anomaly.index],
+          previous: formattedData[anomaly.index - 1]
+        }
+      }));
+      detectedInactivityPeriods = mileageAnalytics.inactivityPeriods.map(period => ({
+        ...period,
+        start: formattedData[period.startIndex],
+        end: formattedData[period.endIndex]
+      }));
+      accurateMileageStats = mileageAnalytics.stats;
+      hasMotGaps = mileageAnalytics.gaps.length > 0;
+    } else {
+      // Use enhanced anomaly detection and inactivity period detection
+      detectedAnomalies = findMileageAnomalies(formattedData);
+      detectedInactivityPeriods = findInactivityPeriods(formattedData);
+      
+      // Calculate accurate mileage statistics accounting for clocking
+      accurateMileageStats = calculateAccurateMileageStats(formattedData, detectedAnomalies);
+      
+      // Check for MOT gaps
+      hasMotGaps = checkForMOTGaps(formattedData);
+    }
     setMotGapsDetected(hasMotGaps);
     
     // Set all the state data - insights will be calculated by memoized hooks